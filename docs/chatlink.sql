@@ -155,13 +155,16 @@ CREATE TABLE "messages" (
   "direction" TEXT NOT NULL,
   "type" TEXT NOT NULL,
   "content" TEXT,
-  "timestamp" TIMESTAMP NOT NULL
+  "timestamp" TIMESTAMP NOT NULL,
+  "external_id" TEXT
 );
 
 CREATE INDEX ON "messages" ("client_id");
 
 CREATE INDEX ON "messages" ("user_id");
 
+CREATE UNIQUE INDEX ON "messages" ("external_id");
+
 ALTER TABLE "whatsmeow_identity_keys" ADD FOREIGN KEY ("our_jid") REFERENCES "whatsmeow_device" ("jid") ON DELETE CASCADE ON UPDATE CASCADE;
 
 ALTER TABLE "whatsmeow_pre_keys" ADD FOREIGN KEY ("jid") REFERENCES "whatsmeow_device" ("jid") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -1,21 +1,25 @@
 from dotenv import load_dotenv
 from src.config.logging_setup import setup_logging
 from src.cli.parser import build_parser
-from src.grpc.client import create_grpc_stub
-from src.whatsapp.stream import stream_messages
-from src.ai.agent import process_unattended_messages_loop
-from src.grpc.handlers import (
-    login,
-    login_and_send_qr,
-    list_devices,
-    send_message,
-    send_file,
-    delete_device,
-    login_and_send_qr_to_all_admins,
-)
+import logging
 import threading
 
 
+def preload_models():
+    """
+    Loads every heavy model up front so the first message is not delayed.
+    """
+    from src.ai.agent import get_chat
+    from src.media.audio import get_transcription_engine
+    from src.media.ocr import get_ocr_model
+
+    logging.info("Preloading models...")
+    get_chat()
+    get_transcription_engine()
+    get_ocr_model()
+    logging.info("Models preloaded")
+
+
 def main():
     load_dotenv()
     setup_logging()
@@ -23,17 +27,57 @@ def main():
     parser = build_parser()
     args = parser.parse_args()
 
+    if args.cmd == "bench":
+        from src.bench import run_benchmark
+
+        raise SystemExit(run_benchmark(args))
+
+    if args.cmd == "fakeserver":
+        from src.grpc.fake_server import serve
+
+        serve(args)
+        return
+
+    if args.cmd == "thumbnails":
+        from src.media.thumbnails import build_atlas
+
+        build_atlas()
+        return
+
+    # Los imports pesados se hacen por subcomando para que la CLI arranque rápido
+    from src.grpc.client import create_grpc_stub
+    from src.grpc import handlers
+
     stub = create_grpc_stub()
 
     if args.cmd == "login":
-        login(stub)
-    elif args.cmd == "loginqr":
-        login_and_send_qr(stub, args.to)
-    elif args.cmd == "loginqr_all":
-        login_and_send_qr_to_all_admins(stub)
+        handlers.login(stub)
+    elif args.cmd in ("loginqr", "loginqr_all"):
+        from src.mail.outbox import get_mail_outbox
+
+        if args.cmd == "loginqr":
+            handlers.login_and_send_qr(stub, args.to)
+        else:
+            handlers.login_and_send_qr_to_all_admins(stub)
+        # El correo se envía en segundo plano: vaciar la cola antes de salir
+        get_mail_outbox().flush()
     elif args.cmd == "list":
-        list_devices(stub)
+        handlers.list_devices(stub)
+    elif args.cmd == "record":
+        from src.grpc.fake_server import record_stream
+
+        record_stream(stub, args.out, args.count)
     elif args.cmd == "listen":
+        from src.whatsapp.stream import stream_messages
+        from src.ai.agent import process_unattended_messages_loop
+        from src.media.thumbnails import THUMB_ATLAS_REFRESH, start_atlas_refresh
+
+        if args.preload:
+            preload_models()
+
+        if THUMB_ATLAS_REFRESH > 0:
+            start_atlas_refresh(THUMB_ATLAS_REFRESH)
+
         ai_thread = threading.Thread(
             target=process_unattended_messages_loop, args=(stub,), daemon=True
         )
@@ -42,11 +86,11 @@ def main():
         # Iniciar escucha principal de mensajes
         stream_messages(stub)
     elif args.cmd == "send":
-        send_message(stub, args.to, args.text, from_jid=args.from_jid)
+        handlers.send_message(stub, args.to, args.text, from_jid=args.from_jid)
     elif args.cmd == "sendfile":
-        send_file(stub, args.to, args.file, from_jid=args.from_jid)
+        handlers.send_file(stub, args.to, args.file, from_jid=args.from_jid)
     elif args.cmd == "delete":
-        delete_device(stub, args.jid)
+        handlers.delete_device(stub, args.jid)
     else:
         parser.print_help()
 
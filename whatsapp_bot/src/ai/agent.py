@@ -1,12 +1,10 @@
 import logging
-import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
-from langchain_ollama import ChatOllama
-from langchain.schema import HumanMessage
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
-from PIL.Image import Image
 from sqlalchemy.orm import aliased
 from sqlalchemy import select, desc
 from dotenv import load_dotenv
@@ -19,29 +17,50 @@ from src.ai.extractors import (
     is_order,
     is_order_confirmation
 )
-from src.ai.utils import update_order, confirmed_order, order_to_xlsx, order_to_pdf
+from src.ai.streaming import stream_chat_response
+from src.ai.batching import MicroBatcher
+from src.ai.backends import LLMBackend, create_backend
+from src.ai.utils import (
+    update_order_pages,
+    confirmed_order,
+    order_to_xlsx,
+    order_to_pdf,
+)
 from src.core.database import get_sqlite_session, get_sqlserver_session
 from src.models.message import Message
 from src.models.user import User
 from src.models.product import Articulo
 from src.models.client import Cliente
-from src.grpc.handlers import send_message, send_file
+from src.grpc.handlers import send_message, send_file_bytes
 from src.mail.mail_handler import notify_order_by_email
+from src.media.render import IMAGE_EXTENSIONS, ORDER_IMAGE_FORMAT
 
 load_dotenv()
 MIN_MINUTES = int(os.getenv("UNATTENDED_MINUTES_MIN", 15))
 MAX_MINUTES = int(os.getenv("UNATTENDED_MINUTES_MAX", 30))
 
-OLLAMA_URL = os.getenv("OLLAMA_URL", "")
+STREAM_REPLIES = os.getenv("LLM_STREAM_REPLIES", "true").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", 8))
+BATCH_WINDOW_MS = int(os.getenv("LLM_BATCH_WINDOW_MS", 20))
+# Mensajes revisados al confirmar: incluye todas las páginas del pedido
+ORDER_CONFIRM_HISTORY = 50
+# Chats no atendidos que se responden a la vez: sus is_order van en un lote
+UNATTENDED_WORKERS = int(os.getenv("UNATTENDED_WORKERS", BATCH_MAX_SIZE))
+
+_chat: Optional[LLMBackend] = None
+_chat_lock = threading.Lock()
 
-chat = ChatOllama(
-    model="llama3",
-    temperature=0.0,
-    top_p=0.1,
-    repeat_penalty=1.2,
-    num_predict=128,
-    format="json",
-)
+
+def get_chat() -> LLMBackend:
+    """
+    Returns the shared LLM backend, creating it on first use.
+    """
+    global _chat
+    if _chat is None:
+        with _chat_lock:
+            if _chat is None:
+                _chat = create_backend()
+    return _chat
 
 
 def mentioned_products_prompt(history: str, message_text: str) -> str:
@@ -222,6 +241,31 @@ def chat_prompt(comercial_name: str, history: str, message_text: str) -> str:
     """.strip()
 
 
+# Un batcher (y su hilo) por configuración de backend, no por instancia
+_order_classifiers: dict[tuple, MicroBatcher] = {}
+_order_classifiers_lock = threading.Lock()
+
+
+def get_order_classifier(chat: LLMBackend) -> MicroBatcher:
+    """
+    Returns the micro-batcher that groups ``is_order`` prompts for ``chat``.
+
+    Classification requests from concurrent chats are collected for
+    LLM_BATCH_WINDOW_MS and sent together through ``chat.batch``.
+    """
+    with _order_classifiers_lock:
+        classifier = _order_classifiers.get(chat.config_key())
+        if classifier is None:
+            classifier = MicroBatcher(
+                chat.batch,
+                max_batch=BATCH_MAX_SIZE,
+                max_wait=BATCH_WINDOW_MS / 1000,
+                name="is-order-batcher",
+            )
+            _order_classifiers[chat.config_key()] = classifier
+        return classifier
+
+
 def handle_incoming_message(
     sqlite_session: Session,
     sqlserver_session: Session,
@@ -229,9 +273,10 @@ def handle_incoming_message(
     receiver: str,
     sender: str,
     message_text: str,
-    chat=chat,
+    chat: Optional[LLMBackend] = None,
 ):
     logging.info("Handling incoming message for AI processing")
+    chat = chat or get_chat()
 
     cliente = Cliente.get_by_telefono(sqlserver_session, sender)
     if not cliente:
@@ -248,7 +293,7 @@ def handle_incoming_message(
     stmt = (
         select(Message.direction, Message.content)
         .where(Message.client_id == cliente.codigo_cliente)
-        .order_by(desc(Message.timestamp))
+        .order_by(desc(Message.timestamp), desc(Message.id))
         .limit(6)
     )
     messages: List[Message] = sqlite_session.execute(stmt).all()[::-1]
@@ -262,9 +307,7 @@ def handle_incoming_message(
     )
 
     is_order_prompt_text: str = is_order_prompt(history, message_text)
-    is_order_raw_response: str = chat.invoke(
-        [HumanMessage(content=is_order_prompt_text)]
-    ).content.strip()
+    is_order_raw_response: str = get_order_classifier(chat)(is_order_prompt_text)
     logging.info(f"Is an order: {is_order(is_order_raw_response)}")
     if is_order(is_order_raw_response):
         logging.info(f"Is an order confirmation: {is_order_confirmation(message_text)}")
@@ -273,33 +316,37 @@ def handle_incoming_message(
                 logging.info(
                     f"message direction: {message.direction} \ message content: {message.content}"
                 )
-            confirmed_order_text: str = confirmed_order(messages)
+            # Las páginas de un pedido largo no caben en el historial del prompt
+            order_messages = sqlite_session.execute(
+                stmt.limit(ORDER_CONFIRM_HISTORY)
+            ).all()[::-1]
+            confirmed_order_text: str = confirmed_order(order_messages)
             logging.info(f"confirmed_order_text: {confirmed_order_text}")
-            updated_confirmed_order_csv_path: Optional[str] = order_to_xlsx(
-                confirmed_order_text
-            )
-            updated_confirmed_order_pdf_path: str = order_to_pdf(confirmed_order_text)
+            order_xlsx: Optional[bytes] = order_to_xlsx(confirmed_order_text)
+            order_pdf: bytes = order_to_pdf(confirmed_order_text)
 
             notify_order_by_email(
                 user=comercial,
                 client=cliente,
                 phone=sender,
-                csv_path=updated_confirmed_order_csv_path,
+                order_file=("pedido.xlsx", order_xlsx) if order_xlsx else None,
             )
-            send_file(stub, sender, updated_confirmed_order_pdf_path, from_jid=receiver)
+            send_file_bytes(stub, sender, order_pdf, "pedido.pdf", from_jid=receiver)
         else:
             mentioned_products_prompt_text: str = mentioned_products_prompt(
                 history, message_text
             )
             mentioned_products_raw_response: str = chat.invoke(
-                [HumanMessage(content=mentioned_products_prompt_text)]
-            ).content.strip()
+                mentioned_products_prompt_text
+            )
             if mentioned_products := extract_mentioned_products(
                 mentioned_products_raw_response
             ):
                 logging.info(f"Mentioned products: {mentioned_products}")
-                img: Image | None = update_order(sqlserver_session, mentioned_products)
-                if img:
+                pages: List[bytes] = update_order_pages(
+                    sqlserver_session, mentioned_products
+                )
+                if pages:
                     send_message(
                         stub,
                         sender,
@@ -309,42 +356,60 @@ def handle_incoming_message(
                         [Este mensaje fue generado automáticamente por un asistente en versión de pruebas]",
                         from_jid=receiver,
                     )
-                    
-                    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
-                    filename = f"pedido_{timestamp}.jpg"
-                    tmp_dir = tempfile.gettempdir()
-                    filepath = os.path.join(tmp_dir, filename)
-
-                    img.save(filepath, format="JPEG")
 
-                    send_file(stub, sender, filepath=filepath, from_jid=receiver)
-                    os.remove(filepath)
+                    timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
+                    extension = IMAGE_EXTENSIONS.get(ORDER_IMAGE_FORMAT, ".jpg")
+                    for number, page in enumerate(pages, start=1):
+                        suffix = f"_{number}" if len(pages) > 1 else ""
+                        filename = f"pedido_{timestamp}{suffix}{extension}"
+                        send_file_bytes(stub, sender, page, filename, from_jid=receiver)
             else:
-                chat_prompt_text: str = chat_prompt(
-                    comercial_name, history, message_text
+                reply_with_chat(
+                    chat, stub, comercial_name, history, message_text, sender, receiver
                 )
-                chat_raw_response: str = chat.invoke(
-                    [HumanMessage(content=chat_prompt_text)]
-                ).content.strip()
-                chat_response: str | None = extract_response_text(chat_raw_response)
-                if chat_response and len(chat_response.strip()) > 0:
-                    chat_response += "\n[Este mensaje fue generado automáticamente por un asistente en versión de pruebas]"
-                    send_message(stub, sender, chat_response, from_jid=receiver)
-                    logging.info("IA Response successfully sent")
-                else:
-                    logging.info("There is not IA response")
     else:
-        chat_prompt_text: str = chat_prompt(comercial_name, history, message_text)
-        chat_raw_response: str = chat.invoke(
-            [HumanMessage(content=chat_prompt_text)]
-        ).content.strip()
-        chat_response: str | None = extract_response_text(chat_raw_response)
-        if chat_response and len(chat_response.strip()) > 0:
-            chat_response += "\n[Este mensaje fue generado automáticamente por un asistente en versión de pruebas]"
-            send_message(stub, sender, chat_response, from_jid=receiver)
-            logging.info("IA Response successfully sent")
-        else:
+        reply_with_chat(
+            chat, stub, comercial_name, history, message_text, sender, receiver
+        )
+
+
+def reply_with_chat(
+    chat: LLMBackend,
+    stub,
+    comercial_name: str,
+    history: str,
+    message_text: str,
+    sender: str,
+    receiver: str,
+):
+    """
+    Asks the model for a conversational reply and sends it over WhatsApp.
+
+    With LLM_STREAM_REPLIES enabled the answer is streamed: generation stops as
+    soon as the model says it won't answer, and the reply is sent as soon as
+    ``respuesta`` is complete.
+    """
+    chat_prompt_text: str = chat_prompt(comercial_name, history, message_text)
+
+    def send_reply(chat_response: str):
+        if not chat_response.strip():
             logging.info("There is not IA response")
+            return
+        chat_response += "\n[Este mensaje fue generado automáticamente por un asistente en versión de pruebas]"
+        send_message(stub, sender, chat_response, from_jid=receiver)
+        logging.info("IA Response successfully sent")
+
+    if STREAM_REPLIES:
+        if stream_chat_response(chat.stream(chat_prompt_text), send_reply) is None:
+            logging.info("There is not IA response")
+        return
+
+    chat_raw_response: str = chat.invoke(chat_prompt_text)
+    chat_response: str | None = extract_response_text(chat_raw_response)
+    if chat_response:
+        send_reply(chat_response)
+    else:
+        logging.info("There is not IA response")
 
 
 def search_products(sqlserver_session: Session, keywords: list[str]) -> str:
@@ -366,12 +431,34 @@ def search_products(sqlserver_session: Session, keywords: list[str]) -> str:
     return "\n".join(lines)
 
 
+def reply_unattended(stub, receiver: str, sender: str, message_text: str):
+    """
+    Answers one unattended chat with its own sessions, so several chats can
+    be handled at once.
+    """
+    sqlite_session = get_sqlite_session()
+    sqlserver_session = get_sqlserver_session()
+    try:
+        handle_incoming_message(
+            sqlite_session, sqlserver_session, stub, receiver, sender, message_text
+        )
+    except Exception as e:
+        logging.error(f"Error respondiendo a {sender}: {e}")
+    finally:
+        sqlite_session.close()
+        sqlserver_session.close()
+
+
 def process_unattended_messages_loop(stub):
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, UNATTENDED_WORKERS), thread_name_prefix="unattended"
+    )
     while True:
         logging.info("🔍 Revisando últimos mensajes de clientes no respondidos...")
 
         sqlite_session = get_sqlite_session()
         sqlserver_session = get_sqlserver_session()
+        pending = []
 
         try:
             # Aliased para evitar conflictos
@@ -447,14 +534,7 @@ def process_unattended_messages_loop(stub):
                     continue
 
                 logging.info(f"🤖 Enviando respuesta IA a cliente {last_msg.client_id}")
-                handle_incoming_message(
-                    sqlite_session,
-                    sqlserver_session,
-                    stub,
-                    user.phone,
-                    client_phone,
-                    last_msg.content,
-                )
+                pending.append((user.phone, client_phone, last_msg.content))
 
         except Exception as e:
             logging.error(f"Error en el loop de mensajes no atendidos: {e}")
@@ -463,6 +543,11 @@ def process_unattended_messages_loop(stub):
             sqlite_session.close()
             sqlserver_session.close()
 
+        # Se espera a todas: un chat aún sin responder saldría en la siguiente ronda
+        futures = [pool.submit(reply_unattended, stub, *chat) for chat in pending]
+        for future in futures:
+            future.result()
+
         time.sleep(60)
 
 
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Opciones de generación compartidas por todos los backends
+TEMPERATURE = 0.0
+TOP_P = 0.1
+REPEAT_PENALTY = 1.2
+MAX_TOKENS = 128
+
+
+class LLMBackend(ABC):
+    """
+    Minimal text-in/text-out interface used by the agent.
+
+    Prompts are plain strings and answers are the raw model text, so the
+    pipeline does not depend on any particular client library.
+    """
+
+    @abstractmethod
+    def invoke(self, prompt: str) -> str:
+        """Returns the complete answer for ``prompt``."""
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yields the answer in chunks. Closing the iterator aborts generation."""
+        yield self.invoke(prompt)
+
+    def config_key(self) -> tuple:
+        """Identifies backends that talk to the same model the same way."""
+        return (type(self).__name__,)
+
+    def batch(self, prompts: List[str]) -> List[str]:
+        """Answers several prompts concurrently, preserving order."""
+        if len(prompts) == 1:
+            return [self.invoke(prompts[0])]
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            return list(pool.map(self.invoke, prompts))
+
+
+class OllamaBackend(LLMBackend):
+    def __init__(self, model: str, base_url: Optional[str] = None):
+        from langchain_ollama import ChatOllama
+
+        options = dict(
+            model=model,
+            temperature=TEMPERATURE,
+            top_p=TOP_P,
+            repeat_penalty=REPEAT_PENALTY,
+            num_predict=MAX_TOKENS,
+            format="json",
+        )
+        if base_url:
+            options["base_url"] = base_url
+        self.chat = ChatOllama(**options)
+        self.model = model
+        self.base_url = base_url
+
+    def config_key(self) -> tuple:
+        return ("ollama", self.model, self.base_url)
+
+    @staticmethod
+    def _messages(prompt: str):
+        from langchain.schema import HumanMessage
+
+        return [HumanMessage(content=prompt)]
+
+    def invoke(self, prompt: str) -> str:
+        return self.chat.invoke(self._messages(prompt)).content.strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.chat.stream(self._messages(prompt)):
+            yield chunk.content
+
+    def batch(self, prompts: List[str]) -> List[str]:
+        responses = self.chat.batch(
+            [self._messages(prompt) for prompt in prompts],
+            config={"max_concurrency": len(prompts)},
+        )
+        return [response.content.strip() for response in responses]
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Backend for any server exposing ``/v1/chat/completions`` (vLLM,
+    llama.cpp server, LM Studio, OpenAI...).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str,
+        api_key: str = "",
+        timeout: float = 120.0,
+    ):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def config_key(self) -> tuple:
+        return ("openai", self.model, self.url)
+
+    def _request(self, prompt: str, stream: bool):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": TEMPERATURE,
+            "top_p": TOP_P,
+            "max_tokens": MAX_TOKENS,
+            "response_format": {"type": "json_object"},
+            "stream": stream,
+        }
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(), headers=headers
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def invoke(self, prompt: str) -> str:
+        with self._request(prompt, stream=False) as response:
+            body = json.load(response)
+        return body["choices"][0]["message"]["content"].strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        # Respuesta en formato Server-Sent Events: "data: {...}" por línea
+        with self._request(prompt, stream=True) as response:
+            for raw_line in response:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Deterministic local stand-in for load testing without a model.
+
+    Recognizes the agent's prompts and answers them with plausible JSON:
+    order classification, product extraction and chat replies. Each call
+    sleeps ``latency`` seconds, and streamed answers additionally wait
+    ``token_latency`` seconds per chunk.
+    """
+
+    _MESSAGE_PATTERN = re.compile(
+        r"Mensaje(?: del cliente)?:\s*\n(.*?)\n\s*<\|(?:assistant|eot_id)\|>", re.S
+    )
+    _PRODUCT_PATTERN = re.compile(
+        r"\b(\d+)\s*(?:x|del|de|unidades de)?\s+([A-Z0-9]*\d[A-Z0-9]*)\b", re.I
+    )
+
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+
+    def config_key(self) -> tuple:
+        return ("fake", self.latency, self.token_latency)
+
+    def _message(self, prompt: str) -> str:
+        matches = self._MESSAGE_PATTERN.findall(prompt)
+        return matches[-1].strip() if matches else ""
+
+    def _answer(self, prompt: str) -> str:
+        message = self._message(prompt)
+        products = [
+            [code.upper(), qty] for qty, code in self._PRODUCT_PATTERN.findall(message)
+        ]
+
+        if '"order": true' in prompt:
+            return json.dumps({"order": bool(products)})
+
+        if '"items"' in prompt:
+            return json.dumps({"items": products})
+
+        # chat_prompt: responde a la mitad de los mensajes de forma determinista
+        digest = hashlib.sha256(message.encode()).digest()
+        if digest[0] % 2:
+            return json.dumps({"responder": False})
+        return json.dumps(
+            {
+                "responder": True,
+                "respuesta": "Para hacer un pedido envía cantidades y códigos, p.ej. 2 x KG500.",
+            },
+            ensure_ascii=False,
+        )
+
+    def invoke(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        time.sleep(self.latency)
+        answer = self._answer(prompt)
+        for i in range(0, len(answer), 4):
+            time.sleep(self.token_latency)
+            yield answer[i : i + 4]
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """
+    Builds the backend selected by LLM_BACKEND (``ollama``, ``openai`` or ``fake``).
+    """
+    name = (name or os.getenv("LLM_BACKEND", "ollama")).lower()
+    model = os.getenv("LLM_MODEL", "llama3")
+    logging.info(f"Using LLM backend: {name}")
+
+    if name == "ollama":
+        return OllamaBackend(model, base_url=os.getenv("OLLAMA_URL") or None)
+    if name == "openai":
+        return OpenAICompatibleBackend(
+            model,
+            base_url=os.getenv("OPENAI_BASE_URL", "http://localhost:8000/v1"),
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+        )
+    if name == "fake":
+        return FakeLLMBackend(
+            latency=int(os.getenv("FAKE_LLM_LATENCY_MS", 0)) / 1000,
+            token_latency=int(os.getenv("FAKE_LLM_TOKEN_LATENCY_MS", 0)) / 1000,
+        )
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,75 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """
+    Collects requests arriving from several threads and submits them together.
+
+    The first request of a batch opens a collection window of ``max_wait``
+    seconds; everything that arrives meanwhile (up to ``max_batch`` items) is
+    sent in a single call to ``batch_fn``. Under light traffic a request only
+    pays the window, which is negligible next to an LLM round trip.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List], List],
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+        name: str = "micro-batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Tuple[object, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout: Optional[float] = None):
+        """Submits ``item`` and blocks until its result is available."""
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[object, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            logging.debug(f"Submitting batch of {len(items)} requests")
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            # Un batch_fn que devuelve menos resultados no deja a nadie esperando
+            for _, future in batch[len(results) :]:
+                future.set_exception(
+                    RuntimeError(
+                        f"Batch returned {len(results)} results for {len(batch)} items"
+                    )
+                )
@@ -0,0 +1,190 @@
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, Optional
+
+_LITERAL_PATTERN = re.compile(r"true|false|null|-?\d+(?:\.\d*)?(?:[eE][+-]?\d*)?")
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONFields:
+    """
+    Incremental parser for the top-level fields of a JSON object.
+
+    Text is fed in arbitrary chunks (as produced by a streaming LLM) and every
+    top-level scalar field becomes available in ``fields`` as soon as its value
+    is complete, without waiting for the closing brace. Nested objects and
+    arrays are skipped.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """
+        Appends a chunk and parses as far as possible.
+
+        Returns:
+            Fields completed by this chunk (may be empty).
+        """
+        self._buf += chunk
+        completed: Dict[str, Any] = {}
+
+        while not self.done:
+            self._skip_whitespace()
+            if self._pos >= len(self._buf):
+                break
+            char = self._buf[self._pos]
+
+            if self._state == "start":
+                if char != "{":
+                    # Ruido antes del objeto (p.ej. texto libre del modelo)
+                    self._pos += 1
+                    continue
+                self._pos += 1
+                self._state = "key"
+
+            elif self._state == "key":
+                if char == "}":
+                    self._pos += 1
+                    self.done = True
+                    break
+                if char == ",":
+                    self._pos += 1
+                    continue
+                end = self._string_end(self._pos)
+                if end is None:
+                    break
+                self._key = json.loads(self._buf[self._pos : end + 1])
+                self._pos = end + 1
+                self._state = "colon"
+
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':' at position {self._pos}")
+                self._pos += 1
+                self._state = "value"
+
+            elif self._state == "value":
+                end = self._value_end(self._pos)
+                if end is None:
+                    break
+                raw = self._buf[self._pos : end]
+                if raw[0] not in "{[":
+                    value = json.loads(raw)
+                    self.fields[self._key] = value
+                    completed[self._key] = value
+                self._pos = end
+                self._key = None
+                self._state = "key"
+
+        return completed
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _string_end(self, start: int) -> Optional[int]:
+        """Index of the closing quote of the string starting at ``start``."""
+        idx = start + 1
+        while idx < len(self._buf):
+            char = self._buf[idx]
+            if char == "\\":
+                idx += 2
+                continue
+            if char == '"':
+                return idx
+            idx += 1
+        return None
+
+    def _value_end(self, start: int) -> Optional[int]:
+        """Index just past the value starting at ``start``, or None if incomplete."""
+        char = self._buf[start]
+
+        if char == '"':
+            end = self._string_end(start)
+            return None if end is None else end + 1
+
+        if char in "{[":
+            depth = 0
+            idx = start
+            while idx < len(self._buf):
+                c = self._buf[idx]
+                if c == '"':
+                    end = self._string_end(idx)
+                    if end is None:
+                        return None
+                    idx = end + 1
+                    continue
+                if c in "{[":
+                    depth += 1
+                elif c in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        return idx + 1
+                idx += 1
+            return None
+
+        match = _LITERAL_PATTERN.match(self._buf, start)
+        # Un literal sólo está completo cuando le sigue un delimitador
+        if match is None or match.end() >= len(self._buf):
+            if len(self._buf) - start < 5 or match is not None:
+                return None
+            raise ValueError(f"Unexpected token at position {start}")
+        if self._buf[match.end()] not in _WHITESPACE + ",}":
+            raise ValueError(f"Unexpected token at position {match.end()}")
+        return match.end()
+
+
+def stream_chat_response(
+    chunks: Iterable[str],
+    on_response: Callable[[str], None],
+) -> Optional[str]:
+    """
+    Consumes a streamed ``chat_prompt`` answer and acts on it as early as possible.
+
+    Generation is abandoned as soon as ``"responder": false`` is seen, and
+    ``on_response`` is called as soon as ``"respuesta"`` is complete (provided
+    ``responder`` is true), without waiting for the rest of the output.
+
+    Args:
+        chunks: Iterator of text chunks from the model.
+        on_response: Callback receiving the reply text.
+
+    Returns:
+        The reply text, or None if the model decided not to answer.
+    """
+    parser = IncrementalJSONFields()
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            try:
+                parser.feed(chunk)
+            except ValueError as e:
+                logging.warning(f"Streamed response is not valid JSON: {e}")
+                return None
+
+            responder = parser.fields.get("responder")
+            if responder is False:
+                logging.info("Model decided not to answer, aborting generation")
+                return None
+
+            respuesta = parser.fields.get("respuesta")
+            if responder is True and isinstance(respuesta, str):
+                on_response(respuesta)
+                return respuesta
+
+            if parser.done:
+                break
+    finally:
+        # Cerrar el generador corta la petición HTTP y detiene la generación
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+
+    return None
@@ -1,19 +1,42 @@
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Union
 from sqlalchemy.orm import Session
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
-import tempfile
+import io
 from PIL import Image
 from openpyxl import Workbook
 import logging
-import os
 import re
 
 from src.models.product import Articulo
 from src.models.message import Message
-from src.media.sftp import find_image_file, build_order_image_table
+from src.media.sftp import find_image_file
+from src.media.render import build_order_image_table, render_order_pages
+from src.media.thumbnails import get_thumbnail_atlas
+
+def order_items(
+    session: Session, productos: List[Tuple[str, str]]
+) -> List[Tuple[str, str, str, Union[bytes, Image.Image, None]]]:
+    """
+    Resolves (codigo, cantidad) pairs into rows for the order image:
+    (codigo, cantidad, descripcion, thumbnail). The thumbnail comes from the
+    local atlas when available, otherwise the full image is fetched from SFTP.
+    """
+    atlas = get_thumbnail_atlas()
+    items = []
+
+    for codigo, cantidad in productos:
+        articulo = Articulo.get_by_codigo(session, codigo)
+        descripcion = (
+            articulo.descripcion1 if articulo else "Sin coincidencia de Articulos"
+        )
+        thumbnail = atlas.get(codigo) or find_image_file(codigo)
+        items.append((codigo, cantidad or "", descripcion, thumbnail))
+
+    return items
+
 
 def update_order(
     session: Session, productos: List[Tuple[str, str]]
@@ -32,23 +55,43 @@ def update_order(
         logging.warning("No products provided.")
         return None
 
-    items = []
+    return build_order_image_table(order_items(session, productos))
 
-    for codigo, cantidad in productos:
-        articulo = Articulo.get_by_codigo(session, codigo)
-        descripcion = (
-            articulo.descripcion1 if articulo else "Sin coincidencia de Articulos"
-        )
-        img_bytes = find_image_file(codigo)
-        items.append((codigo, cantidad or "", descripcion, img_bytes))
 
-    return build_order_image_table(items)
+def update_order_pages(
+    session: Session, productos: List[Tuple[str, str]]
+) -> List[bytes]:
+    """
+    Like ``update_order`` but split into fixed-size pages, each already
+    encoded (see ORDER_PAGE_LINES / ORDER_IMAGE_FORMAT). Empty if no products.
+    """
+    if not productos:
+        logging.warning("No products provided.")
+        return []
+
+    return render_order_pages(order_items(session, productos))
+
+
+def _order_page_tokens(message) -> Optional[List[str]]:
+    """
+    Tokens "\\codigo" / "\\cantidad" of a page sent by the bot with an order
+    ('PEDIDO:' prefix), or None if ``message`` is not one.
+    """
+    content = message.content
+    if message.direction != "sent" or not isinstance(content, str):
+        return None
+    if not content.strip().lower().startswith("pedido:"):
+        return None
+    return re.findall(r"\\\S+", content)
 
 
 def confirmed_order(messages: List["Message"]) -> Optional[str]:
     """
-    Busca el último mensaje del comercial con un pedido (prefijo 'Pedido:')
+    Busca el último pedido enviado por el comercial (prefijo 'Pedido:')
     seguido por una confirmación del cliente ('es correcto').
+
+    Un pedido largo se envía en varias páginas consecutivas, cada una con su
+    propio 'PEDIDO:'; se devuelven unidas como un único pedido.
     """
 
     pedido_idx = None
@@ -78,40 +121,44 @@ def confirmed_order(messages: List["Message"]) -> Optional[str]:
 
     logging.info("Buscando mensaje de pedido anterior a la confirmación...")
 
-    # Buscar hacia atrás un mensaje enviado que parezca un pedido
+    # Última página de pedido anterior a la confirmación
     for idx in range(confirmacion_idx - 1, -1, -1):
-        direction = messages[idx].direction
-        content = messages[idx].content
-        if direction == "sent" and isinstance(content, str):
-            logging.info(f"Revisando posible pedido en mensaje [{idx}]")
-
-            content_stripped = content.strip().lower()
-            if content_stripped.startswith("pedido:"):
-                # Verifica tokens del tipo "\codigo"
-                tokens = re.findall(r"\\\S+", content)
-                logging.info(
-                    f"Mensaje [{idx}] contiene {len(tokens)} tokens con formato '\\...': {tokens}"
-                )
-                if len(tokens) >= 4:
-                    pedido_idx = idx
-                    logging.info(f"Pedido válido encontrado en mensaje [{idx}]")
-                    break
-                else:
-                    logging.info(
-                        f"Mensaje [{idx}] comienza con 'pedido:' pero no contiene suficientes tokens válidos."
-                    )
+        tokens = _order_page_tokens(messages[idx])
+        if tokens is None:
+            continue
+        logging.info(
+            f"Mensaje [{idx}] contiene {len(tokens)} tokens con formato "
+            f"'\\...': {tokens}"
+        )
+        if len(tokens) >= 2:
+            pedido_idx = idx
+            break
+        logging.info(
+            f"Mensaje [{idx}] comienza con 'pedido:' pero no contiene tokens válidos."
+        )
 
     if pedido_idx is None:
         logging.info("No se encontró ningún mensaje de pedido válido.")
         return None
 
-    logging.info(f"Retornando contenido del pedido del mensaje [{pedido_idx}]")
-    return messages[pedido_idx].content
+    # Páginas anteriores del mismo pedido: enviadas justo antes, sin nada en medio
+    first_idx = pedido_idx
+    while first_idx > 0 and _order_page_tokens(messages[first_idx - 1]):
+        first_idx -= 1
+
+    pages = [messages[idx].content for idx in range(first_idx, pedido_idx + 1)]
+    payload = " ".join(page.strip().split(":", 1)[1].strip() for page in pages)
+    if len(re.findall(r"\\\S+", payload)) < 4:
+        logging.info("El pedido no contiene suficientes tokens válidos.")
+        return None
+
+    logging.info(f"Retornando pedido de los mensajes [{first_idx}..{pedido_idx}]")
+    return f"PEDIDO: {payload}"
 
 
-def order_to_xlsx(ocr_text: str) -> Optional[str]:
+def order_to_xlsx(ocr_text: str) -> Optional[bytes]:
     """
-    Convierte un texto OCR plano en un archivo Excel (.xlsx) con columnas Código y Cantidad.
+    Convierte un texto OCR plano en un Excel (.xlsx), en memoria, con columnas Código y Cantidad.
     El texto debe tener el formato: "PEDIDO: \codigo \cantidad \codigo \cantidad ..."
     """
     try:
@@ -132,9 +179,6 @@ def order_to_xlsx(ocr_text: str) -> Optional[str]:
     if not data:
         return None
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
-        path = tmp.name
-
     wb = Workbook()
     ws = wb.active
     ws.title = "Pedido"
@@ -142,13 +186,14 @@ def order_to_xlsx(ocr_text: str) -> Optional[str]:
     for row in data:
         ws.append(row)
 
-    wb.save(path)
-    return path
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
 
 
-def order_to_pdf(ocr_text: str, output_path: Optional[str] = None) -> str:
+def order_to_pdf(ocr_text: str) -> bytes:
     """
-    Convierte el texto OCR plano del pedido en un PDF.
+    Convierte el texto OCR plano del pedido en un PDF, generado en memoria.
     Formato esperado: "PEDIDO: \codigo \cantidad \codigo \cantidad ..."
     """
     try:
@@ -169,10 +214,8 @@ def order_to_pdf(ocr_text: str, output_path: Optional[str] = None) -> str:
     for i in range(0, len(tokens), 2):
         data.append([tokens[i], tokens[i + 1]])
 
-    if not output_path:
-        output_path = os.path.join(tempfile.gettempdir(), "pedido.pdf")
-
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
     elements = [
         Paragraph("Pedido de productos", styles["Title"]),
@@ -193,4 +236,4 @@ def order_to_pdf(ocr_text: str, output_path: Optional[str] = None) -> str:
     ]
 
     doc.build(elements)
-    return output_path
+    return buffer.getvalue()
@@ -0,0 +1,55 @@
+import importlib
+import json
+import logging
+import platform
+import subprocess
+from datetime import datetime
+
+# Subcomando de "bench" -> módulo que lo implementa (cada uno expone run(args))
+BENCHMARKS = {
+    "startup": "src.bench.startup",
+    "asr": "src.bench.asr",
+    "ocr": "src.bench.ocr",
+    "render": "src.bench.render",
+    "grpc": "src.bench.grpc",
+    "pipeline": "src.bench.pipeline",
+}
+
+
+def run_benchmark(args) -> int:
+    """
+    Runs the benchmark selected on the command line and returns its exit code.
+    """
+    module = importlib.import_module(BENCHMARKS[args.bench_target])
+    return module.run(args)
+
+
+def git_revision() -> str:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return "unknown"
+
+
+def write_results(path: str, name: str, results: dict):
+    """
+    Writes benchmark results as JSON, tagged with the commit and machine they
+    were produced on so runs can be compared across commits.
+    """
+    payload = {
+        "benchmark": name,
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    logging.info(f"Benchmark results written to {path}")
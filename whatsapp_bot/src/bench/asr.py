@@ -0,0 +1,80 @@
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bench import write_results
+from src.media.audio import (
+    SAMPLE_RATE,
+    SAMPLE_WIDTH,
+    TranscriptionEngine,
+    decode_audio_stream,
+    get_vosk_model,
+)
+
+
+def load_corpus(corpus_dir: str) -> list[tuple[str, bytes, float]]:
+    """
+    Loads every .ogg note in ``corpus_dir`` with its duration in seconds.
+    """
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.ogg"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        pcm_bytes = sum(len(chunk) for chunk in decode_audio_stream(data))
+        corpus.append((os.path.basename(path), data, pcm_bytes / SAMPLE_WIDTH / SAMPLE_RATE))
+    return corpus
+
+
+def run(args) -> int:
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        logging.error(f"No .ogg files found in {args.corpus}")
+        return 1
+
+    audio_seconds = sum(duration for _, _, duration in corpus)
+    logging.info(f"ASR corpus: {len(corpus)} notes, {audio_seconds:.1f}s of audio")
+
+    model = get_vosk_model()
+    results = {"notes": len(corpus), "audio_seconds": round(audio_seconds, 2), "runs": []}
+
+    for chunk_frames in args.chunk_frames:
+        for workers in args.workers:
+            engine = TranscriptionEngine(
+                model, pool_size=workers, chunk_frames=chunk_frames
+            )
+            # Calentar el pool para no medir la creación de reconocedores
+            engine.transcribe(corpus[0][1])
+
+            per_note = {}
+
+            def transcribe(note):
+                name, data, duration = note
+                start = time.perf_counter()
+                engine.transcribe(data)
+                per_note[name] = round((time.perf_counter() - start) / duration, 4)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(transcribe, corpus))
+            elapsed = time.perf_counter() - start
+
+            rtf = elapsed / audio_seconds
+            logging.info(
+                f"asr[chunk={chunk_frames} workers={workers}]: "
+                f"RTF={rtf:.3f} ({audio_seconds / elapsed:.1f}x real time)"
+            )
+            results["runs"].append(
+                {
+                    "chunk_frames": chunk_frames,
+                    "workers": workers,
+                    "elapsed_s": round(elapsed, 3),
+                    "rtf": round(rtf, 4),
+                    "per_note_rtf": per_note,
+                }
+            )
+
+    if args.output:
+        write_results(args.output, "asr", results)
+    return 0
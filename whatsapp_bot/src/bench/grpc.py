@@ -0,0 +1,112 @@
+import gzip
+import logging
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+
+from src.bench import write_results
+from src.grpc.channel import channel_options
+from src.grpc.fake_server import FAKE_DEVICE_JID, start_fake_server
+from src.proto.whatsapp_pb2 import SendRequest
+from src.proto.whatsapp_pb2_grpc import WhatsAppServiceStub
+
+COMPRESSIONS = {"none": grpc.Compression.NoCompression, "gzip": grpc.Compression.Gzip}
+
+
+def make_payload(kind: str, size: int, seed: int = 0) -> bytes:
+    """
+    "image" is incompressible, like a JPEG; "document" is repetitive text
+    with varying values, like an exported spreadsheet or PDF text.
+    """
+    if kind == "image":
+        return os.urandom(size)
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = (
+            f"KG{rng.randint(0, 999999):06d};{rng.randint(1, 48)};"
+            f"Producto {rng.randint(1, 500)}\n"
+        )
+        lines.append(line)
+        total += len(line)
+    return "".join(lines).encode()[:size]
+
+
+def measure(stub, request, compression, requests: int, concurrency: int):
+    latencies = []
+
+    def call(_):
+        start = time.perf_counter()
+        resp = stub.SendMessage(request, compression=compression)
+        latencies.append(time.perf_counter() - start)
+        return resp.success
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        ok = sum(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "ok": ok,
+        "msgs_per_s": round(requests / elapsed, 1),
+        "mb_per_s": round(requests * len(request.binary) / elapsed / 1024 / 1024, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run(args) -> int:
+    server, port = start_fake_server()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}", options=channel_options())
+    stub = WhatsAppServiceStub(channel)
+    grpc.channel_ready_future(channel).result(timeout=10)
+
+    results = []
+    try:
+        for kind in args.kinds:
+            for size_kb in args.sizes_kb:
+                payload = make_payload(kind, size_kb * 1024)
+                ratio = len(gzip.compress(payload, 6)) / len(payload)
+                request = SendRequest(
+                    to="34611111111",
+                    from_jid=FAKE_DEVICE_JID,
+                    filename=f"bench.{'jpg' if kind == 'image' else 'csv'}",
+                    binary=payload,
+                )
+                for concurrency in args.concurrency:
+                    for name in args.compression:
+                        # Calentamiento: conexión y primeras asignaciones
+                        measure(stub, request, COMPRESSIONS[name], 5, 1)
+                        row = {
+                            "kind": kind,
+                            "size_kb": size_kb,
+                            "concurrency": concurrency,
+                            "compression": name,
+                            "gzip_ratio": round(ratio, 3),
+                            **measure(
+                                stub,
+                                request,
+                                COMPRESSIONS[name],
+                                args.requests,
+                                concurrency,
+                            ),
+                        }
+                        results.append(row)
+                        logging.info(
+                            f"grpc[{kind} {size_kb}KB x{concurrency} {name}]: "
+                            f"{row['msgs_per_s']} msg/s {row['mb_per_s']} MB/s "
+                            f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms"
+                        )
+    finally:
+        channel.close()
+        server.stop(grace=None)
+
+    if args.output:
+        write_results(args.output, "grpc", {"runs": results})
+    return 0 if all(row["ok"] == args.requests for row in results) else 1
@@ -0,0 +1,92 @@
+import difflib
+import glob
+import logging
+import os
+import statistics
+import time
+
+from src.bench import write_results
+from src.media.ocr import extract_text_from_image, get_ocr_model
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def load_samples(sample_dir: str) -> list[tuple[str, bytes, str | None]]:
+    """
+    Loads sample images with their expected text.
+
+    The expected text is read from a sidecar ``<image>.txt`` file when present;
+    otherwise the full-resolution "accurate" output is used as reference.
+    """
+    paths = sorted(
+        path
+        for pattern in IMAGE_PATTERNS
+        for path in glob.glob(os.path.join(sample_dir, pattern))
+    )
+    samples = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        expected = None
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                expected = f.read()
+        samples.append((os.path.basename(path), data, expected))
+    return samples
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def run(args) -> int:
+    samples = load_samples(args.samples)
+    if not samples:
+        logging.error(f"No images found in {args.samples}")
+        return 1
+
+    get_ocr_model()
+
+    # Referencia: pipeline completo a resolución original
+    references = {}
+    for name, data, expected in samples:
+        references[name] = (
+            expected
+            if expected is not None
+            else extract_text_from_image(data, mode="accurate")
+        )
+
+    configs = [("accurate", None)] + [("fast", side) for side in args.max_sides]
+    results = []
+
+    for mode, max_side in configs:
+        latencies, scores = [], []
+        for name, data, _ in samples:
+            start = time.perf_counter()
+            text = (
+                extract_text_from_image(data, mode=mode)
+                if max_side is None
+                else extract_text_from_image(data, mode=mode, max_side=max_side)
+            )
+            latencies.append(time.perf_counter() - start)
+            scores.append(similarity(text, references[name]))
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        row = {
+            "mode": mode,
+            "max_side": max_side,
+            "median_ms": round(statistics.median(latencies) * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1),
+            "accuracy": round(statistics.mean(scores), 4),
+        }
+        results.append(row)
+        logging.info(
+            f"ocr[{mode} max_side={max_side}]: median={row['median_ms']}ms "
+            f"p95={row['p95_ms']}ms accuracy={row['accuracy']:.3f}"
+        )
+
+    if args.output:
+        write_results(args.output, "ocr", {"samples": len(samples), "runs": results})
+    return 0
@@ -0,0 +1,407 @@
+import functools
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from src.ai.backends import FakeLLMBackend, LLMBackend
+from src.bench import write_results
+from src.grpc.channel import create_channel
+from src.grpc.fake_server import (
+    FAKE_DEVICE_JID,
+    TEXTS,
+    FakeWhatsAppServicer,
+    TrafficGenerator,
+    parse_mix,
+    percentiles,
+    start_fake_server,
+)
+from src.proto.whatsapp_pb2_grpc import WhatsAppServiceStub
+
+# Pool de extractores -> etapa del informe
+EXTRACTION_STAGES = {"image": "ocr", "audio": "asr", "document": "documents"}
+
+PRODUCT_NAMES = [
+    "Sérum vitamina C",
+    "Gel limpiador facial",
+    "Crema hidratante",
+    "Protector solar SPF50",
+    "Agua micelar",
+    "Contorno de ojos",
+]
+
+
+class StageTimings:
+    """
+    Thread-safe durations per pipeline stage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Counter = Counter()
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            if failed:
+                self._errors[stage] += 1
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, failed)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "calls": len(samples),
+                    "errors": self._errors[stage],
+                    "total_s": round(sum(samples), 3),
+                    "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+                    **percentiles(samples),
+                }
+                for stage, samples in sorted(self._samples.items())
+            }
+
+
+class TimedBackend(LLMBackend):
+    """
+    Wraps a backend and records every call under the "llm" stage.
+    """
+
+    def __init__(self, backend: LLMBackend, timings: StageTimings):
+        self.backend = backend
+        self.timings = timings
+
+    def invoke(self, prompt: str) -> str:
+        with self.timings.measure("llm"):
+            return self.backend.invoke(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        # Cuenta hasta que el agente cierra el stream, no hasta el primer trozo
+        start = time.perf_counter()
+        try:
+            yield from self.backend.stream(prompt)
+        finally:
+            self.timings.record("llm", time.perf_counter() - start)
+
+    def batch(self, prompts: List[str]) -> List[str]:
+        with self.timings.measure("llm"):
+            return self.backend.batch(prompts)
+
+
+class TimedStub:
+    """
+    Stub proxy that times SendMessage and notes when each streamed event
+    arrives, the starting point of its ingest latency.
+    """
+
+    def __init__(self, stub: WhatsAppServiceStub, timings: StageTimings):
+        self._stub = stub
+        self._timings = timings
+        self.received: Dict[str, float] = {}
+
+    def __getattr__(self, name):
+        return getattr(self._stub, name)
+
+    def SendMessage(self, request, **kwargs):
+        with self._timings.measure("send"):
+            return self._stub.SendMessage(request, **kwargs)
+
+    def StreamMessages(self, request, **kwargs):
+        for event in self._stub.StreamMessages(request, **kwargs):
+            self.received[event.message_id] = time.perf_counter()
+            yield event
+
+
+class Patches:
+    """
+    Replaces functions on classes or modules and puts the originals back.
+    """
+
+    def __init__(self):
+        self._saved = []
+
+    def wrap(self, owner, name: str, make_wrapper):
+        original = vars(owner)[name]
+        is_static = isinstance(original, staticmethod)
+        wrapper = make_wrapper(original.__func__ if is_static else original)
+        setattr(owner, name, staticmethod(wrapper) if is_static else wrapper)
+        self._saved.append((owner, name, original))
+
+    def time(self, owner, name: str, timings: StageTimings, stage: str):
+        def make_wrapper(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with timings.measure(stage):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        self.wrap(owner, name, make_wrapper)
+
+    def restore(self):
+        while self._saved:
+            owner, name, original = self._saved.pop()
+            setattr(owner, name, original)
+
+
+def prepare_environment(workdir: str):
+    """
+    Points every database, queue and media path of the listener at
+    ``workdir``, with SQLite standing in for SQL Server.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.environ.update(
+        {
+            "SQLITE_PATH": os.path.join(workdir, "db.sqlite3"),
+            "SQLSERVER_URL": f"sqlite:///{os.path.join(workdir, 'erp.sqlite3')}",
+            "INBOX_PATH": os.path.join(workdir, "inbox.sqlite3"),
+            "STREAM_CURSOR_PATH": os.path.join(workdir, "stream_cursor"),
+            "MEDIA_DIR": os.path.join(workdir, "media"),
+            "MEDIA_CACHE_PATH": os.path.join(workdir, "media_cache.sqlite3"),
+            "MAIL_OUTBOX_PATH": os.path.join(workdir, "mail_outbox.sqlite3"),
+        }
+    )
+
+
+def seed_databases(phones: List[str], rows: int):
+    """
+    Creates the tables and fills them: the fake traffic's customers, padded
+    to ``rows`` customers and articles so lookups scan a realistic table,
+    and the commercial behind the fake device.
+    """
+    from src.core.database import get_sqlite_session, get_sqlserver_session
+    from src.models import Base_sqlite, Base_sqlserver
+    from src.models.client import Cliente
+    from src.models.message import Message
+    from src.models.product import Articulo
+    from src.models.user import User
+
+    erp = get_sqlserver_session()
+    Base_sqlserver.metadata.create_all(
+        erp.bind, tables=[Cliente.__table__, Articulo.__table__]
+    )
+    padding = [f"3490{i:07d}" for i in range(max(0, rows - len(phones)))]
+    erp.add_all(
+        Cliente(
+            codigo_empresa=1,
+            codigo_cliente=number,
+            razon_social=f"Cliente {number}",
+            telefono1=phone,
+        )
+        for number, phone in enumerate(phones + padding, start=1)
+    )
+    codes = {f"KG{i:06d}" for i in range(rows)}
+    codes.update(re.findall(r"KG\d{6}", " ".join(TEXTS)))
+    erp.add_all(
+        Articulo(
+            codigo=code,
+            descripcion1=f"{PRODUCT_NAMES[i % len(PRODUCT_NAMES)]} {code}",
+            codigo_empresa=1,
+            obsoleto="0",
+            bloqueo_pedido_compra="0",
+            bloqueo_compra="0",
+        )
+        for i, code in enumerate(sorted(codes))
+    )
+    erp.commit()
+    erp.close()
+
+    session = get_sqlite_session()
+    Base_sqlite.metadata.create_all(
+        session.bind, tables=[User.__table__, Message.__table__]
+    )
+    session.add(
+        User(
+            phone=FAKE_DEVICE_JID,
+            email="comercial@example.com",
+            name="Comercial",
+            role="user",
+        )
+    )
+    session.commit()
+    session.close()
+
+
+def run(args) -> int:
+    if args.workdir and os.path.isdir(args.workdir) and os.listdir(args.workdir):
+        # Una cola o un cursor de otra ejecución falsearían las cifras
+        logging.error(f"pipeline: {args.workdir} is not empty")
+        return 2
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_")
+    prepare_environment(workdir)
+
+    # Importes diferidos: leen sus rutas del entorno al importarse
+    from src.ai import agent, utils
+    from src.media.extractors import ExtractorRegistry
+    from src.media.store import MediaStore
+    from src.models.client import Cliente
+    from src.models.message import Message
+    from src.models.product import Articulo
+    from src.models.user import User
+    from src.whatsapp import stream
+    from src.whatsapp.inbox import MessageInbox
+
+    traffic = TrafficGenerator(parse_mix(args.mix), args.media_dir, args.clients)
+    seed_databases(traffic.phones, args.db_rows)
+
+    servicer = FakeWhatsAppServicer(traffic, rate=args.rate, max_events=args.count)
+    server, port = start_fake_server(servicer)
+    timings = StageTimings()
+    stub = TimedStub(WhatsAppServiceStub(create_channel("127.0.0.1", port)), timings)
+    chat = TimedBackend(
+        FakeLLMBackend(args.llm_latency_ms / 1000, args.llm_token_latency_ms / 1000),
+        timings,
+    )
+
+    lock = threading.Lock()
+    processed = set()
+    ingest_latencies: List[float] = []
+
+    def time_message(process):
+        @functools.wraps(process)
+        def wrapper(msg, stub, sqlite_session, sqlserver_session, media_store, seen):
+            with timings.measure("message"):
+                process(msg, stub, sqlite_session, sqlserver_session, media_store, seen)
+            done_at = time.perf_counter()
+
+            # Respuesta en línea tras ingerir cada texto. En producción responde
+            # process_unattended_messages_loop a los chats sin atender desde
+            # hace 15-30 min: estas cifras no miden ese bucle
+            if args.reply and msg.text.strip() and not msg.binary:
+                with timings.measure("inline_reply"):
+                    agent.handle_incoming_message(
+                        sqlite_session,
+                        sqlserver_session,
+                        stub,
+                        msg.to.split(":")[0],
+                        stream.normalize_number(getattr(msg, "from")),
+                        msg.text.strip(),
+                        chat=chat,
+                    )
+
+            with lock:
+                processed.add(msg.message_id)
+                received = stub.received.pop(msg.message_id, None)
+                if received is not None:
+                    ingest_latencies.append(done_at - received)
+
+        return wrapper
+
+    def time_extraction(extract):
+        @functools.wraps(extract)
+        def wrapper(self, data, filename, path, mime_type=None):
+            extractor = self.lookup(filename, mime_type)
+            pool = extractor.pool.name if extractor else ""
+            start = time.perf_counter()
+            text = None
+            try:
+                text = extract(self, data, filename, path, mime_type)
+                return text
+            finally:
+                # Los extractores registran sus fallos y devuelven "" o None
+                timings.record(
+                    EXTRACTION_STAGES.get(pool, "extract"),
+                    time.perf_counter() - start,
+                    failed=not (text or "").strip(),
+                )
+
+        return wrapper
+
+    patches = Patches()
+    patches.wrap(stream, "process_stream_message", time_message)
+    patches.wrap(ExtractorRegistry, "extract", time_extraction)
+    for owner, name in (
+        (Cliente, "get_by_telefono"),
+        (User, "get_by_phone"),
+        (User, "get_admins"),
+        (Articulo, "get_by_codigo"),
+        (Articulo, "get_by_words_list"),
+    ):
+        patches.time(owner, name, timings, "db_lookup")
+    patches.time(Message, "create", timings, "persistence")
+    patches.time(MediaStore, "put", timings, "persistence")
+    patches.time(MessageInbox, "put", timings, "inbox")
+    patches.time(MessageInbox, "ack", timings, "inbox")
+    patches.time(agent, "update_order_pages", timings, "render")
+    # Sin SFTP: los artículos que no están en el atlas local van sin foto
+    patches.wrap(utils, "find_image_file", lambda fn: lambda codigo: None)
+
+    logging.info(
+        f"pipeline: {args.count} events at {args.rate or 'max'}/s into {workdir}"
+    )
+    threading.Thread(
+        target=stream.stream_messages, args=(stub,), name="bench-stream", daemon=True
+    ).start()
+
+    deadline = time.perf_counter() + args.timeout
+    try:
+        while time.perf_counter() < deadline:
+            if servicer.finished.is_set() and len(processed) >= sum(
+                servicer.emitted.values()
+            ):
+                break
+            time.sleep(0.1)
+        else:
+            logging.error(
+                f"pipeline: timed out with {len(processed)} of "
+                f"{sum(servicer.emitted.values())} events processed"
+            )
+        elapsed = time.perf_counter() - servicer.started_at
+    finally:
+        patches.restore()
+        server.stop(grace=None)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = servicer.report()
+    results = {
+        "config": {
+            "count": args.count,
+            "rate": args.rate,
+            "mix": traffic.mix,
+            "clients": args.clients,
+            "db_rows": args.db_rows,
+            "inline_reply": args.reply,
+            "llm_latency_ms": args.llm_latency_ms,
+            "inbox_workers": stream.inbox_worker_count(),
+        },
+        "emitted": report["emitted"],
+        "processed": len(processed),
+        "sent": report["sent"],
+        "seconds": round(elapsed, 2),
+        "msgs_per_s": round(len(processed) / elapsed, 1),
+        "ingest_latency": percentiles(ingest_latencies),
+        "inline_reply_latency": report["reply_latency"],
+        "stages": timings.summary(),
+    }
+
+    logging.info(
+        f"pipeline: {results['processed']} msgs in {results['seconds']}s "
+        f"({results['msgs_per_s']} msg/s) ingest={results['ingest_latency']}"
+    )
+    for stage, row in results["stages"].items():
+        logging.info(
+            f"pipeline[{stage}]: calls={row['calls']} errors={row['errors']} "
+            f"mean={row['mean_ms']}ms p50={row['p50_ms']}ms p99={row['p99_ms']}ms"
+        )
+
+    if args.output:
+        write_results(args.output, "pipeline", results)
+    return 0 if len(processed) >= sum(report["emitted"].values()) else 1
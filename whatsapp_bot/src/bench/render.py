@@ -0,0 +1,81 @@
+import glob
+import io
+import logging
+import os
+import random
+import statistics
+import time
+
+from src.bench import write_results
+from src.media.render import build_order_image_table, render_order_pages
+
+WORDS = (
+    "crema serum facial hidratante gel limpiador mascarilla aceite vitamina "
+    "antiedad champu acondicionador corporal solar 50ml 200ml spf50 noche dia"
+).split()
+
+
+def make_items(lines: int, thumbs: list[bytes], seed: int = 0):
+    """
+    Synthetic order with descriptions of varying length; about a quarter of
+    the lines have no product image, as with real catalogue gaps.
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(lines):
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 20)))
+        thumb = rng.choice(thumbs) if thumbs and rng.random() > 0.25 else None
+        items.append((f"KG{i:06d}", str(rng.randint(1, 48)), description, thumb))
+    return items
+
+
+def run(args) -> int:
+    thumbs = []
+    for path in sorted(glob.glob(os.path.join(args.thumbs, "*.jpg")))[:20]:
+        with open(path, "rb") as f:
+            thumbs.append(f.read())
+    if not thumbs:
+        logging.warning(f"No thumbnails found in {args.thumbs}, rendering without images")
+
+    results = []
+    for lines in args.lines:
+        items = make_items(lines, thumbs)
+        render_times, encode_times, sizes = [], [], []
+        paged_times, paged_sizes = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            image = build_order_image_table(items)
+            render_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG")
+            encode_times.append(time.perf_counter() - start)
+            sizes.append(buffer.tell())
+
+            start = time.perf_counter()
+            pages = render_order_pages(items)
+            paged_times.append(time.perf_counter() - start)
+            paged_sizes.append(sum(len(page) for page in pages))
+
+        row = {
+            "lines": lines,
+            "render_ms": round(statistics.median(render_times) * 1000, 1),
+            "encode_ms": round(statistics.median(encode_times) * 1000, 1),
+            "bytes": sizes[0],
+            "height": image.height,
+            "pages": len(pages),
+            "paged_ms": round(statistics.median(paged_times) * 1000, 1),
+            "paged_bytes": paged_sizes[0],
+        }
+        results.append(row)
+        logging.info(
+            f"render[{lines} lines]: render={row['render_ms']}ms "
+            f"encode={row['encode_ms']}ms size={row['bytes'] / 1024:.0f}KB | "
+            f"{row['pages']} pages={row['paged_ms']}ms "
+            f"size={row['paged_bytes'] / 1024:.0f}KB"
+        )
+
+    if args.output:
+        write_results(args.output, "render", {"runs": results})
+    return 0
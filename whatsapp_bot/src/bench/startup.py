@@ -0,0 +1,85 @@
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from src.bench import write_results
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Escenario -> (código a ejecutar, es un subcomando ligero)
+# Cada escenario importa lo mismo que manage.py importa para ese subcomando.
+SCENARIOS = {
+    "help": ("import sys; sys.argv = ['manage.py', '--help']; import manage; manage.main()", True),
+    "send": ("import manage, src.grpc.client, src.grpc.handlers", True),
+    "list": ("import manage, src.grpc.client, src.grpc.handlers", True),
+    "listen": (
+        "import manage, src.grpc.client, src.grpc.handlers, "
+        "src.whatsapp.stream, src.ai.agent",
+        False,
+    ),
+}
+
+
+def measure(code: str) -> tuple[float, float]:
+    """
+    Runs ``code`` in a fresh interpreter.
+
+    Returns:
+        Wall-clock seconds and peak RSS in MB of the child process.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup scenario failed with code {proc.returncode}")
+    # ru_maxrss está en KB en Linux
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def run(args) -> int:
+    results = {}
+    failed = False
+
+    for name, (code, light) in SCENARIOS.items():
+        timings, memory = [], []
+        try:
+            for _ in range(args.runs):
+                elapsed, rss = measure(code)
+                timings.append(elapsed)
+                memory.append(rss)
+        except RuntimeError as e:
+            logging.error(f"startup[{name}]: {e}")
+            failed = True
+            continue
+
+        median = statistics.median(timings)
+        results[name] = {
+            "median_s": round(median, 4),
+            "max_s": round(max(timings), 4),
+            "peak_rss_mb": round(max(memory), 1),
+        }
+        logging.info(
+            f"startup[{name}]: median={median:.3f}s max={max(timings):.3f}s "
+            f"rss={max(memory):.0f}MB"
+        )
+
+        if light and args.max_seconds and median > args.max_seconds:
+            logging.error(
+                f"startup[{name}] took {median:.3f}s, above the {args.max_seconds}s limit"
+            )
+            failed = True
+
+    if args.output:
+        write_results(args.output, "startup", results)
+
+    return 1 if failed else 0
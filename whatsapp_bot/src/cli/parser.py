@@ -6,7 +6,14 @@ def build_parser():
     subparsers = parser.add_subparsers(dest="cmd", required=True)
 
     subparsers.add_parser("login", help="Start login flow with QR code")
-    subparsers.add_parser("listen", help="Start streaming incoming messages")
+    listen_parser = subparsers.add_parser(
+        "listen", help="Start streaming incoming messages"
+    )
+    listen_parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="Load OCR, speech and LLM models before listening",
+    )
     subparsers.add_parser("list", help="List all registered devices")
 
     send_parser = subparsers.add_parser("send", help="Send a text message")
@@ -31,4 +38,211 @@ def build_parser():
 
     subparsers.add_parser("loginqr_all", help="Enviar QR a todos los administradores")
 
+    subparsers.add_parser(
+        "thumbnails", help="Build the product thumbnail atlas from SFTP images"
+    )
+
+    fake_parser = subparsers.add_parser(
+        "fakeserver", help="Serve synthetic or recorded WhatsApp traffic locally"
+    )
+    fake_parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    fake_parser.add_argument(
+        "--port", type=int, default=50051, help="Port to listen on"
+    )
+    fake_parser.add_argument(
+        "--rate", type=float, default=2, help="Events per second (0: no pause)"
+    )
+    fake_parser.add_argument(
+        "--count", type=int, help="Stop after this many events (default: endless)"
+    )
+    fake_parser.add_argument(
+        "--mix",
+        nargs="+",
+        default=["text=6", "image=2", "audio=1", "document=1"],
+        help="Event kinds and weights (text, image, audio, document)",
+    )
+    fake_parser.add_argument(
+        "--media-dir", default="media", help="Directory with sample media"
+    )
+    fake_parser.add_argument(
+        "--clients", type=int, default=20, help="Distinct customer phones"
+    )
+    fake_parser.add_argument(
+        "--replay", help="Replay events recorded with 'record' instead"
+    )
+    fake_parser.add_argument(
+        "--loop", action="store_true", help="Repeat the recording endlessly"
+    )
+    fake_parser.add_argument(
+        "--send-latency-ms",
+        type=float,
+        default=0,
+        help="Simulated WhatsApp send time per SendMessage",
+    )
+    fake_parser.add_argument(
+        "--drain-seconds",
+        type=float,
+        default=10,
+        help="Wait for replies after the last event before stopping",
+    )
+    fake_parser.add_argument("--report", help="Write the report as JSON to this path")
+
+    record_parser = subparsers.add_parser(
+        "record", help="Record events from the server for 'fakeserver --replay'"
+    )
+    record_parser.add_argument("--out", required=True, help="JSON lines output file")
+    record_parser.add_argument(
+        "--count", type=int, default=100, help="Number of events to record"
+    )
+
+    bench_parser = subparsers.add_parser("bench", help="Run a performance benchmark")
+    bench_subparsers = bench_parser.add_subparsers(dest="bench_target", required=True)
+
+    startup_parser = bench_subparsers.add_parser(
+        "startup", help="Measure CLI startup time per subcommand"
+    )
+    startup_parser.add_argument(
+        "--runs", type=int, default=5, help="Runs per subcommand"
+    )
+    startup_parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help="Fail if any light subcommand takes longer than this",
+    )
+    startup_parser.add_argument("--output", help="Write results as JSON to this path")
+
+    asr_parser = bench_subparsers.add_parser(
+        "asr", help="Measure transcription real-time factor over sample notes"
+    )
+    asr_parser.add_argument(
+        "--corpus", default="media/audio", help="Directory with .ogg voice notes"
+    )
+    asr_parser.add_argument(
+        "--chunk-frames",
+        type=int,
+        nargs="+",
+        default=[4000, 8000, 16000],
+        help="Frames per AcceptWaveform call to compare",
+    )
+    asr_parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1], help="Concurrent notes to compare"
+    )
+    asr_parser.add_argument("--output", help="Write results as JSON to this path")
+
+    ocr_parser = bench_subparsers.add_parser(
+        "ocr", help="Compare OCR latency against accuracy on sample images"
+    )
+    ocr_parser.add_argument(
+        "--samples", default="media/images", help="Directory with sample images"
+    )
+    ocr_parser.add_argument(
+        "--max-sides",
+        type=int,
+        nargs="+",
+        default=[960, 1280, 1600, 2048],
+        help="Long-edge sizes to try in fast mode",
+    )
+    ocr_parser.add_argument("--output", help="Write results as JSON to this path")
+
+    render_parser = bench_subparsers.add_parser(
+        "render", help="Measure order confirmation image rendering time"
+    )
+    render_parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="+",
+        default=[10, 50, 200],
+        help="Order sizes (number of lines) to render",
+    )
+    render_parser.add_argument("--runs", type=int, default=3, help="Runs per size")
+    render_parser.add_argument(
+        "--thumbs", default="media/images", help="Directory with sample thumbnails"
+    )
+    render_parser.add_argument("--output", help="Write results as JSON to this path")
+
+    grpc_parser = bench_subparsers.add_parser(
+        "grpc", help="Measure SendMessage throughput against a local fake server"
+    )
+    grpc_parser.add_argument(
+        "--kinds",
+        nargs="+",
+        choices=["image", "document"],
+        default=["image", "document"],
+        help="Payload kinds: incompressible (image) or text-like (document)",
+    )
+    grpc_parser.add_argument(
+        "--sizes-kb",
+        type=int,
+        nargs="+",
+        default=[16, 256, 2048],
+        help="Payload sizes in KB",
+    )
+    grpc_parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8], help="Parallel callers"
+    )
+    grpc_parser.add_argument(
+        "--compression",
+        nargs="+",
+        choices=["none", "gzip"],
+        default=["none", "gzip"],
+        help="Call compression settings to compare",
+    )
+    grpc_parser.add_argument(
+        "--requests", type=int, default=200, help="Calls per configuration"
+    )
+    grpc_parser.add_argument("--output", help="Write results as JSON to this path")
+
+    pipeline_parser = bench_subparsers.add_parser(
+        "pipeline",
+        help="Run the listener against a fake server, SQLite and a fake LLM; texts "
+        "are answered inline, not by the unattended-chat loop",
+    )
+    pipeline_parser.add_argument(
+        "--count", type=int, default=200, help="Events sent by the fake server"
+    )
+    pipeline_parser.add_argument(
+        "--rate", type=float, default=0, help="Events per second (0: no pause)"
+    )
+    pipeline_parser.add_argument(
+        "--mix",
+        nargs="+",
+        default=["text=6", "image=2", "audio=1", "document=1"],
+        help="Event kinds and weights, e.g. text=6 image=2",
+    )
+    pipeline_parser.add_argument(
+        "--media-dir", default="media", help="Directory with sample media"
+    )
+    pipeline_parser.add_argument(
+        "--clients", type=int, default=20, help="Simulated customers"
+    )
+    pipeline_parser.add_argument(
+        "--db-rows",
+        type=int,
+        default=5000,
+        help="Customers and articles in the SQLite stand-in for SQL Server",
+    )
+    pipeline_parser.add_argument(
+        "--no-reply",
+        dest="reply",
+        action="store_false",
+        help="Only ingest, without answering each text inline with the AI agent",
+    )
+    pipeline_parser.add_argument(
+        "--llm-latency-ms", type=int, default=0, help="Fake LLM latency per call"
+    )
+    pipeline_parser.add_argument(
+        "--llm-token-latency-ms",
+        type=int,
+        default=0,
+        help="Fake LLM latency per streamed chunk",
+    )
+    pipeline_parser.add_argument(
+        "--timeout", type=float, default=300, help="Seconds to wait for the pipeline"
+    )
+    pipeline_parser.add_argument(
+        "--workdir",
+        help="Empty directory to keep the databases and media in (default: temp dir)",
+    )
+    pipeline_parser.add_argument("--output", help="Write results as JSON to this path")
+
     return parser
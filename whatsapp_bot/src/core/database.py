@@ -8,6 +8,11 @@ load_dotenv()  # Carga variables desde .env
 
 
 def get_sqlserver_session():
+    # URL completa opcional, p.ej. sqlite:///erp.sqlite3 para pruebas locales
+    url = os.getenv("SQLSERVER_URL")
+    if url:
+        return sessionmaker(bind=create_engine(url))()
+
     user = os.getenv("SQLSERVER_USER")
     password = urllib.parse.quote_plus(os.getenv("SQLSERVER_PASSWORD"))
     host = os.getenv("SQLSERVER_HOST")
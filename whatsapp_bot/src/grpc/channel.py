@@ -0,0 +1,110 @@
+import json
+import os
+from typing import List, Tuple
+
+import grpc
+
+GRPC_HOST = os.getenv("GRPC_HOST", "localhost")
+GRPC_PORT = int(os.getenv("GRPC_PORT", 50051))
+GRPC_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# Pings en conexiones inactivas: los NAT y balanceadores cortan sin avisar
+GRPC_KEEPALIVE_SECONDS = float(os.getenv("GRPC_KEEPALIVE_SECONDS", 30))
+GRPC_KEEPALIVE_TIMEOUT = float(os.getenv("GRPC_KEEPALIVE_TIMEOUT", 10))
+
+# auto | gzip | none: compresión de las llamadas que envían ficheros.
+# auto solo comprime formatos que no lo están ya (bench grpc: gzip no pasa de
+# ~10 MB/s por núcleo, muy por debajo de una red local)
+GRPC_MEDIA_COMPRESSION = os.getenv("GRPC_MEDIA_COMPRESSION", "auto").lower()
+GRPC_RETRY_ATTEMPTS = int(os.getenv("GRPC_RETRY_ATTEMPTS", 4))
+# Plazo de cada llamada unaria, reintentos incluidos: con waitForReady y sin
+# plazo, una llamada con el servidor caído no termina nunca. StartLogin espera
+# hasta 15 s el primer QR en el servidor.
+GRPC_CALL_TIMEOUT = float(os.getenv("GRPC_CALL_TIMEOUT", 30))
+
+COMPRESSED_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".webp",
+    ".gif",
+    ".mp4",
+    ".ogg",
+    ".opus",
+    ".mp3",
+    ".pdf",
+    ".xlsx",
+    ".docx",
+    ".zip",
+    ".gz",
+}
+
+SERVICE_NAME = "whatsapp.WhatsAppService"
+
+# SendMessage no se reintenta: si el servidor ya lo envió, un reintento
+# duplicaría el mensaje en WhatsApp. Solo espera a que el canal esté listo.
+RETRIED_METHODS = ("StartLogin", "ListDevices", "LogoutDevice", "DeleteDevice")
+
+
+def service_config() -> dict:
+    """
+    Per-method policy: idempotent unary calls are retried on UNAVAILABLE with
+    exponential backoff, and every unary call waits for the channel to be
+    ready instead of failing while the server restarts, up to
+    GRPC_CALL_TIMEOUT. StreamMessages has no deadline.
+    """
+    return {
+        "methodConfig": [
+            {
+                "name": [
+                    {"service": SERVICE_NAME, "method": method}
+                    for method in RETRIED_METHODS
+                ],
+                "waitForReady": True,
+                "timeout": f"{GRPC_CALL_TIMEOUT:g}s",
+                "retryPolicy": {
+                    "maxAttempts": GRPC_RETRY_ATTEMPTS,
+                    "initialBackoff": "0.2s",
+                    "maxBackoff": "5s",
+                    "backoffMultiplier": 2,
+                    "retryableStatusCodes": ["UNAVAILABLE"],
+                },
+            },
+            {
+                "name": [{"service": SERVICE_NAME, "method": "SendMessage"}],
+                "waitForReady": True,
+                "timeout": f"{GRPC_CALL_TIMEOUT:g}s",
+            },
+        ]
+    }
+
+
+def channel_options() -> List[Tuple[str, object]]:
+    return [
+        ("grpc.max_receive_message_length", GRPC_MAX_MESSAGE_BYTES),
+        ("grpc.max_send_message_length", GRPC_MAX_MESSAGE_BYTES),
+        ("grpc.keepalive_time_ms", int(GRPC_KEEPALIVE_SECONDS * 1000)),
+        ("grpc.keepalive_timeout_ms", int(GRPC_KEEPALIVE_TIMEOUT * 1000)),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.enable_retries", 1),
+        ("grpc.service_config", json.dumps(service_config())),
+    ]
+
+
+def create_channel(host: str = GRPC_HOST, port: int = GRPC_PORT) -> grpc.Channel:
+    return grpc.insecure_channel(f"{host}:{port}", options=channel_options())
+
+
+def media_compression(filename: str = "") -> grpc.Compression:
+    """
+    Compression for a call carrying ``filename``. JPEG, PDF or XLSX are
+    already compressed and gzip would only add CPU time; CSV or plain text
+    shrink several times.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if GRPC_MEDIA_COMPRESSION == "gzip" or (
+        GRPC_MEDIA_COMPRESSION == "auto" and ext not in COMPRESSED_EXTENSIONS
+    ):
+        return grpc.Compression.Gzip
+    return grpc.Compression.NoCompression
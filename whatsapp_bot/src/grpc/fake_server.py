@@ -0,0 +1,398 @@
+import glob
+import io
+import itertools
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from concurrent import futures
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import grpc
+from google.protobuf import json_format
+
+from src.grpc.channel import GRPC_MAX_MESSAGE_BYTES
+from src.proto.whatsapp_pb2 import (
+    DeviceInfo,
+    DeviceList,
+    MessageEvent,
+    QRCodeResponse,
+    SendResponse,
+    StatusResponse,
+    StreamRequest,
+)
+from src.proto.whatsapp_pb2_grpc import (
+    WhatsAppServiceServicer,
+    add_WhatsAppServiceServicer_to_server,
+)
+
+FAKE_DEVICE_JID = "34600000000"
+
+DEFAULT_MIX = {"text": 6, "image": 2, "audio": 1, "document": 1}
+
+# Tipo de evento -> subdirectorio con muestras reales y extensiones válidas
+SAMPLE_DIRS = {
+    "image": ("images", (".jpg", ".jpeg", ".png")),
+    "audio": ("audio", (".ogg",)),
+    "document": ("documents", (".pdf", ".xlsx", ".csv")),
+}
+
+TEXTS = [
+    "Hola, buenos días",
+    "Quiero hacer un pedido",
+    "KG000123 x 3\nKG004567 x 12\nKG010203 x 1",
+    "¿Tenéis stock del sérum de vitamina C?",
+    "Mándame 6 cajas del gel limpiador, gracias",
+    "Gracias!",
+    "¿Cuándo llega el pedido de la semana pasada?",
+]
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 1),
+        "p99_ms": round(ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def synthetic_image(text: str) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (640, 480), "white")
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(text.splitlines()):
+        draw.text((20, 20 + i * 30), line, fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TrafficGenerator:
+    """
+    Endless synthetic traffic: ``clients`` customers writing to the fake
+    device with a weighted mix of event kinds. Media comes from the sample
+    directories under ``media_dir``; images fall back to rendered text and
+    kinds without samples are left out of the mix.
+    """
+
+    def __init__(
+        self,
+        mix: Dict[str, float] = DEFAULT_MIX,
+        media_dir: str = "media",
+        clients: int = 20,
+        seed: int = 0,
+    ):
+        self.rng = random.Random(seed)
+        self.phones = [f"3461{i:07d}" for i in range(clients)]
+        self.samples: Dict[str, List[Tuple[str, bytes]]] = {}
+
+        for kind, (subdir, extensions) in SAMPLE_DIRS.items():
+            files = sorted(
+                path
+                for path in glob.glob(os.path.join(media_dir, subdir, "*"))
+                if path.lower().endswith(extensions)
+            )
+            samples = []
+            for path in files:
+                with open(path, "rb") as f:
+                    samples.append((os.path.basename(path), f.read()))
+            if kind == "image" and not samples:
+                samples = [
+                    (f"synthetic_{i}.jpg", synthetic_image(text))
+                    for i, text in enumerate(TEXTS)
+                ]
+            self.samples[kind] = samples
+
+        self.mix = {
+            kind: weight
+            for kind, weight in mix.items()
+            if weight > 0 and (kind == "text" or self.samples.get(kind))
+        }
+        for kind in set(mix) - set(self.mix):
+            logging.warning(f"No samples for '{kind}' events, left out of the mix")
+        if not self.mix:
+            raise ValueError("Empty traffic mix")
+
+    def __iter__(self) -> Iterator[MessageEvent]:
+        kinds, weights = zip(*self.mix.items())
+        while True:
+            kind = self.rng.choices(kinds, weights)[0]
+            event = MessageEvent(to=FAKE_DEVICE_JID, name="Cliente")
+            setattr(event, "from", self.rng.choice(self.phones))
+            if kind == "text":
+                event.text = self.rng.choice(TEXTS)
+            else:
+                filename, data = self.rng.choice(self.samples[kind])
+                event.text = "MEDIA:" + filename
+                event.filename = filename
+                event.binary = data
+            yield event
+
+
+def event_kind(event: MessageEvent) -> str:
+    if not event.binary:
+        return "text"
+    ext = os.path.splitext(event.filename)[1].lower()
+    for kind, (_, extensions) in SAMPLE_DIRS.items():
+        if ext in extensions:
+            return kind
+    return "media"
+
+
+def load_recording(path: str) -> List[MessageEvent]:
+    """
+    Reads events saved by ``record_stream``: one JSON MessageEvent per line.
+    """
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                events.append(json_format.Parse(line, MessageEvent()))
+    return events
+
+
+def record_stream(stub, path: str, count: int) -> int:
+    """
+    Saves the next ``count`` events of a real server's stream, for replay.
+    """
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for event in stub.StreamMessages(StreamRequest()):
+            f.write(json_format.MessageToJson(event, indent=None) + "\n")
+            written += 1
+            logging.info(f"Recorded event {written}/{count} ({event_kind(event)})")
+            if written >= count:
+                break
+    return written
+
+
+class FakeWhatsAppServicer(WhatsAppServiceServicer):
+    """
+    In-process stand-in for the Go service.
+
+    When a stream first connects it starts emitting ``events`` at ``rate``
+    per second (0: without pause), numbered like the Go server so cursors and
+    replays behave the same. Every SendMessage is recorded with
+    the time elapsed since that chat's last event, i.e. the bot's reply
+    latency.
+    """
+
+    def __init__(
+        self,
+        events: Optional[Iterable[MessageEvent]] = None,
+        rate: float = 0,
+        max_events: Optional[int] = None,
+        send_latency: float = 0,
+        buffer: int = 10000,
+    ):
+        self.events = events
+        self.rate = rate
+        self.max_events = max_events
+        self.send_latency = send_latency
+
+        self.sent = 0
+        self.sent_bytes = 0
+        self.emitted: Counter = Counter()
+        self.reply_latencies: List[float] = []
+        self.send_log: List[dict] = []
+        self.started_at: Optional[float] = None
+        self.finished = threading.Event()
+
+        self._log: deque = deque(maxlen=buffer)
+        # Como el servidor Go: secuencia sembrada con la hora de arranque
+        self._seq = time.time_ns()
+        self._last_event_at: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._producer: Optional[threading.Thread] = None
+
+    def _produce(self):
+        interval = 1 / self.rate if self.rate > 0 else 0
+        source = itertools.islice(self.events, self.max_events)
+        next_at = time.perf_counter()
+        for template in source:
+            event = MessageEvent()
+            event.CopyFrom(template)
+            event.timestamp = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+            with self._cond:
+                self._seq += 1
+                event.seq = self._seq
+                # IDs nuevos también al repetir una grabación en bucle
+                event.message_id = f"FAKE{self._seq}"
+                self._log.append(event)
+                self._last_event_at[getattr(event, "from")] = time.perf_counter()
+                self.emitted[event_kind(event)] += 1
+                self._cond.notify_all()
+
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+        self.finished.set()
+        logging.info(f"Fake server finished emitting: {dict(self.emitted)}")
+
+    def _since(self, cursor: int) -> List[MessageEvent]:
+        if not self._log:
+            return []
+        first = self._log[0].seq
+        return list(itertools.islice(self._log, max(0, cursor - first + 1), None))
+
+    def StreamMessages(self, request, context):
+        with self._cond:
+            if self._producer is None and self.events is not None:
+                self.started_at = time.perf_counter()
+                self._producer = threading.Thread(
+                    target=self._produce, name="fake-producer", daemon=True
+                )
+                self._producer.start()
+
+        cursor = request.after_seq
+        if cursor > self._seq:
+            cursor = 0
+        while context.is_active():
+            with self._cond:
+                pending = self._since(cursor)
+                if not pending:
+                    self._cond.wait(timeout=1)
+                    continue
+            for event in pending:
+                yield event
+                cursor = event.seq
+
+    def StartLogin(self, request, context):
+        return QRCodeResponse(status="already_connected")
+
+    def SendMessage(self, request, context):
+        if self.send_latency:
+            # Subida y envío reales de WhatsApp
+            time.sleep(self.send_latency)
+        now = time.perf_counter()
+        with self._lock:
+            self.sent += 1
+            self.sent_bytes += len(request.binary) + len(request.text)
+            last_event = self._last_event_at.get(request.to)
+            if last_event is not None:
+                self.reply_latencies.append(now - last_event)
+            self.send_log.append(
+                {
+                    "to": request.to,
+                    "bytes": len(request.binary),
+                    "filename": request.filename,
+                    "latency_ms": (
+                        round((now - last_event) * 1000, 1) if last_event else None
+                    ),
+                }
+            )
+        return SendResponse(success=True)
+
+    def ListDevices(self, request, context):
+        return DeviceList(devices=[DeviceInfo(jid=FAKE_DEVICE_JID)])
+
+    def LogoutDevice(self, request, context):
+        return StatusResponse(success=True)
+
+    def DeleteDevice(self, request, context):
+        return StatusResponse(success=True)
+
+    def report(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0
+        with self._lock:
+            return {
+                "seconds": round(elapsed, 1),
+                "emitted": dict(self.emitted),
+                "sent": self.sent,
+                "sent_bytes": self.sent_bytes,
+                "reply_latency": percentiles(self.reply_latencies),
+                "sends": list(self.send_log),
+            }
+
+
+def start_fake_server(
+    servicer: Optional[WhatsAppServiceServicer] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    workers: int = 16,
+) -> Tuple[grpc.Server, int]:
+    """
+    Starts a gRPC server with the same limits and keepalive policy as the Go
+    service. Port 0 picks a free port; the bound port is returned.
+    """
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=workers),
+        options=[
+            ("grpc.max_receive_message_length", GRPC_MAX_MESSAGE_BYTES),
+            ("grpc.max_send_message_length", GRPC_MAX_MESSAGE_BYTES),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+        ],
+    )
+    add_WhatsAppServiceServicer_to_server(servicer or FakeWhatsAppServicer(), server)
+    bound = server.add_insecure_port(f"{host}:{port}")
+    server.start()
+    return server, bound
+
+
+def parse_mix(values: List[str]) -> Dict[str, float]:
+    """
+    ``["text=6", "image=2"]`` -> ``{"text": 6.0, "image": 2.0}``
+    """
+    mix = {}
+    for value in values:
+        kind, _, weight = value.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown event kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def serve(args):
+    """
+    Runs the fake server until interrupted or until every event was emitted
+    and answered, then logs (and optionally writes) the report.
+    """
+    from src.bench import write_results
+
+    if args.replay:
+        recorded = load_recording(args.replay)
+        logging.info(f"Replaying {len(recorded)} recorded events from {args.replay}")
+        events = itertools.cycle(recorded) if args.loop else recorded
+    else:
+        events = TrafficGenerator(parse_mix(args.mix), args.media_dir, args.clients)
+
+    servicer = FakeWhatsAppServicer(
+        events,
+        rate=args.rate,
+        max_events=args.count,
+        send_latency=args.send_latency_ms / 1000,
+    )
+    server, port = start_fake_server(servicer, args.host, args.port)
+    logging.info(f"Fake WhatsApp server listening on {args.host}:{port}")
+
+    try:
+        while not servicer.finished.wait(5):
+            logging.info(
+                f"Fake server: emitted={dict(servicer.emitted)} sent={servicer.sent}"
+            )
+        # Margen para que el cliente termine de responder
+        time.sleep(args.drain_seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop(grace=1)
+
+    report = servicer.report()
+    logging.info(
+        f"Fake server report: emitted={report['emitted']} sent={report['sent']} "
+        f"reply_latency={report['reply_latency']}"
+    )
+    if args.report:
+        write_results(args.report, "fakeserver", report)
+    return report
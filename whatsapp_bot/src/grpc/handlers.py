@@ -1,16 +1,18 @@
+import io
 import os
 import logging
-import qrcode
 
-from src.core.auth import verify_credentials
-from src.core.qr import show_qr_ascii
-from src.mail.mail_handler import send_qr_email
+from src.grpc.channel import media_compression
 from src.proto.whatsapp_pb2 import Empty, SendRequest, DeviceID
-from src.core.database import get_sqlite_session
-from src.models.user import User
+
+# Los flujos de login importan sus dependencias (QR, SQLAlchemy, correo) al
+# usarse, así "send" o "list" no pagan su tiempo de carga.
 
 
 def login(stub):
+    from src.core.auth import verify_credentials
+    from src.core.qr import show_qr_ascii
+
     if not verify_credentials():
         return
     logging.info("Starting login process...")
@@ -64,17 +66,25 @@ def send_file(stub, to, filepath, from_jid=None):
     with open(filepath, "rb") as f:
         binary_data = f.read()
 
+    send_file_bytes(stub, to, binary_data, os.path.basename(filepath), from_jid)
+
+
+def send_file_bytes(stub, to, data: bytes, filename: str, from_jid=None):
+    """
+    Sends an in-memory file; WhatsApp picks image vs document from the
+    filename's extension.
+    """
     req = SendRequest(
         to=to,
-        text=os.path.basename(filepath),
-        binary=binary_data,
-        filename=os.path.basename(filepath),
+        text=filename,
+        binary=data,
+        filename=filename,
         from_jid=from_jid or "",
     )
 
-    resp = stub.SendMessage(req)
+    resp = stub.SendMessage(req, compression=media_compression(filename))
     if resp.success:
-        logging.info(f"File sent to {to}: {filepath}")
+        logging.info(f"File sent to {to}: {filename}")
     else:
         logging.error(f"Failed to send file: {resp.error}")
 
@@ -94,7 +104,19 @@ def delete_device(stub, jid):
         logging.error(f"Failed to delete device: {resp.error}")
 
 
+def qr_jpeg(code: str) -> bytes:
+    import qrcode
+
+    buffer = io.BytesIO()
+    qrcode.make(code).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
 def login_and_send_qr(stub, to_phone: str):
+    from src.core.database import get_sqlite_session
+    from src.mail.mail_handler import send_qr_email
+    from src.models.user import User
+
     response = stub.StartLogin(Empty())
 
     if response.status == "code":
@@ -106,12 +128,7 @@ def login_and_send_qr(stub, to_phone: str):
                 logging.warning(f"No user found with phone: {to_phone}")
                 return
 
-            qr_img = qrcode.make(response.code)
-            qr_path = "/tmp/qr.jpg"
-            qr_img.save(qr_path, format="JPEG")
-            logging.info(f"QR saved to {qr_path}")
-
-            send_qr_email(user.email, qr_path)
+            send_qr_email(user.email, ("qr.jpg", qr_jpeg(response.code)))
 
         finally:
             session.close()
@@ -123,6 +140,10 @@ def login_and_send_qr(stub, to_phone: str):
 
 
 def login_and_send_qr_to_all_admins(stub):
+    from src.core.database import get_sqlite_session
+    from src.mail.mail_handler import send_qr_email
+    from src.models.user import User
+
     response = stub.StartLogin(Empty())
 
     if response.status == "code":
@@ -133,16 +154,13 @@ def login_and_send_qr_to_all_admins(stub):
                 logging.warning("No admins found in the database.")
                 return
 
-            # Generar QR una sola vez
-            qr_img = qrcode.make(response.code)
-            qr_path = "/tmp/qr.jpg"
-            qr_img.save(qr_path, format="JPEG")
-            logging.info(f"QR saved to {qr_path}")
-
-            # Enviar a todos los correos de administradores
-            for admin in admins:
-                logging.info(f"Sending QR to admin: {admin.email}")
-                send_qr_email(admin.email, qr_path)
+            # Un único correo (QR codificado una vez) para todos los administradores
+            emails = [admin.email for admin in admins if admin.email]
+            if not emails:
+                logging.warning("No admin has an email configured.")
+                return
+            logging.info(f"Sending QR to admins: {', '.join(emails)}")
+            send_qr_email(emails, ("qr.jpg", qr_jpeg(response.code)))
 
         finally:
             session.close()
@@ -4,6 +4,7 @@ import mimetypes
 from dotenv import load_dotenv, dotenv_values
 import logging
 from datetime import datetime
+from typing import List, Tuple, Union
 from email.message import EmailMessage
 from email.utils import formataddr
 
@@ -20,39 +21,80 @@ SMTP_PASSWORD = config.get("SMTP_PASSWORD")
 SENDER_NAME = config.get("SENDER_NAME", "Kapalua Bot Asistant")
 
 
-def send_email(recipient: str, subject: str, body: str, attachments: list[str] = None):
+# Adjunto: ruta a un fichero o (nombre, contenido) ya en memoria
+Attachment = Union[str, Tuple[str, bytes]]
 
+
+def connect_smtp() -> smtplib.SMTP:
+    server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30)
+    server.starttls()
+    server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+
+def _recipient_list(recipient: Union[str, List[str]]) -> List[str]:
+    return [recipient] if isinstance(recipient, str) else list(recipient)
+
+
+def build_email(
+    recipient: Union[str, List[str]],
+    subject: str,
+    body: str,
+    attachments: list[Attachment] = None,
+) -> EmailMessage:
+
+    recipients = _recipient_list(recipient)
     msg = EmailMessage()
     msg["From"] = formataddr((SENDER_NAME, SMTP_USER))
-    msg["To"] = recipient
+    # Varios destinatarios solo en el sobre SMTP: ninguno ve las direcciones
+    # de los demás
+    msg["To"] = recipients[0] if len(recipients) == 1 else "undisclosed-recipients:;"
     msg["Subject"] = subject
     msg.set_content(body)
 
     attachments = attachments or []
-    for path in attachments:
-        ctype, encoding = mimetypes.guess_type(path)
+    for attachment in attachments:
+        if isinstance(attachment, str):
+            with open(attachment, "rb") as f:
+                file_data = f.read()
+            file_name = os.path.basename(attachment)
+        else:
+            file_name, file_data = attachment
+
+        ctype, encoding = mimetypes.guess_type(file_name)
         if ctype is None or encoding is not None:
             ctype = "application/octet-stream"
         maintype, subtype = ctype.split("/", 1)
 
-        with open(path, "rb") as f:
-            file_data = f.read()
-            file_name = os.path.basename(path)
-            msg.add_attachment(
-                file_data, maintype=maintype, subtype=subtype, filename=file_name
-            )
+        msg.add_attachment(
+            file_data, maintype=maintype, subtype=subtype, filename=file_name
+        )
+
+    return msg
+
+
+def send_email(
+    recipient: Union[str, List[str]],
+    subject: str,
+    body: str,
+    attachments: list[Attachment] = None,
+):
+    """
+    Queues the email in the outbox; a background worker delivers it over a
+    shared SMTP session. With several recipients the message is encoded once
+    and delivered in a single SMTP transaction. Short-lived commands should
+    call ``get_mail_outbox().flush()`` before exiting.
+    """
+    from src.mail.outbox import get_mail_outbox
 
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
-        print(f"Correo enviado a {recipient}")
+    msg = build_email(recipient, subject, body, attachments)
+    get_mail_outbox().enqueue(msg.as_bytes(), _recipient_list(recipient))
 
 
 # Template 1: Enviar QR para WhatsApp
 
 
-def send_qr_email(recipient: str, qr_image_path: str):
+def send_qr_email(recipient: Union[str, List[str]], qr_image: Attachment):
     subject = "Escanea el código QR para vincular tu WhatsApp"
     body = (
         "Hola!\n\n"
@@ -64,13 +106,13 @@ def send_qr_email(recipient: str, qr_image_path: str):
         "3. Escanea el QR de esta imagen\n"
         "\nSaludos,\nKapalua Bot Asistant"
     )
-    send_email(recipient, subject, body, attachments=[qr_image_path])
+    send_email(recipient, subject, body, attachments=[qr_image])
 
 
 # Template 2: Enviar uno o más documentos (por ahora Excel)
 
 
-def send_documents_email(recipient: str, doc_paths: list[str]):
+def send_documents_email(recipient: str, doc_paths: list[Attachment]):
     subject = "Documentos solicitados"
     body = (
         "Hola!\n\n"
@@ -81,7 +123,9 @@ def send_documents_email(recipient: str, doc_paths: list[str]):
     send_email(recipient, subject, body, attachments=doc_paths)
 
 
-def notify_order_by_email(user: User, client: Cliente, phone: str, csv_path: str):
+def notify_order_by_email(
+    user: User, client: Cliente, phone: str, order_file: Attachment
+):
     if not user.email:
         logging.warning(f"⚠️ El comercial {user.name} no tiene email configurado.")
         return
@@ -102,7 +146,10 @@ def notify_order_by_email(user: User, client: Cliente, phone: str, csv_path: str
     El asistente automático"""
 
     send_email(
-        recipient=user.email, subject=asunto, body=cuerpo, attachments=[csv_path]
+        recipient=user.email,
+        subject=asunto,
+        body=cuerpo,
+        attachments=[order_file] if order_file else [],
     )
 
 
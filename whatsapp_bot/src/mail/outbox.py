@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+MAIL_OUTBOX_PATH = os.getenv("MAIL_OUTBOX_PATH", "./mail_outbox.sqlite3")
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 8))
+MAIL_RETRY_BASE = float(os.getenv("MAIL_RETRY_BASE", 5))
+MAIL_RETRY_MAX = float(os.getenv("MAIL_RETRY_MAX", 900))
+# Los servidores SMTP cortan conexiones inactivas; se cierra antes que ellos
+MAIL_IDLE_SECONDS = float(os.getenv("MAIL_IDLE_SECONDS", 60))
+MAIL_KEEP_SENT_DAYS = float(os.getenv("MAIL_KEEP_SENT_DAYS", 7))
+
+# Errores que indican que la conexión ya no sirve y hay que abrir otra
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class MailOutbox:
+    """
+    Persistent mail queue drained over a reused SMTP session.
+
+    Messages are stored fully serialized, with their envelope recipients, so a
+    message addressed to several people is encoded once and sent in a single
+    SMTP transaction. Failed deliveries are retried with exponential backoff
+    and jitter until MAIL_MAX_ATTEMPTS, then marked as failed.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        sender: str,
+        path: str = MAIL_OUTBOX_PATH,
+        max_attempts: int = MAIL_MAX_ATTEMPTS,
+    ):
+        self.connect = connect
+        self.sender = sender
+        self.max_attempts = max_attempts
+        self._db_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipients TEXT NOT NULL,
+                message BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                created REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt)"
+        )
+        self._conn.commit()
+
+    def enqueue(self, message: bytes, recipients: List[str]) -> int:
+        """
+        Queues a serialized message for ``recipients`` and wakes the worker.
+        """
+        now = time.time()
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (recipients, message, next_attempt, created) "
+                "VALUES (?, ?, ?, ?)",
+                (json.dumps(recipients), message, now, now),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+        logging.info(
+            f"Mail queued for {', '.join(recipients)} (id={cursor.lastrowid})"
+        )
+        return cursor.lastrowid
+
+    def _due(self, limit: int = 50):
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT id, recipients, message, attempts FROM outbox "
+                "WHERE status = 'pending' AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+
+    def _next_due_in(self) -> Optional[float]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def _session(self) -> smtplib.SMTP:
+        idle = time.time() - self._last_used
+        if self._smtp is not None and idle > MAIL_IDLE_SECONDS:
+            self._close_session()
+        if self._smtp is None:
+            self._smtp = self.connect()
+        return self._smtp
+
+    def _close_session(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _send(self, recipients: List[str], message: bytes):
+        try:
+            refused = self._session().sendmail(self.sender, recipients, message)
+        except CONNECTION_ERRORS:
+            # La sesión reutilizada pudo caducar: un reintento con conexión nueva
+            self._close_session()
+            refused = self._session().sendmail(self.sender, recipients, message)
+        self._last_used = time.time()
+        if refused:
+            logging.warning(f"Mail refused for some recipients: {refused}")
+
+    def _mark_sent(self, message_id: int):
+        with self._db_lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, "
+                "last_error = NULL WHERE id = ?",
+                (message_id,),
+            )
+            self._conn.commit()
+
+    def _mark_failed(self, message_id: int, attempts: int, error: Exception):
+        attempts += 1
+        if attempts >= self.max_attempts:
+            status, next_attempt = "failed", time.time()
+            logging.error(
+                f"Mail {message_id} failed after {attempts} attempts: {error}"
+            )
+        else:
+            delay = min(MAIL_RETRY_MAX, MAIL_RETRY_BASE * 2 ** (attempts - 1))
+            status = "pending"
+            next_attempt = time.time() + delay * random.uniform(0.5, 1)
+            logging.warning(
+                f"Mail {message_id} attempt {attempts} failed, "
+                f"retrying in {delay:.0f}s: {error}"
+            )
+        with self._db_lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, "
+                "last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt, str(error), message_id),
+            )
+            self._conn.commit()
+
+    def drain(self) -> int:
+        """
+        Sends every message that is due, reusing one SMTP session. Returns the
+        number of messages delivered.
+        """
+        sent = 0
+        with self._drain_lock:
+            while rows := self._due():
+                for message_id, recipients, message, attempts in rows:
+                    try:
+                        self._send(json.loads(recipients), message)
+                    except Exception as e:
+                        self._close_session()
+                        self._mark_failed(message_id, attempts, e)
+                        continue
+                    self._mark_sent(message_id)
+                    sent += 1
+                    logging.info(f"Mail {message_id} sent to {recipients}")
+        return sent
+
+    def purge(self, keep_days: float = MAIL_KEEP_SENT_DAYS):
+        with self._db_lock:
+            self._conn.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND created < ?",
+                (time.time() - keep_days * 86400,),
+            )
+            self._conn.commit()
+
+    def flush(self, timeout: float = 60) -> bool:
+        """
+        Delivers pending mail from the calling thread, waiting for retries,
+        until the queue is empty or ``timeout`` expires. For CLI commands that
+        exit right after queueing. Returns True if nothing is left pending.
+        """
+        deadline = time.time() + timeout
+        while True:
+            self.drain()
+            wait = self._next_due_in()
+            if wait is None:
+                with self._drain_lock:
+                    self._close_session()
+                return True
+            if time.time() + wait > deadline:
+                logging.warning("Mail outbox not empty after flush timeout")
+                return False
+            time.sleep(wait)
+
+    def start_worker(self):
+        """
+        Drains the outbox on a daemon thread, waking up when mail is queued or
+        a retry is due.
+        """
+        if self._worker is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.drain()
+                    self.purge()
+                except Exception as e:
+                    logging.error(f"Mail outbox worker error: {e}")
+
+                wait = self._next_due_in()
+                timeout = MAIL_IDLE_SECONDS if wait is None else min(
+                    wait, MAIL_IDLE_SECONDS
+                )
+                if not self._wakeup.wait(timeout):
+                    with self._drain_lock:
+                        if time.time() - self._last_used > MAIL_IDLE_SECONDS:
+                            self._close_session()
+                self._wakeup.clear()
+
+        self._worker = threading.Thread(target=loop, name="mail-outbox", daemon=True)
+        self._worker.start()
+
+
+_outbox: Optional[MailOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_mail_outbox() -> MailOutbox:
+    """
+    Shared outbox with its background worker running.
+    """
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                from src.mail.mail_handler import SMTP_USER, connect_smtp
+
+                _outbox = MailOutbox(connect_smtp, SMTP_USER)
+                _outbox.start_worker()
+    return _outbox
@@ -1,12 +1,28 @@
+import json
 import logging
 import os
-import wave
-import tempfile
+import queue
 import subprocess
-from vosk import Model, KaldiRecognizer
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+import numpy as np
 from number_parser import parser
 import re
 
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # PCM 16 bits mono
+
+# 8000 frames = 0.5 s de audio por llamada a AcceptWaveform
+ASR_CHUNK_FRAMES = int(os.getenv("ASR_CHUNK_FRAMES", 8000))
+ASR_POOL_SIZE = int(os.getenv("ASR_POOL_SIZE", os.cpu_count() or 2))
+ASR_USE_GPU = os.getenv("ASR_USE_GPU", "false").lower() in ("1", "true", "yes")
+
+# Notas más largas que esto se trocean en silencios y se transcriben en paralelo
+ASR_LONG_NOTE_SECONDS = float(os.getenv("ASR_LONG_NOTE_SECONDS", 45))
+ASR_SEGMENT_SECONDS = float(os.getenv("ASR_SEGMENT_SECONDS", 20))
+
 
 def convert_spoken_numbers(text: str) -> str:
     """
@@ -29,60 +45,295 @@ def convert_spoken_numbers(text: str) -> str:
         return text
 
 
-# Initialize once globally
-vosk_model = Model("vosk_model_es")
+_vosk_model = None
+_vosk_model_lock = threading.Lock()
 
 
-def transcribe_audio(audio_bytes: bytes, extension=".ogg") -> str:
-    try:
-        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_input_path = tmp_file.name
-
-        wav_path = tmp_input_path + ".wav"
-        subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                tmp_input_path,
-                "-ar",
-                "16000",
-                "-ac",
-                "1",
-                "-f",
-                "wav",
-                wav_path,
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
+def get_vosk_model():
+    """
+    Returns the shared Vosk model, loading it on first use.
+    """
+    global _vosk_model
+    if _vosk_model is None:
+        with _vosk_model_lock:
+            if _vosk_model is None:
+                import vosk
+
+                if ASR_USE_GPU and hasattr(vosk, "GpuInit"):
+                    # Decodificación por lotes multihilo de Vosk (builds con CUDA)
+                    vosk.GpuInit()
+                logging.info("Loading Vosk model...")
+                _vosk_model = vosk.Model("vosk_model_es")
+    return _vosk_model
+
+
+def decode_audio_stream(
+    audio_bytes: bytes, chunk_frames: int = 4000
+) -> Iterator[bytes]:
+    """
+    Decodes any ffmpeg-supported audio to 16 kHz mono 16-bit PCM in memory.
+
+    The encoded bytes are piped into ffmpeg's stdin and raw PCM is read from
+    its stdout, so nothing touches the disk. PCM is yielded in chunks of
+    ``chunk_frames`` frames as soon as ffmpeg produces them.
+    """
+    proc = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-f",
+            "s16le",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-ac",
+            "1",
+            "pipe:1",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    # Escribir desde otro hilo evita el bloqueo si se llenan ambos pipes
+    def feed():
+        try:
+            proc.stdin.write(audio_bytes)
+        except (BrokenPipeError, ValueError):
+            pass
+        finally:
+            proc.stdin.close()
 
-        wf = wave.open(wav_path, "rb")
-        if (
-            wf.getnchannels() != 1
-            or wf.getsampwidth() != 2
-            or wf.getframerate() != 16000
-        ):
-            raise ValueError("Invalid audio format")
+    stderr = []
+    writer = threading.Thread(target=feed, daemon=True)
+    reader = threading.Thread(
+        target=lambda: stderr.append(proc.stderr.read()), daemon=True
+    )
+    writer.start()
+    reader.start()
 
-        recognizer = KaldiRecognizer(vosk_model, wf.getframerate())
-        transcript = ""
+    chunk_bytes = chunk_frames * SAMPLE_WIDTH
+    try:
         while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
                 break
-            if recognizer.AcceptWaveform(data):
-                res = recognizer.Result()
-                transcript += eval(res)["text"] + " "
+            yield data
+        # Una nota corrupta o truncada no debe pasar por una transcripción vacía
+        if proc.wait() != 0:
+            reader.join()
+            message = b"".join(stderr).decode("utf-8", "replace").strip()
+            raise subprocess.CalledProcessError(
+                proc.returncode, "ffmpeg", stderr=message
+            )
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        writer.join()
+        reader.join()
+        proc.stderr.close()
+
+
+def pcm_chunks(pcm: bytes, chunk_frames: int) -> Iterator[bytes]:
+    chunk_bytes = chunk_frames * SAMPLE_WIDTH
+    for start in range(0, len(pcm), chunk_bytes):
+        yield pcm[start : start + chunk_bytes]
+
+
+def split_on_silence(
+    pcm: bytes,
+    target_seconds: float = ASR_SEGMENT_SECONDS,
+    frame_ms: int = 30,
+) -> List[bytes]:
+    """
+    Splits 16 kHz mono s16le PCM into segments of roughly ``target_seconds``.
+
+    Each cut is placed at the quietest point (lowest smoothed RMS energy)
+    between 0.5x and 1.5x the target length, preferring the one closest to the
+    target, so words are not split across segments.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame_len = SAMPLE_RATE * frame_ms // 1000
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return [pcm]
+
+    frames = samples[: n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+    energy = np.sqrt(np.mean(frames**2, axis=1))
+    # Suavizar ~300 ms para buscar pausas y no huecos entre sílabas
+    window = max(1, 300 // frame_ms)
+    energy = np.convolve(energy, np.ones(window) / window, mode="same")
+
+    target = int(target_seconds * 1000 / frame_ms)
+    cuts = [0]
+    while n_frames - cuts[-1] > int(target * 1.5):
+        lo = cuts[-1] + target // 2
+        hi = min(cuts[-1] + int(target * 1.5), n_frames)
+        window_energy = energy[lo:hi]
+        # Entre los puntos más silenciosos, el más cercano al tamaño objetivo
+        quiet = np.flatnonzero(window_energy <= window_energy.min() * 1.1 + 1.0)
+        ideal = cuts[-1] + target - lo
+        cuts.append(lo + int(quiet[np.argmin(np.abs(quiet - ideal))]))
+
+    bounds = [c * frame_len * SAMPLE_WIDTH for c in cuts] + [len(pcm)]
+    return [pcm[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class TranscriptionEngine:
+    """
+    Transcribes PCM audio with a pool of warm Vosk recognizers.
+
+    Recognizers are expensive to build, so they are created lazily up to
+    ``pool_size``, reset after each use and handed to the next caller.
+    Vosk releases the GIL while decoding, so notes transcribed from different
+    threads run on different cores.
+    """
+
+    def __init__(
+        self,
+        model,
+        pool_size: int = ASR_POOL_SIZE,
+        chunk_frames: int = ASR_CHUNK_FRAMES,
+    ):
+        self.model = model
+        self.pool_size = max(1, pool_size)
+        self.chunk_frames = chunk_frames
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._gpu_threads = threading.local()
+        self._segment_pool = ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="asr-segment"
+        )
+
+    def _new_recognizer(self):
+        from vosk import KaldiRecognizer
+
+        return KaldiRecognizer(self.model, SAMPLE_RATE)
+
+    @contextmanager
+    def recognizer(self):
+        if ASR_USE_GPU and not getattr(self._gpu_threads, "ready", False):
+            import vosk
+
+            if hasattr(vosk, "GpuThreadInit"):
+                vosk.GpuThreadInit()
+            self._gpu_threads.ready = True
+
+        try:
+            rec = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            rec = self._new_recognizer() if create else self._idle.get()
+
+        try:
+            yield rec
+        finally:
+            rec.Reset()
+            self._idle.put(rec)
+
+    @staticmethod
+    def _feed(rec, chunks: Iterable[bytes], parts: List[str]):
+        for data in chunks:
+            if rec.AcceptWaveform(data):
+                parts.append(json.loads(rec.Result()).get("text", ""))
+
+    @staticmethod
+    def _final(rec, parts: List[str]) -> str:
+        parts.append(json.loads(rec.FinalResult()).get("text", ""))
+        return " ".join(p for p in parts if p)
+
+    def transcribe_pcm(self, chunks: Iterable[bytes]) -> str:
+        """Transcribes 16 kHz mono s16le PCM chunks into raw text."""
+        parts: List[str] = []
+        with self.recognizer() as rec:
+            self._feed(rec, chunks, parts)
+            return self._final(rec, parts)
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        """
+        Decodes and transcribes an encoded note into raw text.
+
+        PCM reaches the recognizer while ffmpeg is still decoding. Once a note
+        passes ASR_LONG_NOTE_SECONDS that pass is abandoned: the rest is
+        decoded, the note is split on silences and the segments are
+        transcribed in parallel, then stitched back in order.
+        """
+        chunks = decode_audio_stream(audio_bytes, chunk_frames=self.chunk_frames)
+        if self.pool_size == 1:
+            return self.transcribe_pcm(chunks)
+
+        long_bytes = int(ASR_LONG_NOTE_SECONDS * SAMPLE_RATE) * SAMPLE_WIDTH
+        # Solo se guarda lo necesario para trocear si resulta ser larga
+        head: List[bytes] = []
+        size = 0
 
-        transcript += eval(recognizer.FinalResult())["text"]
-        wf.close()
+        def until_long():
+            nonlocal size
+            for data in chunks:
+                head.append(data)
+                size += len(data)
+                if size > long_bytes:
+                    return
+                yield data
 
-        os.remove(tmp_input_path)
-        os.remove(wav_path)
+        try:
+            parts: List[str] = []
+            with self.recognizer() as rec:
+                self._feed(rec, until_long(), parts)
+                if size <= long_bytes:
+                    return self._final(rec, parts)
+
+            pcm = b"".join(head) + b"".join(chunks)
+        finally:
+            chunks.close()
+
+        segments = split_on_silence(pcm)
+        duration = len(pcm) / SAMPLE_WIDTH / SAMPLE_RATE
+        logging.info(
+            f"Long voice note ({duration:.0f}s) split into {len(segments)} segments"
+        )
+        texts = self._segment_pool.map(
+            lambda segment: self.transcribe_pcm(pcm_chunks(segment, self.chunk_frames)),
+            segments,
+        )
+        return " ".join(t for t in texts if t)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_transcription_engine() -> TranscriptionEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TranscriptionEngine(get_vosk_model())
+    return _engine
+
+
+def transcribe_audio(audio_bytes: bytes, extension=".ogg") -> str:
+    """
+    Transcribes a voice note. The container/codec is probed by ffmpeg from the
+    content itself; ``extension`` is kept for callers that pass it.
+    """
+    try:
+        transcript = get_transcription_engine().transcribe(audio_bytes)
         return convert_spoken_numbers(transcript.strip())
 
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Audio transcription error: {e} {e.stderr}")
+        return ""
     except Exception as e:
         logging.error(f"Audio transcription error: {e}")
         return ""
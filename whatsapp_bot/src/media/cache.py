@@ -0,0 +1,273 @@
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+MEDIA_CACHE_PATH = os.getenv("MEDIA_CACHE_PATH", "./media_cache.sqlite3")
+MEDIA_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", 5000))
+# Distancia de Hamming máxima (sobre 64 bits) para considerar candidata una imagen
+MEDIA_CACHE_PHASH_DISTANCE = int(os.getenv("MEDIA_CACHE_PHASH_DISTANCE", 10))
+# Diferencia media máxima (niveles de gris) en cualquier bloque de 8x8 píxeles
+MEDIA_CACHE_VERIFY_THRESHOLD = float(os.getenv("MEDIA_CACHE_VERIFY_THRESHOLD", 14))
+
+FINGERPRINT_SIDE = 512
+FINGERPRINT_BLOCK = 8
+FINGERPRINT_LEVELS = 4  # cuantización: 256 / 4 = 64 niveles
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[int]:
+    """
+    64-bit difference hash: stable across re-compression and resizing, so a
+    forwarded screenshot maps to a value close to the original's.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            small = img.convert("L").resize((9, 8), Image.LANCZOS)
+    except Exception:
+        return None
+
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, :-1] > pixels[:, 1:]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    # SQLite guarda enteros de 64 bits con signo
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def normalized_image(image_bytes: bytes, size: Optional[Tuple[int, int]] = None):
+    """
+    Grayscale, contrast-stretched and slightly blurred copy of the image used
+    to verify perceptual matches. Without ``size`` the long edge is scaled to
+    FINGERPRINT_SIDE.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        if size is None:
+            scale = FINGERPRINT_SIDE / max(img.size)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        gray = ImageOps.autocontrast(img.convert("L")).resize(size, Image.BILINEAR)
+    gray = gray.filter(ImageFilter.GaussianBlur(1))
+    return (np.asarray(gray) // FINGERPRINT_LEVELS).astype(np.uint8)
+
+
+def fingerprint_distance(a, b) -> float:
+    """
+    Largest mean absolute difference over 8x8 blocks, in grey levels.
+
+    A global hash cannot tell a re-compressed copy from an order table where a
+    single quantity changed; a local block metric can, because the changed
+    digit concentrates its difference in one block.
+    """
+    block = FINGERPRINT_BLOCK
+    h = min(a.shape[0], b.shape[0]) // block * block
+    w = min(a.shape[1], b.shape[1]) // block * block
+    if h == 0 or w == 0:
+        return float("inf")
+    diff = np.abs(a[:h, :w].astype(np.int16) - b[:h, :w]) * FINGERPRINT_LEVELS
+    return float(diff.reshape(h // block, block, w // block, block).mean(axis=(1, 3)).max())
+
+
+class ExtractionCache:
+    """
+    SQLite-backed cache of text extracted from inbound media.
+
+    Entries are keyed by the SHA-256 of the payload. Images are also matched
+    perceptually: the difference hash selects candidates and a block-wise
+    pixel comparison confirms them, so a re-compressed copy hits the cache but
+    an order with one different quantity does not. The table is bounded to
+    ``max_entries`` rows, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        path: str = MEDIA_CACHE_PATH,
+        max_entries: int = MEDIA_CACHE_MAX_ENTRIES,
+        max_distance: int = MEDIA_CACHE_PHASH_DISTANCE,
+        verify_threshold: float = MEDIA_CACHE_VERIFY_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.verify_threshold = verify_threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extractions (
+                sha256 TEXT PRIMARY KEY,
+                phash INTEGER,
+                fingerprint BLOB,
+                fp_width INTEGER,
+                fp_height INTEGER,
+                kind TEXT NOT NULL,
+                text TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions (last_used)"
+        )
+        self._conn.commit()
+
+        # Hashes perceptuales en memoria para la búsqueda por distancia
+        self._phashes: Dict[str, int] = dict(
+            self._conn.execute(
+                "SELECT sha256, phash FROM extractions WHERE phash IS NOT NULL"
+            ).fetchall()
+        )
+
+    def _touch(self, sha: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT text FROM extractions WHERE sha256 = ?", (sha,)
+        ).fetchone()
+        if row:
+            self._conn.execute(
+                "UPDATE extractions SET last_used = ? WHERE sha256 = ?",
+                (time.time(), sha),
+            )
+            self._conn.commit()
+            return row[0]
+        return None
+
+    def _candidates(self, phash: int) -> list[str]:
+        """
+        Stored images whose difference hash is within ``max_distance``,
+        closest first.
+        """
+        scored = [
+            (hamming_distance(phash, other), sha)
+            for sha, other in self._phashes.items()
+        ]
+        return [sha for distance, sha in sorted(scored) if distance <= self.max_distance]
+
+    def _verify(self, sha: str, data: bytes, aspect: float) -> bool:
+        row = self._conn.execute(
+            "SELECT fingerprint, fp_width, fp_height FROM extractions WHERE sha256 = ?",
+            (sha,),
+        ).fetchone()
+        if not row or row[0] is None:
+            return False
+        blob, width, height = row
+        if abs(width / height - aspect) > 0.02 * aspect:
+            return False
+
+        stored = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(height, width)
+        current = normalized_image(data, size=(width, height))
+        return fingerprint_distance(stored, current) <= self.verify_threshold
+
+    def _match_image(self, data: bytes, phash: int) -> Optional[str]:
+        candidates = self._candidates(phash)
+        if not candidates:
+            return None
+        with Image.open(io.BytesIO(data)) as img:
+            aspect = img.width / img.height
+        for sha in candidates:
+            if self._verify(sha, data, aspect):
+                return sha
+        return None
+
+    def _store(
+        self,
+        sha: str,
+        phash: Optional[int],
+        kind: str,
+        text: str,
+        fingerprint=None,
+    ):
+        blob, width, height = None, None, None
+        if fingerprint is not None:
+            height, width = fingerprint.shape
+            blob = zlib.compress(fingerprint.tobytes())
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO extractions "
+            "(sha256, phash, fingerprint, fp_width, fp_height, kind, text, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (sha, phash, blob, width, height, kind, text, time.time()),
+        )
+        if phash is not None and blob is not None:
+            self._phashes[sha] = phash
+
+        evicted = self._conn.execute(
+            "SELECT sha256 FROM extractions ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+            (self.max_entries,),
+        ).fetchall()
+        if evicted:
+            self._conn.executemany(
+                "DELETE FROM extractions WHERE sha256 = ?", evicted
+            )
+            for (old_sha,) in evicted:
+                self._phashes.pop(old_sha, None)
+        self._conn.commit()
+
+    def get_or_extract(
+        self, data: bytes, kind: str, extract: Callable[[], Optional[str]]
+    ) -> Optional[str]:
+        """
+        Returns the cached text for ``data`` or runs ``extract`` and caches it.
+
+        Args:
+            data: Raw media payload.
+            kind: "image" enables perceptual matching; any other value (e.g. the
+                document extension) only matches exact payloads.
+            extract: Callable producing the text on a miss.
+        """
+        sha = hashlib.sha256(data).hexdigest()
+        phash = None
+
+        with self._lock:
+            text = self._touch(sha)
+            if text is not None:
+                logging.info(f"Media cache hit (exact) for {kind}")
+                return text
+
+            if kind == "image":
+                phash = perceptual_hash(data)
+                try:
+                    near = self._match_image(data, phash) if phash is not None else None
+                except Exception as e:
+                    logging.warning(f"Media cache perceptual lookup failed: {e}")
+                    near = None
+                if near:
+                    text = self._touch(near)
+                    if text is not None:
+                        logging.info("Media cache hit (perceptual) for image")
+                        return text
+
+        text = extract()
+        if text and text.strip():
+            fingerprint = None
+            if phash is not None:
+                try:
+                    fingerprint = normalized_image(data)
+                except Exception:
+                    phash = None
+            with self._lock:
+                self._store(sha, phash, kind, text, fingerprint)
+        return text
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache()
+    return _cache
@@ -1,17 +1,125 @@
+import csv
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Tuple
+
 from PyPDF2 import PdfReader
 import docx
-import pandas as pd
-import logging
+from openpyxl import load_workbook
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 20))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 4))
+# Páginas con menos texto que esto se consideran escaneadas y pasan por OCR
+PDF_OCR_MIN_CHARS = int(os.getenv("PDF_OCR_MIN_CHARS", 20))
+
+SPREADSHEET_MAX_ROWS = int(os.getenv("SPREADSHEET_MAX_ROWS", 1000))
+SPREADSHEET_MAX_BYTES = int(os.getenv("SPREADSHEET_MAX_BYTES", 64 * 1024))
+
+# Cabeceras de las columnas de un pedido en hojas de cálculo
+CODE_HEADER = re.compile(r"c[oó]d|ref|art[ií]culo|sku", re.IGNORECASE)
+QUANTITY_HEADER = re.compile(r"cant|unid|uds|qty|cajas", re.IGNORECASE)
+
+# Indicios de que una página contiene un pedido (códigos con cantidades)
+ORDER_HINTS = re.compile(
+    r"\b(pedido|cantidad|c[oó]digo|unidades|uds)\b|\b\d+\s*x\s*[a-z0-9]+",
+    re.IGNORECASE,
+)
+
+# Cierre explícito de un pedido: lo que sigue suele ser catálogo o condiciones.
+# Las páginas de continuación solo llevan códigos y cantidades, sin indicios
+ORDER_END = re.compile(
+    r"\b(total\s+(del\s+)?pedido|importe\s+total|total\s+general|"
+    r"condiciones\s+generales|fin\s+del\s+pedido)\b",
+    re.IGNORECASE,
+)
+
+_pdf_pool = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf")
+
+
+def looks_like_order(text: str) -> bool:
+    return bool(text and ORDER_HINTS.search(text))
+
+
+def _ocr_page_images(page) -> str:
+    """
+    Runs OCR over the images embedded in a page without a text layer. Goes
+    through extract_text_from_image, so it shares the OCR lock with the image
+    pool instead of calling PaddleOCR from the PDF workers in parallel.
+    """
+    from src.media.ocr import extract_text_from_image
+
+    texts = []
+    for image in page.images:
+        try:
+            text = extract_text_from_image(image.data)
+        except Exception as e:
+            logging.error(f"Error en OCR de página PDF: {e}")
+            continue
+        if text:
+            texts.append(text)
+    return "\n".join(texts)
+
+
+def extract_text_from_pdf(path, max_pages: int = PDF_MAX_PAGES):
+    """
+    Extracts text page by page on a shared worker pool.
+
+    Reading stops at ``max_pages`` or after the page that closes an order
+    (ORDER_END), so long price lists sent along with an order don't hold up
+    the pipeline. Scanned pages fall back to OCR.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        page_count = len(PdfReader(io.BytesIO(data)).pages)
+    except Exception as e:
+        logging.error(f"Error leyendo PDF: {e}")
+        return None
 
+    if page_count > max_pages:
+        logging.info(f"PDF has {page_count} pages, reading the first {max_pages}")
+    page_count = min(page_count, max_pages)
 
-def extract_text_from_pdf(path):
+    # PdfReader no es seguro entre hilos: un lector por hilo del pool
+    local = threading.local()
+
+    def extract_page(index: int) -> str:
+        reader = getattr(local, "reader", None)
+        if reader is None:
+            reader = local.reader = PdfReader(io.BytesIO(data))
+        page = reader.pages[index]
+        try:
+            text = page.extract_text() or ""
+        except Exception as e:
+            logging.error(f"Error leyendo página {index + 1} del PDF: {e}")
+            text = ""
+        if len(text.strip()) < PDF_OCR_MIN_CHARS:
+            ocr_text = _ocr_page_images(page)
+            if ocr_text:
+                return ocr_text
+        return text
+
+    pages = []
+    seen_order = False
     try:
-        reader = PdfReader(path)
-        return "\n".join(page.extract_text() or "" for page in reader.pages)
+        for start in range(0, page_count, PDF_WORKERS):
+            window = range(start, min(start + PDF_WORKERS, page_count))
+            for text in _pdf_pool.map(extract_page, window):
+                pages.append(text)
+                seen_order = seen_order or looks_like_order(text)
+                if seen_order and ORDER_END.search(text):
+                    logging.info(f"Order ended, stopping PDF read at page {len(pages)}")
+                    return "\n".join(pages)
     except Exception as e:
         logging.error(f"Error leyendo PDF: {e}")
         return None
 
+    return "\n".join(pages)
+
 
 def extract_text_from_docx(path):
     try:
@@ -31,10 +139,106 @@ def extract_text_from_txt(path):
         return None
 
 
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_csv_rows(path):
+    """
+    Yields the rows of a CSV file as lists of strings, sniffing the delimiter
+    (Excel in Spanish exports with ";").
+    """
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        # csv.Sniffer falla con líneas vacías o celdas irregulares
+        delimiter = max(",;\t|", key=sample.count)
+        for row in csv.reader(f, delimiter=delimiter):
+            yield [cell.strip() for cell in row]
+
+
+def iter_xlsx_rows(path):
+    """
+    Yields the rows of the active sheet without loading the workbook in memory.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [_cell_text(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def find_order_columns(row) -> Optional[Tuple[int, int]]:
+    """
+    Returns the (code, quantity) column indexes if ``row`` is an order header.
+    """
+    code = quantity = None
+    for index, cell in enumerate(row):
+        if code is None and CODE_HEADER.search(cell):
+            code = index
+        elif quantity is None and QUANTITY_HEADER.search(cell):
+            quantity = index
+    if code is None or quantity is None:
+        return None
+    return code, quantity
+
+
+def rows_to_text(
+    rows: Iterable[list],
+    max_rows: int = SPREADSHEET_MAX_ROWS,
+    max_bytes: int = SPREADSHEET_MAX_BYTES,
+) -> str:
+    """
+    Renders spreadsheet rows as text, reading them lazily.
+
+    Once a header with code and quantity columns is found only those two
+    columns are kept, and reading stops at the first empty row after the
+    order lines (totals, notes or a second table usually follow).
+    """
+    lines = []
+    size = 0
+    columns = None
+    order_rows = 0
+
+    for count, row in enumerate(rows):
+        if count >= max_rows:
+            logging.info(f"Spreadsheet truncated at {max_rows} rows")
+            break
+
+        if columns is None:
+            columns = find_order_columns(row)
+        else:
+            row = [row[i] if i < len(row) else "" for i in columns]
+            if not any(row):
+                if order_rows:
+                    break
+                continue
+            order_rows += 1
+
+        if columns is not None and order_rows == 0:
+            # Cabecera del pedido
+            row = [row[i] for i in columns]
+
+        line = "  ".join(cell for cell in row).rstrip()
+        if not line:
+            continue
+        size += len(line.encode("utf-8")) + 1
+        if size > max_bytes:
+            logging.info(f"Spreadsheet truncated at {max_bytes} bytes")
+            break
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
 def extract_text_from_csv(path):
     try:
-        df = pd.read_csv(path)
-        return df.to_string(index=False)
+        return rows_to_text(iter_csv_rows(path))
     except Exception as e:
         logging.error(f"Error leyendo CSV: {e}")
         return None
@@ -42,8 +246,7 @@ def extract_text_from_csv(path):
 
 def extract_text_from_xlsx(path):
     try:
-        df = pd.read_excel(path)
-        return df.to_string(index=False)
+        return rows_to_text(iter_xlsx_rows(path))
     except Exception as e:
         logging.error(f"Error leyendo XLSX: {e}")
         return None
@@ -0,0 +1,255 @@
+import logging
+import mimetypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, Iterable, Optional
+
+from src.media.cache import get_extraction_cache
+
+# handler(data, path, ext) -> texto extraído o None
+Handler = Callable[[bytes, str, str], Optional[str]]
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+# Fallos pasajeros de extract(): conviene reintentar el evento más tarde
+TRANSIENT_ERRORS = (QueueFullError, TimeoutError)
+
+
+class ExtractorPool:
+    """
+    Worker pool for one family of extractors.
+
+    At most ``workers + max_queue`` jobs are accepted at once; beyond that
+    ``submit`` fails immediately instead of queueing, so a burst of one media
+    type cannot pile up work that delays every other type.
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int, timeout: float):
+        self.name = name
+        self.timeout = timeout
+        self.capacity = workers + max_queue
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"extract-{name}"
+        )
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(f"{self.name} extractor queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """
+        Runs ``fn`` on the pool and waits up to ``timeout`` seconds. On timeout
+        the job keeps its worker until it finishes, but the caller moves on.
+        """
+        return self.submit(fn, *args).result(timeout=self.timeout)
+
+
+class Extractor:
+    def __init__(
+        self,
+        name: str,
+        handler: Handler,
+        pool: ExtractorPool,
+        cache_kind: Optional[str],
+    ):
+        self.name = name
+        self.handler = handler
+        self.pool = pool
+        self.cache_kind = cache_kind
+
+
+class ExtractorRegistry:
+    """
+    Maps file extensions and MIME types to text extractors, each running on the
+    worker pool of its family.
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, ExtractorPool] = {}
+        self._by_extension: Dict[str, Extractor] = {}
+        self._by_mime: Dict[str, Extractor] = {}
+
+    def add_pool(self, name: str, workers: int, max_queue: int, timeout: float):
+        self._pools[name] = ExtractorPool(name, workers, max_queue, timeout)
+
+    def capacity(self) -> int:
+        """Jobs that can be running or queued at once across every pool."""
+        return sum(pool.capacity for pool in self._pools.values())
+
+    def register(
+        self,
+        name: str,
+        handler: Handler,
+        pool: str,
+        extensions: Iterable[str] = (),
+        mime_types: Iterable[str] = (),
+        cache_kind: Optional[str] = None,
+    ):
+        """
+        Registers ``handler`` for the given extensions and MIME types.
+
+        Args:
+            name: Label used in logs.
+            handler: Callable taking (data, path, ext) and returning the text.
+            pool: Name of a pool created with ``add_pool``.
+            cache_kind: Kind passed to the extraction cache; None disables it.
+        """
+        extractor = Extractor(name, handler, self._pools[pool], cache_kind)
+        for ext in extensions:
+            self._by_extension[ext.lower()] = extractor
+        for mime in mime_types:
+            self._by_mime[mime.lower()] = extractor
+
+    def lookup(
+        self, filename: str, mime_type: Optional[str] = None
+    ) -> Optional[Extractor]:
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in self._by_extension:
+            return self._by_extension[ext]
+        mime_type = mime_type or mimetypes.guess_type(filename)[0]
+        if mime_type:
+            return self._by_mime.get(mime_type.lower())
+        return None
+
+    def extract(
+        self, data: bytes, filename: str, path: str, mime_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Extracts the text of an attachment, or returns None if no extractor is
+        registered.
+
+        Raises QueueFullError if its pool is saturated and TimeoutError if the
+        job takes longer than the pool's timeout, so the inbox retries the
+        event later instead of storing it without its text.
+        """
+        extractor = self.lookup(filename, mime_type)
+        if extractor is None:
+            return None
+
+        ext = os.path.splitext(filename)[1].lower()
+
+        def job():
+            if extractor.cache_kind is None:
+                return extractor.handler(data, path, ext)
+            return get_extraction_cache().get_or_extract(
+                data, extractor.cache_kind, lambda: extractor.handler(data, path, ext)
+            )
+
+        try:
+            return extractor.pool.run(job)
+        except QueueFullError:
+            logging.warning(f"{extractor.name} extraction deferred: queue full")
+            raise
+        except TimeoutError:
+            logging.warning(
+                f"{extractor.name} extraction timed out after {extractor.pool.timeout}s"
+            )
+            raise
+
+
+def _env_pool(
+    registry: ExtractorRegistry, name: str, workers: int, max_queue: int, timeout: float
+):
+    prefix = f"EXTRACT_{name.upper()}"
+    registry.add_pool(
+        name,
+        workers=int(os.getenv(f"{prefix}_WORKERS", workers)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT", timeout)),
+    )
+
+
+def build_default_registry() -> ExtractorRegistry:
+    """
+    Registry with the built-in extractors. Pools are sized from
+    EXTRACT_<POOL>_WORKERS / _MAX_QUEUE / _TIMEOUT.
+    """
+    # Importes diferidos: cada extractor arrastra sus dependencias pesadas
+    def image(data, path, ext):
+        from src.media.ocr import extract_text_from_image
+
+        return extract_text_from_image(data)
+
+    def audio(data, path, ext):
+        from src.media.audio import transcribe_audio
+
+        return transcribe_audio(data, extension=ext)
+
+    def document(function_name):
+        def handler(data, path, ext):
+            from src.media import documents
+
+            return getattr(documents, function_name)(path)
+
+        return handler
+
+    registry = ExtractorRegistry()
+    _env_pool(registry, "image", workers=2, max_queue=8, timeout=60)
+    _env_pool(registry, "audio", workers=2, max_queue=8, timeout=120)
+    _env_pool(registry, "document", workers=2, max_queue=4, timeout=60)
+
+    registry.register(
+        "image",
+        image,
+        pool="image",
+        extensions=(".jpg", ".jpeg", ".png", ".webp"),
+        mime_types=("image/jpeg", "image/png", "image/webp"),
+        cache_kind="image",
+    )
+    registry.register(
+        "audio",
+        audio,
+        pool="audio",
+        extensions=(".mp3", ".ogg", ".wav", ".opus"),
+        mime_types=("audio/mpeg", "audio/ogg", "audio/wav", "audio/opus"),
+    )
+    documents = [
+        ("pdf", ".pdf", "application/pdf"),
+        (
+            "docx",
+            ".docx",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ),
+        ("txt", ".txt", "text/plain"),
+        ("csv", ".csv", "text/csv"),
+        (
+            "xlsx",
+            ".xlsx",
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        ),
+    ]
+    for name, ext, mime in documents:
+        registry.register(
+            name,
+            document(f"extract_text_from_{name}"),
+            pool="document",
+            extensions=(ext,),
+            mime_types=(mime,),
+            cache_kind=ext,
+        )
+    return registry
+
+
+_registry: Optional[ExtractorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_extractor_registry() -> ExtractorRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = build_default_registry()
+    return _registry
@@ -1,10 +1,54 @@
+import io
 import logging
+import os
+import threading
 import numpy as np
 import cv2
-from paddleocr import PaddleOCR
+from PIL import Image
 
-# Initialize only once globally
-ocr_model = PaddleOCR(lang="es", use_angle_cls=True, show_log=False)
+# "fast": reduce la imagen, omite el clasificador de ángulo si la orientación
+# EXIF es conocida y agrupa los recortes de reconocimiento.
+# "accurate": pipeline completo a resolución original.
+OCR_MODE = os.getenv("OCR_MODE", "fast")
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 1600))
+OCR_REC_BATCH = int(os.getenv("OCR_REC_BATCH", 16))
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+_ocr_model = None
+_ocr_model_lock = threading.Lock()
+# Los predictores de Paddle no son seguros entre hilos: una inferencia a la vez
+# para todos los llamadores (pool de imágenes y OCR de PDF escaneados)
+_ocr_call_lock = threading.Lock()
+
+
+def get_ocr_model():
+    """
+    Returns the shared PaddleOCR instance, loading it on first use.
+    """
+    global _ocr_model
+    if _ocr_model is None:
+        with _ocr_model_lock:
+            if _ocr_model is None:
+                from paddleocr import PaddleOCR
+
+                logging.info("Loading PaddleOCR model...")
+                _ocr_model = PaddleOCR(
+                    lang="es",
+                    use_angle_cls=True,
+                    rec_batch_num=OCR_REC_BATCH,
+                    show_log=False,
+                )
+    return _ocr_model
+
+
+def run_ocr(image, cls: bool = True):
+    """
+    Runs the shared PaddleOCR instance on a decoded image, one call at a time.
+    """
+    model = get_ocr_model()
+    with _ocr_call_lock:
+        return model.ocr(image, cls=cls)
 
 
 def binarize_and_normalize(image):
@@ -13,14 +57,47 @@ def binarize_and_normalize(image):
     return cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
 
 
-def extract_text_from_image(image_bytes: bytes) -> str:
+def downscale(image, max_side: int):
+    """
+    Shrinks the image so its long edge is at most ``max_side`` pixels.
+    """
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image
+    size = (round(width * scale), round(height * scale))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def has_exif_orientation(image_bytes: bytes) -> bool:
+    """
+    True if the photo carries an EXIF orientation tag. OpenCV already applies
+    it when decoding, so the text is upright and angle classification can be
+    skipped.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            return EXIF_ORIENTATION_TAG in img.getexif()
+    except Exception:
+        return False
+
+
+def extract_text_from_image(
+    image_bytes: bytes, mode: str = OCR_MODE, max_side: int = OCR_MAX_SIDE
+) -> str:
     try:
         np_img = np.frombuffer(image_bytes, np.uint8)
         image = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
+
+        use_cls = True
+        if mode == "fast":
+            image = downscale(image, max_side)
+            use_cls = not has_exif_orientation(image_bytes)
+
         image = binarize_and_normalize(image)
-        result = ocr_model.ocr(image, cls=True)
+        result = run_ocr(image, cls=use_cls)
 
-        extracted_text = [line[1][0] for block in result for line in block]
+        extracted_text = [line[1][0] for block in result if block for line in block]
         return "\n".join(extracted_text).strip()
     except Exception as e:
         logging.error(f"OCR error: {e}")
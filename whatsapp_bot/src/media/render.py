@@ -0,0 +1,372 @@
+import hashlib
+import io
+import os
+import textwrap
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+MIN_FONT_SIZE = 10
+DESCRIPTION_WRAP = 26  # caracteres por línea en la columna de descripción
+DESCRIPTION_MAX_LINES = 4
+
+# Pedidos largos: páginas de tamaño fijo en lugar de un único lienzo enorme
+ORDER_PAGE_LINES = int(os.getenv("ORDER_PAGE_LINES", 25))
+ORDER_IMAGE_FORMAT = os.getenv("ORDER_IMAGE_FORMAT", "JPEG").upper()
+ORDER_IMAGE_QUALITY = int(os.getenv("ORDER_IMAGE_QUALITY", 80))
+ORDER_RENDER_WORKERS = int(os.getenv("ORDER_RENDER_WORKERS", os.cpu_count() or 2))
+
+IMAGE_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp"}
+
+# Miniaturas decodificadas de imágenes descargadas por SFTP (sin atlas): cada
+# cambio del pedido vuelve a dibujar todas sus filas
+THUMB_CACHE_SIZE = int(os.getenv("THUMB_CACHE_SIZE", 256))
+
+_thumb_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_thumb_cache_lock = threading.Lock()
+
+_render_pool = ThreadPoolExecutor(
+    max_workers=ORDER_RENDER_WORKERS, thread_name_prefix="render"
+)
+
+
+@lru_cache(maxsize=64)
+def get_font(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Loads a TrueType font once per (path, size); truetype() parses the file on
+    every call.
+    """
+    return ImageFont.truetype(font_path, size)
+
+
+@lru_cache(maxsize=64)
+def line_height(font_path: str, size: int) -> int:
+    bbox = get_font(font_path, size).getbbox("A")
+    return bbox[3] - bbox[1]
+
+
+@lru_cache(maxsize=4096)
+def _glyph(font_path: str, size: int, char: str) -> Tuple[np.ndarray, int, int, float]:
+    """
+    Coverage bitmap of one character, its offset from the pen position and
+    its advance. FreeType rasterises every glyph again on each draw.text().
+    """
+    font = get_font(font_path, size)
+    left, top, right, bottom = font.getbbox(char)
+    bitmap = np.zeros((max(0, bottom - top), max(0, right - left)), np.uint8)
+    if bitmap.size:
+        mask = Image.new("L", (right - left, bottom - top))
+        ImageDraw.Draw(mask).text((-left, -top), char, font=font, fill=255)
+        bitmap = np.asarray(mask)
+    return bitmap, left, top, font.getlength(char)
+
+
+@lru_cache(maxsize=8192)
+def _kerning(font_path: str, size: int, pair: str) -> float:
+    font = get_font(font_path, size)
+    return font.getlength(pair) - font.getlength(pair[0]) - font.getlength(pair[1])
+
+
+@lru_cache(maxsize=2048)
+def text_mask(font_path: str, size: int, text: str) -> Tuple[Image.Image, int, int]:
+    """
+    Coverage mask of a single line of ``text`` assembled from cached glyphs,
+    with its offset from the drawing position. Matches draw.text() to within a
+    pixel of glyph placement.
+    """
+    pen = 0.0
+    placed = []
+    for i, char in enumerate(text):
+        if i:
+            pen += _kerning(font_path, size, text[i - 1 : i + 1])
+        bitmap, left, top, advance = _glyph(font_path, size, char)
+        if bitmap.size:
+            placed.append((bitmap, round(pen) + left, top))
+        pen += advance
+
+    if not placed:
+        return Image.new("L", (1, 1)), 0, 0
+    x0 = min(x for _, x, _ in placed)
+    y0 = min(y for _, _, y in placed)
+    x1 = max(x + bitmap.shape[1] for bitmap, x, _ in placed)
+    y1 = max(y + bitmap.shape[0] for bitmap, _, y in placed)
+    coverage = np.zeros((y1 - y0, x1 - x0), np.uint8)
+    for bitmap, x, y in placed:
+        h, w = bitmap.shape
+        region = coverage[y - y0 : y - y0 + h, x - x0 : x - x0 + w]
+        # Glifos que se tocan por el kerning: como FreeType, gana el máximo
+        np.maximum(region, bitmap, out=region)
+    return Image.fromarray(coverage, "L"), x0, y0
+
+
+def draw_text(
+    image: Image.Image,
+    xy: Tuple[float, float],
+    text: str,
+    font_path: str,
+    size: int,
+    fill: str,
+):
+    """
+    draw.text() for the order table, composed from cached glyph bitmaps.
+    Multi-line text goes through each line at the font's line spacing.
+    """
+    if "\n" in text:
+        # Mismo interlineado que ImageDraw.multiline_text
+        spacing = get_font(font_path, size).getbbox("A")[3] + 4
+        for row, line in enumerate(text.split("\n")):
+            position = (xy[0], xy[1] + row * spacing)
+            draw_text(image, position, line, font_path, size, fill)
+        return
+    mask, left, top = text_mask(font_path, size, text)
+    image.paste(fill, (round(xy[0]) + left, round(xy[1]) + top), mask)
+
+
+def decode_thumbnail(data: bytes, size: Tuple[int, int]) -> Image.Image:
+    """
+    Decodes and shrinks a product image, keeping the last THUMB_CACHE_SIZE
+    results keyed by a digest of the bytes.
+    """
+    key = (hashlib.blake2b(data, digest_size=16).digest(), size)
+    with _thumb_cache_lock:
+        thumb = _thumb_cache.get(key)
+        if thumb is not None:
+            _thumb_cache.move_to_end(key)
+            return thumb
+
+    thumb = Image.open(io.BytesIO(data))
+    thumb.thumbnail(size)
+
+    with _thumb_cache_lock:
+        _thumb_cache[key] = thumb
+        while len(_thumb_cache) > THUMB_CACHE_SIZE:
+            _thumb_cache.popitem(last=False)
+    return thumb
+
+
+def fit_font_size(font_path: str, lines: int, max_height: int, max_size: int) -> int:
+    """
+    Largest size down to MIN_FONT_SIZE at which ``lines`` lines fit in
+    ``max_height``. Returns MIN_FONT_SIZE - 1 when none fits.
+    """
+    if max_size < MIN_FONT_SIZE:
+        return max_size
+
+    # La altura de línea crece con el tamaño: búsqueda binaria
+    low, high, best = MIN_FONT_SIZE, max_size, MIN_FONT_SIZE - 1
+    while low <= high:
+        mid = (low + high) // 2
+        if lines * line_height(font_path, mid) <= max_height:
+            best, low = mid, mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+def build_order_image_table(
+    items: List[Tuple[str, str, str, Union[bytes, Image.Image, None]]],
+    font_path: str = DEFAULT_FONT_PATH,
+    font_size: int = 18,
+    cell_padding: int = 10,
+    thumb_size: Tuple[int, int] = (100, 100),
+    title: str = "PEDIDO:",
+    page_label: str = "",
+) -> Image.Image:
+
+    gray_text_color = "#CCCCCC"
+    black_text_color = "#000000"
+
+    headers = ["Código", "Cantidad", "Descripción", "Imagen"]
+    col_widths = [180, 140, 400, thumb_size[0] + 2 * cell_padding]
+    base_row_height = max(
+        thumb_size[1] + 2 * cell_padding, font_size + 2 * cell_padding
+    )
+
+    # Texto negro (lo que lee el OCR) un poco mayor que el resto
+    ocr_size = font_size + 4
+    ocr_font = get_font(font_path, ocr_size)
+
+    # Ajuste de cada fila (una sola vez): líneas de descripción y altura
+    rows = []
+    for _, _, descripcion, _ in items:
+        wrapped = textwrap.wrap(descripcion, width=DESCRIPTION_WRAP)
+        size = font_size
+        if len(wrapped) > DESCRIPTION_MAX_LINES and font_size >= MIN_FONT_SIZE:
+            size = MIN_FONT_SIZE - 1
+        row_height = max(
+            base_row_height, size * DESCRIPTION_MAX_LINES + 2 * cell_padding
+        )
+        rows.append((wrapped, row_height))
+
+    header_height = font_size * 3
+    total_height = (
+        sum(row_height for _, row_height in rows)
+        + base_row_height
+        + header_height
+        + font_size
+        + 10
+    )
+    total_width = sum(col_widths)
+
+    image = Image.new("RGB", (total_width, total_height), "white")
+    draw = ImageDraw.Draw(image)
+
+    y = 0
+
+    # Título
+    draw_text(image, (cell_padding, y), title, font_path, ocr_size, black_text_color)
+    if page_label:
+        # En gris: el OCR solo lee el texto negro y el pedido debe seguir
+        # siendo "PEDIDO: \codigo \cantidad ..."
+        draw_text(
+            image,
+            (cell_padding + ocr_font.getlength(title) + font_size, y),
+            page_label,
+            font_path,
+            ocr_size,
+            gray_text_color,
+        )
+    y += font_size + 10
+
+    # Encabezados
+    x = 0
+    for i, header in enumerate(headers):
+        draw.rectangle(
+            [x, y, x + col_widths[i], y + base_row_height],
+            fill="#EEEEEE",
+            outline="gray",
+        )
+        draw_text(
+            image,
+            (x + cell_padding, y + cell_padding),
+            header,
+            font_path,
+            font_size,
+            gray_text_color,
+        )
+        x += col_widths[i]
+    y += base_row_height
+
+    # Filas
+    for (codigo, cantidad, _, img_bytes), (wrapped, row_height) in zip(items, rows):
+        x = 0
+
+        # Código
+        draw.rectangle([x, y, x + col_widths[0], y + row_height], outline="gray")
+        draw_text(
+            image,
+            (x + cell_padding, y + cell_padding),
+            codigo,
+            font_path,
+            ocr_size,
+            black_text_color,
+        )
+        x += col_widths[0]
+
+        # Cantidad
+        draw.rectangle([x, y, x + col_widths[1], y + row_height], outline="gray")
+        draw_text(
+            image,
+            (x + cell_padding, y + cell_padding),
+            cantidad,
+            font_path,
+            ocr_size,
+            black_text_color,
+        )
+        x += col_widths[1]
+
+        # Descripción (ajustada a 26 caracteres por línea)
+        draw.rectangle([x, y, x + col_widths[2], y + row_height], outline="gray")
+        max_height = row_height - 2 * cell_padding
+        size = fit_font_size(font_path, len(wrapped), max_height, font_size)
+        height = line_height(font_path, size)
+        max_lines = max_height // height
+        lines = wrapped[:max_lines]
+
+        if lines and len(wrapped) > max_lines:
+            lines[-1] = lines[-1][: max(0, len(lines[-1]) - 1)] + "\\"
+
+        desc_y = y + cell_padding
+        line_spacing = int(height * 0.2)  # Agrega 20% de espacio adicional entre líneas
+        for line in lines:
+            position = (x + cell_padding, desc_y)
+            draw_text(image, position, line, font_path, size, gray_text_color)
+            desc_y += height + line_spacing
+        x += col_widths[2]
+
+        # Imagen o texto alternativo
+        draw.rectangle([x, y, x + col_widths[3], y + row_height], outline="gray")
+        if isinstance(img_bytes, Image.Image):
+            # Miniatura ya decodificada (atlas de miniaturas)
+            image.paste(img_bytes, (x + cell_padding, y + cell_padding))
+        elif img_bytes:
+            try:
+                thumb = decode_thumbnail(img_bytes, thumb_size)
+                image.paste(thumb, (x + cell_padding, y + cell_padding))
+            except Exception:
+                draw_text(
+                    image,
+                    (x + cell_padding, y + cell_padding),
+                    "Error imagen",
+                    font_path,
+                    font_size,
+                    gray_text_color,
+                )
+        else:
+            draw_text(
+                image,
+                (x + cell_padding, y + cell_padding),
+                "Imagen no\ndisponible",
+                font_path,
+                font_size - 2,
+                gray_text_color,
+            )
+
+        y += row_height
+
+    return image
+
+
+def encode_image(
+    image: Image.Image, fmt: str = ORDER_IMAGE_FORMAT, quality: int = ORDER_IMAGE_QUALITY
+) -> bytes:
+    """
+    Encodes an order page. JPEG is optimized (smaller Huffman tables, same
+    pixels); WebP is usually a third smaller for text on white.
+    """
+    buffer = io.BytesIO()
+    if fmt == "WEBP":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def render_order_pages(
+    items: List[Tuple[str, str, str, Union[bytes, Image.Image, None]]],
+    page_lines: int = ORDER_PAGE_LINES,
+    fmt: str = ORDER_IMAGE_FORMAT,
+    quality: int = ORDER_IMAGE_QUALITY,
+) -> List[bytes]:
+    """
+    Splits the order into pages of ``page_lines`` lines, renders and encodes
+    them in parallel and returns the encoded pages in order.
+    """
+    pages = [items[i : i + page_lines] for i in range(0, len(items), page_lines)]
+    total = len(pages)
+
+    def render(numbered):
+        number, page = numbered
+        label = "" if total == 1 else f"({number}/{total})"
+        return encode_image(
+            build_order_image_table(page, page_label=label), fmt, quality
+        )
+
+    return list(_render_pool.map(render, enumerate(pages, start=1)))
@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", 10 * 1024**3))
+MEDIA_MAX_AGE_DAYS = float(os.getenv("MEDIA_MAX_AGE_DAYS", 90))
+MEDIA_COMPACT_INTERVAL = float(os.getenv("MEDIA_COMPACT_INTERVAL", 3600))
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+AUDIO_EXTENSIONS = {".mp3", ".ogg", ".wav", ".opus"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv"}
+
+
+def media_kind(ext: str) -> str:
+    """
+    Folder a payload is stored under, from its lower-case extension.
+    """
+    if ext in IMAGE_EXTENSIONS:
+        return "images"
+    if ext in AUDIO_EXTENSIONS:
+        return "audio"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return "documents"
+
+
+def _safe_extension(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    return ext if ext[1:].isalnum() and len(ext) <= 8 else ".bin"
+
+
+class MediaStore:
+    """
+    Content-addressed store for inbound attachments.
+
+    Files live under ``<root>/<kind>/<YYYY>/<MM>/<DD>/<sha[:2]>/<sha><ext>``,
+    which keeps every directory small no matter how many files are kept.
+    Identical payloads are written once; an SQLite index tracks their size
+    and last use so ``compact`` can enforce the age and size limits.
+    """
+
+    def __init__(
+        self,
+        root: str = MEDIA_DIR,
+        max_bytes: int = MEDIA_MAX_BYTES,
+        max_age_days: float = MEDIA_MAX_AGE_DAYS,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+
+        os.makedirs(root, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(root, "media_index.sqlite3"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs (last_used)"
+        )
+        self._conn.commit()
+
+    def put(self, data: bytes, filename: str, when: Optional[datetime] = None) -> str:
+        """
+        Stores ``data`` and returns its path. A payload already in the store is
+        not written again; its existing path is returned.
+        """
+        sha = hashlib.sha256(data).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM blobs WHERE sha256 = ?", (sha,)
+            ).fetchone()
+            if row and os.path.exists(row[0]):
+                self._conn.execute(
+                    "UPDATE blobs SET last_used = ? WHERE sha256 = ?", (now, sha)
+                )
+                self._conn.commit()
+                logging.info(f"Media already stored: {row[0]}")
+                return row[0]
+
+        ext = _safe_extension(filename)
+        when = when or datetime.now()
+        directory = os.path.join(
+            self.root, media_kind(ext), when.strftime("%Y/%m/%d"), sha[:2]
+        )
+        path = os.path.join(directory, sha + ext)
+
+        # Escritura atómica: nunca queda un fichero a medias con el nombre final
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            # compact() borra los directorios vacíos con el cerrojo: el temporal
+            # se crea con él, así el directorio ya no está vacío al escribir
+            os.makedirs(directory, exist_ok=True)
+            f = open(tmp_path, "wb")
+        with f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, path, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha, path, len(data), now, now),
+            )
+            self._conn.commit()
+        logging.info(f"Saved media file: {path}")
+        return path
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _delete(self, rows) -> int:
+        freed = 0
+        for sha, path, size in rows:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not remove {path}: {e}")
+                continue
+            self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha,))
+            freed += size
+            self._prune_dirs(os.path.dirname(path))
+        self._conn.commit()
+        return freed
+
+    def _prune_dirs(self, directory: str):
+        root = os.path.abspath(self.root)
+        directory = os.path.abspath(directory)
+        while directory != root and directory.startswith(root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
+
+    def compact(self) -> dict:
+        """
+        Removes files unused for longer than the age limit, then the least
+        recently used ones until the store fits in ``max_bytes``.
+        """
+        removed, freed = 0, 0
+        with self._lock:
+            if self.max_age > 0:
+                rows = self._conn.execute(
+                    "SELECT sha256, path, size FROM blobs WHERE last_used < ?",
+                    (time.time() - self.max_age,),
+                ).fetchall()
+                freed += self._delete(rows)
+                removed += len(rows)
+
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()[0]
+            if self.max_bytes > 0 and total > self.max_bytes:
+                excess = total - self.max_bytes
+                rows = []
+                for row in self._conn.execute(
+                    "SELECT sha256, path, size FROM blobs ORDER BY last_used"
+                ):
+                    if excess <= 0:
+                        break
+                    rows.append(row)
+                    excess -= row[2]
+                freed += self._delete(rows)
+                removed += len(rows)
+
+        if removed:
+            logging.info(f"Media compaction removed {removed} files ({freed} bytes)")
+        return {"removed": removed, "freed_bytes": freed}
+
+    def start_compaction(self, interval: float = MEDIA_COMPACT_INTERVAL):
+        """
+        Runs ``compact`` periodically on a daemon thread.
+        """
+        if self._compactor is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logging.error(f"Media compaction failed: {e}")
+                time.sleep(interval)
+
+        self._compactor = threading.Thread(target=loop, name="media-compactor", daemon=True)
+        self._compactor.start()
+
+
+_store: Optional[MediaStore] = None
+_store_lock = threading.Lock()
+
+
+def get_media_store() -> MediaStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MediaStore()
+    return _store
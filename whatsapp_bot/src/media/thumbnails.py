@@ -0,0 +1,221 @@
+import io
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+THUMB_ATLAS_DIR = os.getenv("THUMB_ATLAS_DIR", "thumbnails")
+THUMB_ATLAS_REFRESH = float(os.getenv("THUMB_ATLAS_REFRESH", 6 * 3600))
+THUMB_SIZE = (100, 100)
+
+# Cada casilla del atlas ocupa siempre lo mismo: 100x100 píxeles RGB
+TILE_BYTES = THUMB_SIZE[0] * THUMB_SIZE[1] * 3
+
+INDEX_FILE = "index.json"
+
+
+def is_product_image(filename: str) -> bool:
+    """
+    Same rule as ``find_image_file``: full-size "<codigo>.jpg" images only.
+    """
+    return (
+        filename.lower().endswith(".jpg")
+        and "mini" not in filename.lower()
+        and "_" not in filename
+    )
+
+
+def make_tile(image_bytes: bytes) -> Tuple[bytes, int, int]:
+    """
+    Decodes and shrinks an image exactly as the renderer used to, returning
+    the tile padded to a full slot plus the thumbnail's real size.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.thumbnail(THUMB_SIZE)
+        thumb = img.convert("RGB")
+    slot = Image.new("RGB", THUMB_SIZE, "white")
+    slot.paste(thumb, (0, 0))
+    return slot.tobytes(), thumb.width, thumb.height
+
+
+class ThumbnailAtlas:
+    """
+    Read-only view of a built atlas: a flat file of fixed-size RGB tiles,
+    memory-mapped, plus an index of codigo -> (slot, width, height).
+    """
+
+    def __init__(self, directory: str = THUMB_ATLAS_DIR):
+        self.directory = directory
+        self.index: Dict[str, list] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self._index_path()).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                data = json.load(f)
+            index = data["tiles"]
+            with open(os.path.join(self.directory, data["atlas"]), "rb") as f:
+                mapped = (
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if index else None
+                )
+        except (FileNotFoundError, ValueError) as e:
+            # Un build concurrente acaba de sustituirlo: se reintenta en la siguiente llamada
+            logging.warning(f"Thumbnail atlas not loaded: {e}")
+            return
+
+        old = self._mmap
+        self.index, self._mmap, self._loaded_mtime = index, mapped, mtime
+        if old is not None:
+            old.close()
+        logging.info(f"Thumbnail atlas loaded: {len(index)} products")
+
+    def get(self, codigo: str) -> Optional[Image.Image]:
+        """
+        Returns the product's thumbnail, or None if it is not in the atlas.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            entry = self.index.get(codigo)
+            if entry is None or self._mmap is None:
+                return None
+            slot, width, height = entry[:3]
+            offset = slot * TILE_BYTES
+            tile = Image.frombytes(
+                "RGB", THUMB_SIZE, self._mmap[offset : offset + TILE_BYTES]
+            )
+        return tile.crop((0, 0, width, height))
+
+
+def build_atlas(directory: str = THUMB_ATLAS_DIR) -> dict:
+    """
+    Downloads the product images over SFTP and rebuilds the atlas.
+
+    Images whose remote mtime did not change since the last build are copied
+    from the previous atlas instead of being downloaded and decoded again. The
+    new atlas replaces the old one atomically.
+    """
+    from src.media.sftp import SFTP_REMOTE_DIR, connect_sftp
+
+    os.makedirs(directory, exist_ok=True)
+    index_path = os.path.join(directory, INDEX_FILE)
+
+    previous: Dict[str, list] = {}
+    old_atlas = None
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        old_path = os.path.join(directory, data["atlas"])
+        if os.path.exists(old_path):
+            previous = data["tiles"]
+            old_atlas = open(old_path, "rb")
+
+    # Cada build escribe un atlas nuevo; el índice indica cuál está vigente
+    atlas_name = f"atlas-{time.time_ns()}.bin"
+    atlas_path = os.path.join(directory, atlas_name)
+
+    stats = {"products": 0, "reused": 0, "downloaded": 0, "failed": 0}
+    index: Dict[str, list] = {}
+    start = time.perf_counter()
+
+    sftp, transport = connect_sftp()
+    try:
+        sftp.chdir(SFTP_REMOTE_DIR)
+        entries = sorted(
+            (e for e in sftp.listdir_attr() if is_product_image(e.filename)),
+            key=lambda entry: entry.filename,
+        )
+
+        with open(atlas_path, "wb") as out:
+            for entry in entries:
+                codigo = os.path.splitext(entry.filename)[0]
+                cached = previous.get(codigo)
+
+                if cached and old_atlas and cached[3] == entry.st_mtime:
+                    old_atlas.seek(cached[0] * TILE_BYTES)
+                    tile = old_atlas.read(TILE_BYTES)
+                    width, height = cached[1], cached[2]
+                    stats["reused"] += 1
+                else:
+                    try:
+                        with sftp.open(entry.filename, "rb") as f:
+                            tile, width, height = make_tile(f.read())
+                    except Exception as e:
+                        logging.warning(f"Error building thumbnail {codigo}: {e}")
+                        stats["failed"] += 1
+                        continue
+                    stats["downloaded"] += 1
+
+                index[codigo] = [len(index), width, height, entry.st_mtime]
+                out.write(tile)
+    except Exception:
+        if os.path.exists(atlas_path):
+            os.remove(atlas_path)
+        raise
+    finally:
+        sftp.close()
+        transport.close()
+        if old_atlas:
+            old_atlas.close()
+
+    tmp_index = index_path + ".tmp"
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump({"built": time.time(), "atlas": atlas_name, "tiles": index}, f)
+    os.replace(tmp_index, index_path)
+
+    # Los lectores que aún mapean un atlas anterior lo conservan hasta cerrarlo
+    for name in os.listdir(directory):
+        if name.startswith("atlas-") and name != atlas_name:
+            os.remove(os.path.join(directory, name))
+
+    stats["products"] = len(index)
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    logging.info(f"Thumbnail atlas built: {stats}")
+    return stats
+
+
+def start_atlas_refresh(interval: float = THUMB_ATLAS_REFRESH):
+    """
+    Rebuilds the atlas periodically on a daemon thread.
+    """
+
+    def loop():
+        while True:
+            try:
+                build_atlas()
+            except Exception as e:
+                logging.error(f"Thumbnail atlas build failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="thumbnail-atlas", daemon=True)
+    thread.start()
+    return thread
+
+
+_atlas: Optional[ThumbnailAtlas] = None
+_atlas_lock = threading.Lock()
+
+
+def get_thumbnail_atlas() -> ThumbnailAtlas:
+    global _atlas
+    if _atlas is None:
+        with _atlas_lock:
+            if _atlas is None:
+                _atlas = ThumbnailAtlas()
+    return _atlas
@@ -1,8 +1,9 @@
 from sqlalchemy import ForeignKey, DateTime
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
 from src.models import Base_sqlite
 
@@ -21,6 +22,46 @@ class Message(Base_sqlite):
     type = Column(String, nullable=False)  # 'text', 'image', etc.
     content = Column(String)
     timestamp = Column(DateTime, nullable=False)
+    external_id = Column(String, unique=True)  # ID del mensaje en WhatsApp
+
+    @staticmethod
+    def ensure_schema(session: Session):
+        """
+        Adds the ``external_id`` column and its unique index to databases
+        created before message deduplication.
+        """
+        columns = [
+            row[1] for row in session.execute(text("PRAGMA table_info(messages)"))
+        ]
+        if columns and "external_id" not in columns:
+            session.execute(text("ALTER TABLE messages ADD COLUMN external_id TEXT"))
+        session.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_messages_external_id "
+                "ON messages (external_id)"
+            )
+        )
+        session.commit()
+
+    @staticmethod
+    def recent_external_ids(session: Session, limit: int) -> List[str]:
+        rows = (
+            session.query(Message.external_id)
+            .filter(Message.external_id.isnot(None))
+            .order_by(Message.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in reversed(rows)]
+
+    @staticmethod
+    def is_stored(session: Session, external_id: str) -> bool:
+        return (
+            session.query(Message.id)
+            .filter(Message.external_id == external_id)
+            .first()
+            is not None
+        )
 
     @staticmethod
     def create(
@@ -33,7 +74,12 @@ class Message(Base_sqlite):
         user_phone: str,
         content: Optional[str] = None,
         timestamp: Optional[datetime] = None,
-    ) -> "Message":
+        external_id: Optional[str] = None,
+    ) -> Optional["Message"]:
+        """
+        Inserts a message. Returns None when ``external_id`` was already
+        stored, so a redelivered event is not saved twice.
+        """
         msg = Message(
             client_id=client_id,
             client_phone=client_phone,
@@ -43,8 +89,17 @@ class Message(Base_sqlite):
             type=type_,
             content=content,
             timestamp=timestamp or datetime.now(timezone.utc),
+            external_id=external_id or None,
         )
         session.add(msg)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            # Solo un external_id ya guardado es un reenvío; cualquier otra
+            # restricción (NOT NULL, otra clave única) es un error real
+            if external_id is None or not Message.is_stored(session, external_id):
+                raise
+            return None
         session.refresh(msg)
         return msg
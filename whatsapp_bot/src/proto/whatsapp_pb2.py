@@ -19,7 +19,7 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x0ewhatsapp.proto\x12\x08whatsapp"\x07\n\x05\x45mpty"y\n\x0cMessageEvent\x12\x0c\n\x04\x66rom\x18\x01 \x01(\t\x12\n\n\x02to\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x0c\n\x04text\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x0e\n\x06\x62inary\x18\x06 \x01(\x0c\x12\x10\n\x08\x66ilename\x18\x07 \x01(\t".\n\x0eQRCodeResponse\x12\x0c\n\x04\x63ode\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t"[\n\x0bSendRequest\x12\n\n\x02to\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\x10\n\x08\x66rom_jid\x18\x03 \x01(\t\x12\x0e\n\x06\x62inary\x18\x04 \x01(\x0c\x12\x10\n\x08\x66ilename\x18\x05 \x01(\t".\n\x0cSendResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t"\x19\n\nDeviceInfo\x12\x0b\n\x03jid\x18\x01 \x01(\t"3\n\nDeviceList\x12%\n\x07\x64\x65vices\x18\x01 \x03(\x0b\x32\x14.whatsapp.DeviceInfo"\x17\n\x08\x44\x65viceID\x12\x0b\n\x03jid\x18\x01 \x01(\t"0\n\x0eStatusResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t2\xf7\x02\n\x0fWhatsAppService\x12;\n\x0eStreamMessages\x12\x0f.whatsapp.Empty\x1a\x16.whatsapp.MessageEvent0\x01\x12\x37\n\nStartLogin\x12\x0f.whatsapp.Empty\x1a\x18.whatsapp.QRCodeResponse\x12<\n\x0bSendMessage\x12\x15.whatsapp.SendRequest\x1a\x16.whatsapp.SendResponse\x12\x34\n\x0bListDevices\x12\x0f.whatsapp.Empty\x1a\x14.whatsapp.DeviceList\x12<\n\x0cLogoutDevice\x12\x12.whatsapp.DeviceID\x1a\x18.whatsapp.StatusResponse\x12<\n\x0c\x44\x65leteDevice\x12\x12.whatsapp.DeviceID\x1a\x18.whatsapp.StatusResponseB\tZ\x07./protob\x06proto3'
+    b'\n\x0ewhatsapp.proto\x12\x08whatsapp"\x07\n\x05\x45mpty"\x9a\x01\n\x0cMessageEvent\x12\x0c\n\x04\x66rom\x18\x01 \x01(\t\x12\n\n\x02to\x18\x02 \x01(\t\x12\x0c\n\x04name\x18\x03 \x01(\t\x12\x0c\n\x04text\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x0e\n\x06\x62inary\x18\x06 \x01(\x0c\x12\x10\n\x08\x66ilename\x18\x07 \x01(\t\x12\x0b\n\x03seq\x18\x08 \x01(\x04\x12\x12\n\nmessage_id\x18\t \x01(\t".\n\x0eQRCodeResponse\x12\x0c\n\x04\x63ode\x18\x01 \x01(\t\x12\x0e\n\x06status\x18\x02 \x01(\t"[\n\x0bSendRequest\x12\n\n\x02to\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\x10\n\x08\x66rom_jid\x18\x03 \x01(\t\x12\x0e\n\x06\x62inary\x18\x04 \x01(\x0c\x12\x10\n\x08\x66ilename\x18\x05 \x01(\t".\n\x0cSendResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t"\x19\n\nDeviceInfo\x12\x0b\n\x03jid\x18\x01 \x01(\t"3\n\nDeviceList\x12%\n\x07\x64\x65vices\x18\x01 \x03(\x0b\x32\x14.whatsapp.DeviceInfo"\x17\n\x08\x44\x65viceID\x12\x0b\n\x03jid\x18\x01 \x01(\t"0\n\x0eStatusResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t""\n\rStreamRequest\x12\x11\n\tafter_seq\x18\x01 \x01(\x04\x32\xff\x02\n\x0fWhatsAppService\x12\x43\n\x0eStreamMessages\x12\x17.whatsapp.StreamRequest\x1a\x16.whatsapp.MessageEvent0\x01\x12\x37\n\nStartLogin\x12\x0f.whatsapp.Empty\x1a\x18.whatsapp.QRCodeResponse\x12<\n\x0bSendMessage\x12\x15.whatsapp.SendRequest\x1a\x16.whatsapp.SendResponse\x12\x34\n\x0bListDevices\x12\x0f.whatsapp.Empty\x1a\x14.whatsapp.DeviceList\x12<\n\x0cLogoutDevice\x12\x12.whatsapp.DeviceID\x1a\x18.whatsapp.StatusResponse\x12<\n\x0c\x44\x65leteDevice\x12\x12.whatsapp.DeviceID\x1a\x18.whatsapp.StatusResponseB\tZ\x07./protob\x06proto3'
 )
 
 _globals = globals()
@@ -30,22 +30,24 @@ if not _descriptor._USE_C_DESCRIPTORS:
     _globals["DESCRIPTOR"]._serialized_options = b"Z\007./proto"
     _globals["_EMPTY"]._serialized_start = 28
     _globals["_EMPTY"]._serialized_end = 35
-    _globals["_MESSAGEEVENT"]._serialized_start = 37
-    _globals["_MESSAGEEVENT"]._serialized_end = 158
-    _globals["_QRCODERESPONSE"]._serialized_start = 160
-    _globals["_QRCODERESPONSE"]._serialized_end = 206
-    _globals["_SENDREQUEST"]._serialized_start = 208
-    _globals["_SENDREQUEST"]._serialized_end = 299
-    _globals["_SENDRESPONSE"]._serialized_start = 301
-    _globals["_SENDRESPONSE"]._serialized_end = 347
-    _globals["_DEVICEINFO"]._serialized_start = 349
-    _globals["_DEVICEINFO"]._serialized_end = 374
-    _globals["_DEVICELIST"]._serialized_start = 376
-    _globals["_DEVICELIST"]._serialized_end = 427
-    _globals["_DEVICEID"]._serialized_start = 429
-    _globals["_DEVICEID"]._serialized_end = 452
-    _globals["_STATUSRESPONSE"]._serialized_start = 454
-    _globals["_STATUSRESPONSE"]._serialized_end = 502
-    _globals["_WHATSAPPSERVICE"]._serialized_start = 505
-    _globals["_WHATSAPPSERVICE"]._serialized_end = 880
+    _globals["_MESSAGEEVENT"]._serialized_start = 38
+    _globals["_MESSAGEEVENT"]._serialized_end = 192
+    _globals["_QRCODERESPONSE"]._serialized_start = 194
+    _globals["_QRCODERESPONSE"]._serialized_end = 240
+    _globals["_SENDREQUEST"]._serialized_start = 242
+    _globals["_SENDREQUEST"]._serialized_end = 333
+    _globals["_SENDRESPONSE"]._serialized_start = 335
+    _globals["_SENDRESPONSE"]._serialized_end = 381
+    _globals["_DEVICEINFO"]._serialized_start = 383
+    _globals["_DEVICEINFO"]._serialized_end = 408
+    _globals["_DEVICELIST"]._serialized_start = 410
+    _globals["_DEVICELIST"]._serialized_end = 461
+    _globals["_DEVICEID"]._serialized_start = 463
+    _globals["_DEVICEID"]._serialized_end = 486
+    _globals["_STATUSRESPONSE"]._serialized_start = 488
+    _globals["_STATUSRESPONSE"]._serialized_end = 536
+    _globals["_STREAMREQUEST"]._serialized_start = 538
+    _globals["_STREAMREQUEST"]._serialized_end = 572
+    _globals["_WHATSAPPSERVICE"]._serialized_start = 575
+    _globals["_WHATSAPPSERVICE"]._serialized_end = 958
 # @@protoc_insertion_point(module_scope)
@@ -39,7 +39,7 @@ class WhatsAppServiceStub(object):
         """
         self.StreamMessages = channel.unary_stream(
             "/whatsapp.WhatsAppService/StreamMessages",
-            request_serializer=whatsapp__pb2.Empty.SerializeToString,
+            request_serializer=whatsapp__pb2.StreamRequest.SerializeToString,
             response_deserializer=whatsapp__pb2.MessageEvent.FromString,
             _registered_method=True,
         )
@@ -119,7 +119,7 @@ def add_WhatsAppServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
         "StreamMessages": grpc.unary_stream_rpc_method_handler(
             servicer.StreamMessages,
-            request_deserializer=whatsapp__pb2.Empty.FromString,
+            request_deserializer=whatsapp__pb2.StreamRequest.FromString,
             response_serializer=whatsapp__pb2.MessageEvent.SerializeToString,
         ),
         "StartLogin": grpc.unary_unary_rpc_method_handler(
@@ -178,7 +178,7 @@ class WhatsAppService(object):
             request,
             target,
             "/whatsapp.WhatsAppService/StreamMessages",
-            whatsapp__pb2.Empty.SerializeToString,
+            whatsapp__pb2.StreamRequest.SerializeToString,
             whatsapp__pb2.MessageEvent.FromString,
             options,
             channel_credentials,
@@ -0,0 +1,40 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+DEDUP_CACHE_SIZE = int(os.getenv("DEDUP_CACHE_SIZE", 10000))
+
+
+class SeenMessages:
+    """
+    Bounded LRU set of recently ingested message IDs. Answers "already seen?"
+    in O(1) without touching the database; the unique index on
+    ``messages.external_id`` stays the source of truth for older IDs.
+    """
+
+    def __init__(self, max_size: int = DEDUP_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, message_id: str) -> bool:
+        with self._lock:
+            if message_id in self._ids:
+                self._ids.move_to_end(message_id)
+                return True
+            return False
+
+    def add(self, message_id: str):
+        with self._lock:
+            self._ids[message_id] = None
+            self._ids.move_to_end(message_id)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def update(self, message_ids: Iterable[str]):
+        for message_id in message_ids:
+            self.add(message_id)
+
+    def __len__(self) -> int:
+        return len(self._ids)
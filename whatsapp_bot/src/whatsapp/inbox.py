@@ -0,0 +1,191 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from src.proto.whatsapp_pb2 import MessageEvent
+
+INBOX_PATH = os.getenv("INBOX_PATH", "./inbox.sqlite3")
+# 0: uno más que los trabajos de extracción admitidos (ver inbox_worker_count)
+INBOX_WORKERS = int(os.getenv("INBOX_WORKERS", 0))
+INBOX_MAX_ATTEMPTS = int(os.getenv("INBOX_MAX_ATTEMPTS", 5))
+INBOX_RETRY_BASE = float(os.getenv("INBOX_RETRY_BASE", 5))
+INBOX_RETRY_MAX = float(os.getenv("INBOX_RETRY_MAX", 300))
+INBOX_KEEP_DONE_HOURS = float(os.getenv("INBOX_KEEP_DONE_HOURS", 24))
+
+
+def chat_key(msg: MessageEvent) -> str:
+    """
+    Same key for both directions of a conversation, so its events are
+    processed in order even with several workers.
+    """
+    sender = getattr(msg, "from").split("@")[0].split(":")[0]
+    receiver = msg.to.split("@")[0].split(":")[0]
+    return "|".join(sorted((sender, receiver)))
+
+
+class MessageInbox:
+    """
+    Disk-backed queue between the stream reader and the processors.
+
+    The reader stores every event before advancing the stream cursor;
+    processors claim events, and only acknowledge them once handled. Events
+    claimed by a process that crashed are returned to the queue on the next
+    start, so delivery is at least once.
+    """
+
+    def __init__(self, path: str = INBOX_PATH, max_attempts: int = INBOX_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                seq INTEGER,
+                message_id TEXT,
+                chat TEXT NOT NULL,
+                event BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error TEXT,
+                created REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_inbox_due ON inbox (status, next_attempt)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_inbox_chat ON inbox (chat)")
+        # Un reenvío del servidor que aún está en la cola no se duplica
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_inbox_message_id "
+            "ON inbox (message_id) WHERE message_id IS NOT NULL"
+        )
+        self._conn.commit()
+
+    def put(self, msg: MessageEvent) -> bool:
+        """
+        Stores an event durably. Returns False if it was already queued.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO inbox "
+                "(seq, message_id, chat, event, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    msg.seq or None,
+                    msg.message_id or None,
+                    chat_key(msg),
+                    msg.SerializeToString(),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def claim(self) -> Optional[Tuple[int, MessageEvent]]:
+        """
+        Takes the oldest due event whose conversation has no earlier event
+        still unfinished, or returns None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, event FROM inbox "
+                "WHERE status = 'pending' AND next_attempt <= ? "
+                # Un evento anterior de la conversación, en curso o esperando
+                # reintento, la bloquea: el orden se mantiene tras un fail()
+                "AND NOT EXISTS (SELECT 1 FROM inbox o WHERE o.chat = inbox.chat "
+                "AND o.id < inbox.id AND o.status IN ('pending', 'processing')) "
+                "AND chat NOT IN (SELECT chat FROM inbox WHERE status = 'processing') "
+                "ORDER BY id LIMIT 1",
+                (time.time(),),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE inbox SET status = 'processing' WHERE id = ?", (row[0],)
+            )
+            self._conn.commit()
+        return row[0], MessageEvent.FromString(row[1])
+
+    def ack(self, entry_id: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE inbox SET status = 'done', event = x'', last_error = NULL "
+                "WHERE id = ?",
+                (entry_id,),
+            )
+            self._conn.commit()
+        # Puede haber eventos de la misma conversación esperando
+        self._wakeup.set()
+
+    def fail(self, entry_id: int, error: Exception):
+        with self._lock:
+            attempts = self._conn.execute(
+                "SELECT attempts FROM inbox WHERE id = ?", (entry_id,)
+            ).fetchone()[0] + 1
+            if attempts >= self.max_attempts:
+                status, next_attempt = "failed", time.time()
+                logging.error(
+                    f"Inbox event {entry_id} failed after {attempts} attempts: {error}"
+                )
+            else:
+                delay = min(INBOX_RETRY_MAX, INBOX_RETRY_BASE * 2 ** (attempts - 1))
+                status, next_attempt = "pending", time.time() + delay
+                logging.warning(
+                    f"Inbox event {entry_id} attempt {attempts} failed, "
+                    f"retrying in {delay:.0f}s: {error}"
+                )
+            self._conn.execute(
+                "UPDATE inbox SET status = ?, attempts = ?, next_attempt = ?, "
+                "last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt, str(error), entry_id),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+
+    def recover(self) -> int:
+        """
+        Returns to the queue the events left in 'processing' by a previous
+        run that did not finish them. Call before starting the processors.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE inbox SET status = 'pending' WHERE status = 'processing'"
+            )
+            self._conn.commit()
+        if cursor.rowcount:
+            logging.warning(f"Inbox: {cursor.rowcount} interrupted events requeued")
+        return cursor.rowcount
+
+    def purge(self, keep_hours: float = INBOX_KEEP_DONE_HOURS):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM inbox WHERE status = 'done' AND created < ?",
+                (time.time() - keep_hours * 3600,),
+            )
+            self._conn.commit()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM inbox WHERE status IN ('pending', 'processing')"
+            ).fetchone()[0]
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Blocks until an event is queued or released, or ``timeout`` expires.
+        """
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
@@ -1,26 +1,30 @@
 import os
 import logging
+import random
+import threading
+import time
 import grpc
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from src.proto.whatsapp_pb2 import Empty, MessageEvent
+from src.proto.whatsapp_pb2 import MessageEvent, StreamRequest
 from src.core.database import get_sqlserver_session, get_sqlite_session
 from src.grpc.handlers import send_message, delete_device, login_and_send_qr
 from src.ai.agent import handle_incoming_message
-from src.media.ocr import extract_text_from_image
-from src.media.audio import transcribe_audio
-from src.media.documents import (
-    extract_text_from_csv,
-    extract_text_from_docx,
-    extract_text_from_pdf,
-    extract_text_from_txt,
-    extract_text_from_xlsx,
-)
+from src.media.extractors import TRANSIENT_ERRORS, get_extractor_registry
+from src.media.store import MediaStore, get_media_store
+from src.whatsapp.dedup import DEDUP_CACHE_SIZE, SeenMessages
+from src.whatsapp.inbox import INBOX_WORKERS, MessageInbox
 from src.models.user import User
 from src.models.message import Message
 from src.models.client import Cliente
 
+# Último evento procesado: al reconectar, el servidor reenvía lo posterior
+STREAM_CURSOR_PATH = os.getenv("STREAM_CURSOR_PATH", "./stream_cursor")
+STREAM_RETRY_BASE = float(os.getenv("STREAM_RETRY_BASE", 1))
+STREAM_RETRY_MAX = float(os.getenv("STREAM_RETRY_MAX", 60))
+INBOX_POLL_SECONDS = 1.0
+
 
 def normalize_number(raw):
     return raw.split(":")[0].lstrip("+")
@@ -126,46 +130,159 @@ def handle_admin_command(
     return True
 
 
+def load_stream_cursor(path: str = STREAM_CURSOR_PATH) -> int:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def save_stream_cursor(seq: int, path: str = STREAM_CURSOR_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(seq))
+    os.replace(tmp_path, path)
+
+
+def inbox_worker_count() -> int:
+    """
+    Processors waiting on media extraction block until it ends, so by default
+    there is one more than the extraction jobs the pools accept: a burst of
+    one media type cannot hold every processor while others wait.
+    """
+    return INBOX_WORKERS or get_extractor_registry().capacity() + 1
+
+
 def stream_messages(stub):
-    logging.info("Connecting to WhatsApp message stream...")
-    base_dir = "media"
-    os.makedirs(base_dir, exist_ok=True)
+    """
+    Reads the message stream forever into the durable inbox, which
+    inbox_worker_count() processor threads drain. When the stream breaks it
+    reconnects with jittered exponential backoff, asking the server to replay
+    every event after the last one stored.
+    """
+    media_store = get_media_store()
+    media_store.start_compaction()
+
+    # IDs ya guardados: un reenvío tras reconectar se descarta sin ir a la base
+    sqlite_session = get_sqlite_session()
+    try:
+        Message.ensure_schema(sqlite_session)
+        seen = SeenMessages()
+        seen.update(Message.recent_external_ids(sqlite_session, DEDUP_CACHE_SIZE))
+    finally:
+        sqlite_session.close()
 
+    inbox = MessageInbox()
+    inbox.recover()
+    workers = inbox_worker_count()
+    logging.info(f"Starting {workers} inbox processors")
+    for n in range(workers):
+        threading.Thread(
+            target=process_inbox,
+            args=(stub, inbox, media_store, seen),
+            name=f"inbox-{n}",
+            daemon=True,
+        ).start()
+
+    cursor = load_stream_cursor()
+    attempts = 0
+
+    while True:
+        logging.info(f"Connecting to WhatsApp message stream (after {cursor})...")
+        try:
+            for msg in stub.StreamMessages(StreamRequest(after_seq=cursor)):
+                attempts = 0
+                inbox.put(msg)
+                # El cursor avanza cuando el evento ya está en disco
+                if msg.seq:
+                    cursor = msg.seq
+                    save_stream_cursor(cursor)
+            logging.warning("gRPC stream closed by server")
+        except grpc.RpcError as e:
+            logging.error(f"gRPC stream error: {e.code().name} - {e.details()}")
+
+        attempts += 1
+        delay = min(STREAM_RETRY_MAX, STREAM_RETRY_BASE * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1)
+        logging.info(f"Reconnecting to message stream in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def process_inbox(
+    stub, inbox: MessageInbox, media_store: MediaStore, seen: SeenMessages
+):
+    """
+    Processor loop: claims events from the inbox and acknowledges each one
+    only after it has been handled.
+    """
     sqlserver_session = get_sqlserver_session()
     sqlite_session = get_sqlite_session()
 
+    last_purge = time.time()
+
     try:
+        while True:
+            claimed = inbox.claim()
+            if claimed is None:
+                inbox.wait(INBOX_POLL_SECONDS)
+                if time.time() - last_purge > 3600:
+                    inbox.purge()
+                    last_purge = time.time()
+                continue
 
-        for msg in stub.StreamMessages(Empty()):
-            sender = getattr(msg, "from").split("@")[0].split(":")[0]
-            receiver = msg.to.split(":")[0]
-            sender_norm = normalize_number(sender)
-            receiver_norm = normalize_number(receiver)
+            entry_id, msg = claimed
+            try:
+                process_stream_message(
+                    msg, stub, sqlite_session, sqlserver_session, media_store, seen
+                )
+            except Exception as e:
+                sqlite_session.rollback()
+                sqlserver_session.rollback()
+                inbox.fail(entry_id, e)
+                continue
+            inbox.ack(entry_id)
+    finally:
+        sqlserver_session.close()
+        sqlite_session.close()
 
-            logging.info(f"New message: {sender} → {receiver} ({msg.timestamp})")
 
-            if handle_admin_command(
-                msg, sender_norm, receiver_norm, stub, sqlite_session
-            ):
-                continue
+def process_stream_message(
+    msg: MessageEvent,
+    stub,
+    sqlite_session: Session,
+    sqlserver_session: Session,
+    media_store: MediaStore,
+    seen: SeenMessages,
+):
+    if msg.message_id and msg.message_id in seen:
+        logging.info(f"Duplicate message {msg.message_id} ignored")
+        return
 
-            store_message_if_applicable(
-                msg, sender, receiver, sqlite_session, sqlserver_session, base_dir
-            )
+    sender = getattr(msg, "from").split("@")[0].split(":")[0]
+    receiver = msg.to.split(":")[0]
+    sender_norm = normalize_number(sender)
+    receiver_norm = normalize_number(receiver)
 
-            if msg.text.strip():
-                logging.info(f"Message content: {msg.text.strip()}")
-            elif msg.binary:
-                logging.info(
-                    f"Binary message received with filename: {msg.filename or 'unnamed_file'}"
-                )
+    logging.info(f"New message: {sender} → {receiver} ({msg.timestamp})")
 
-    except grpc.RpcError as e:
-        logging.error(f"gRPC stream error: {e.code().name} - {e.details()}")
+    if handle_admin_command(msg, sender_norm, receiver_norm, stub, sqlite_session):
+        if msg.message_id:
+            seen.add(msg.message_id)
+        return
 
-    finally:
-        sqlserver_session.close()
-        sqlite_session.close()
+    store_message_if_applicable(
+        msg, sender, receiver, sqlite_session, sqlserver_session, media_store
+    )
+    if msg.message_id:
+        seen.add(msg.message_id)
+
+    if msg.text.strip():
+        logging.info(f"Message content: {msg.text.strip()}")
+    elif msg.binary:
+        logging.info(
+            f"Binary message received with filename: {msg.filename or 'unnamed_file'}"
+        )
 
 
 def store_message_if_applicable(
@@ -174,7 +291,7 @@ def store_message_if_applicable(
     receiver,
     sqlite_session: Session,
     sqlserver_session: Session,
-    base_dir: str,
+    media_store: MediaStore,
 ):
     direction = None
     matched_cliente = Cliente.get_by_telefono(sqlserver_session, sender)
@@ -199,57 +316,31 @@ def store_message_if_applicable(
     if msg.binary:
         message_type = "media"
         filename = msg.filename or f"file_{msg.timestamp}.bin"
-        ext = os.path.splitext(filename)[1].lower()
-
-        subdir = (
-            "images"
-            if ext in [".jpg", ".jpeg", ".png", ".webp"]
-            else (
-                "audio"
-                if ext in [".mp3", ".ogg", ".wav", ".opus"]
-                else "video" if ext in [".mp4", ".avi", ".mkv"] else "documents"
-            )
-        )
-
-        full_dir = os.path.join(base_dir, subdir)
-        os.makedirs(full_dir, exist_ok=True)
-        file_path = os.path.join(full_dir, filename)
 
+        file_path = None
         try:
-            with open(file_path, "wb") as f:
-                f.write(msg.binary)
-            logging.info(f"Saved media file: {file_path}")
-
-            if subdir == "images":
-                text = extract_text_from_image(msg.binary)
-                if text:
-                    content = text
-                    message_type = "text"
-            elif subdir == "audio":
-                text = transcribe_audio(msg.binary, extension=ext)
-                if text:
-                    content = text
-                    message_type = "text"
-            elif subdir == "documents":
-                text = None
-                if ext == ".pdf":
-                    text = extract_text_from_pdf(file_path)
-                elif ext == ".docx":
-                    text = extract_text_from_docx(file_path)
-                elif ext == ".txt":
-                    text = extract_text_from_txt(file_path)
-                elif ext == ".csv":
-                    text = extract_text_from_csv(file_path)
-                elif ext == ".xlsx":
-                    text = extract_text_from_xlsx(file_path)
-
-                if text and text.strip():
-                    content = text.strip()
-                    message_type = "text"
+            file_path = media_store.put(
+                msg.binary, filename, when=parse_flexible_timestamp(msg.timestamp)
+            )
         except Exception as e:
             logging.error(f"Error saving media: {e}")
 
-    Message.create(
+        text = None
+        if file_path:
+            try:
+                text = get_extractor_registry().extract(
+                    msg.binary, filename, file_path
+                )
+            except TRANSIENT_ERRORS:
+                # Saturación pasajera: el inbox reintenta el evento más tarde
+                raise
+            except Exception as e:
+                logging.error(f"Error extracting media text: {e}")
+        if text and text.strip():
+            content = text.strip()
+            message_type = "text"
+
+    stored = Message.create(
         session=sqlite_session,
         client_id=matched_id,
         client_phone=receiver if direction == "sent" else sender,
@@ -259,7 +350,10 @@ def store_message_if_applicable(
         user_id=user.id,
         user_phone=sender if direction == "sent" else receiver,
         timestamp=parse_flexible_timestamp(msg.timestamp),
+        external_id=msg.message_id,
     )
+    if stored is None:
+        logging.info(f"Message {msg.message_id} already stored, skipped")
     return matched_id, direction, message_type
 
 
@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.ai.batching import MicroBatcher
+
+
+class RecordingBatch:
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail:
+            raise self.fail
+        return [f"r:{item}" for item in items]
+
+
+def test_flushes_when_batch_is_full():
+    batch_fn = RecordingBatch()
+    # Ventana larga: solo el tamaño puede cerrar el lote a tiempo
+    batcher = MicroBatcher(batch_fn, max_batch=4, max_wait=30)
+    futures = [batcher.submit(i) for i in range(4)]
+
+    assert [f.result(timeout=5) for f in futures] == ["r:0", "r:1", "r:2", "r:3"]
+    assert batch_fn.batches == [[0, 1, 2, 3]]
+
+
+def test_flushes_when_window_expires():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher(batch_fn, max_batch=8, max_wait=0.05)
+
+    start = time.monotonic()
+    assert batcher("solo", timeout=5) == "r:solo"
+    assert 0.04 < time.monotonic() - start < 2
+    assert batch_fn.batches == [["solo"]]
+
+
+def test_each_caller_gets_its_own_result():
+    batch_fn = RecordingBatch()
+    batcher = MicroBatcher(batch_fn, max_batch=5, max_wait=0.05)
+    barrier = threading.Barrier(20)
+
+    def call(i):
+        barrier.wait()
+        return batcher(i, timeout=5)
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(call, range(20)))
+
+    assert results == [f"r:{i}" for i in range(20)]
+    assert all(len(batch) <= 5 for batch in batch_fn.batches)
+    assert sorted(i for batch in batch_fn.batches for i in batch) == list(range(20))
+
+
+def test_backend_error_reaches_every_waiter():
+    error = ConnectionError("ollama down")
+    batcher = MicroBatcher(RecordingBatch(fail=error), max_batch=3, max_wait=30)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+
+
+def test_short_result_list_fails_the_rest():
+    batcher = MicroBatcher(lambda items: ["only one"], max_batch=3, max_wait=30)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    assert futures[0].result(timeout=5) == "only one"
+    for future in futures[1:]:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_batcher_keeps_running_after_an_error():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise TimeoutError("slow")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch=1, max_wait=0)
+    with pytest.raises(TimeoutError):
+        batcher("a", timeout=5)
+    assert batcher("b", timeout=5) == "b"
@@ -0,0 +1,19 @@
+from src.whatsapp.dedup import SeenMessages
+
+
+def test_remembers_added_ids():
+    seen = SeenMessages(max_size=3)
+    seen.update(["a", "b"])
+    assert "a" in seen
+    assert "c" not in seen
+
+
+def test_evicts_least_recently_used():
+    seen = SeenMessages(max_size=2)
+    seen.update(["a", "b"])
+    assert "a" in seen  # "a" pasa a ser el más reciente
+    seen.add("c")
+
+    assert len(seen) == 2
+    assert "b" not in seen
+    assert "a" in seen and "c" in seen
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from openpyxl import Workbook
+from reportlab.pdfgen import canvas
+
+from src.media.documents import (
+    extract_text_from_csv,
+    extract_text_from_pdf,
+    extract_text_from_xlsx,
+    rows_to_text,
+)
+
+
+def write_pdf(path, pages):
+    pdf = canvas.Canvas(str(path))
+    for lines in pages:
+        for row, line in enumerate(lines):
+            pdf.drawString(72, 760 - 16 * row, line)
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+ORDER = ["Pedido", "Código Cantidad", "KG000001 2", "KG000002 5"]
+# Continuación de la tabla: solo códigos y cantidades, sin indicios de pedido
+CONTINUATION = ["KG000003 1", "KG000004 7"]
+CATALOG = ["Catálogo de temporada", "Sérum vitamina C 12,50"]
+
+
+def test_pdf_keeps_continuation_pages_until_order_end(tmp_path):
+    path = write_pdf(
+        tmp_path / "pedido.pdf",
+        [ORDER, CONTINUATION, CONTINUATION + ["Total pedido: 15"], CATALOG],
+    )
+
+    text = extract_text_from_pdf(path)
+    assert text.count("KG000003") == 2
+    assert "Total pedido" in text
+    assert "Catálogo" not in text
+
+
+def test_pdf_without_end_marker_reads_up_to_page_cap(tmp_path):
+    path = write_pdf(tmp_path / "pedido.pdf", [ORDER] + [CONTINUATION] * 4)
+
+    assert extract_text_from_pdf(path).count("KG000004") == 4
+    assert extract_text_from_pdf(path, max_pages=3).count("KG000004") == 2
+
+
+def test_rows_to_text_keeps_order_columns_and_stops_after_blank_row():
+    rows = [
+        ["Pedido semana 12", "", ""],
+        ["", "", ""],
+        ["Descripción", "Código", "Cantidad"],
+        ["Sérum", "KG000001", "2"],
+        ["Gel", "KG000002"],  # fila corta: sin cantidad
+        ["", "", ""],
+        ["Total", "", "7"],
+    ]
+    assert rows_to_text(rows) == (
+        "Pedido semana 12\nCódigo  Cantidad\nKG000001  2\nKG000002"
+    )
+
+
+def test_rows_to_text_row_and_byte_caps():
+    rows = ([f"KG{i:06d}", str(i)] for i in range(10_000))
+    assert rows_to_text(rows, max_rows=3).splitlines() == [
+        "KG000000  0",
+        "KG000001  1",
+        "KG000002  2",
+    ]
+    capped = rows_to_text(([f"KG{i:06d}", "1"] for i in range(100)), max_bytes=40)
+    assert capped.splitlines() == ["KG000000  1", "KG000001  1", "KG000002  1"]
+
+
+def test_xlsx_mixed_cell_types(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Ref", "Uds", "Fecha"])
+    sheet.append(["KG000001", 2.0, datetime(2026, 3, 1)])
+    sheet.append([1234, 1.5, None])
+    sheet.append([None, None, None])
+    sheet.append(["KG000009", 9, None])
+    path = tmp_path / "pedido.xlsx"
+    workbook.save(path)
+
+    assert extract_text_from_xlsx(str(path)) == "Ref  Uds\nKG000001  2\n1234  1.5"
+
+
+def test_csv_semicolon_and_empty_rows(tmp_path):
+    path = tmp_path / "pedido.csv"
+    path.write_text(
+        "﻿cliente;Ana\n\nCódigo;Cantidad\nKG000001; 3 \n;\nKG000002;4\n",
+        encoding="utf-8",
+    )
+    assert extract_text_from_csv(str(path)) == (
+        "cliente  Ana\nCódigo  Cantidad\nKG000001  3"
+    )
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from src.media.extractors import TRANSIENT_ERRORS, ExtractorRegistry, QueueFullError
+
+
+def blocking_registry(started, release, timeout: float = 5):
+    """
+    Registry whose only image worker holds every job until ``release``.
+    """
+
+    def handler(data, path, ext):
+        started.set()
+        release.wait(5)
+        return "KG000001 2"
+
+    registry = ExtractorRegistry()
+    registry.add_pool("image", workers=1, max_queue=0, timeout=timeout)
+    registry.register("ocr", handler, "image", extensions=[".jpg"])
+    return registry
+
+
+def test_full_queue_raises_instead_of_dropping_text():
+    started, release = threading.Event(), threading.Event()
+    registry = blocking_registry(started, release)
+    running = threading.Thread(
+        target=registry.extract, args=(b"a", "a.jpg", "/tmp/a.jpg")
+    )
+    running.start()
+    assert started.wait(5)
+    try:
+        with pytest.raises(QueueFullError):
+            registry.extract(b"b", "b.jpg", "/tmp/b.jpg")
+    finally:
+        release.set()
+        running.join()
+    assert registry.extract(b"b", "b.jpg", "/tmp/b.jpg") == "KG000001 2"
+
+
+def test_timeout_raises_instead_of_dropping_text():
+    release = threading.Event()
+    registry = blocking_registry(threading.Event(), release, timeout=0.05)
+    try:
+        with pytest.raises(TRANSIENT_ERRORS):
+            registry.extract(b"a", "a.jpg", "/tmp/a.jpg")
+    finally:
+        release.set()
+
+
+def test_unknown_type_has_no_text():
+    registry = blocking_registry(threading.Event(), threading.Event())
+    assert registry.extract(b"x", "x.zip", "/tmp/x.zip") is None
@@ -0,0 +1,31 @@
+import time
+
+import grpc
+import pytest
+
+from src.grpc import channel
+from src.proto.whatsapp_pb2 import Empty, SendRequest
+from src.proto.whatsapp_pb2_grpc import WhatsAppServiceStub
+
+
+def test_unary_calls_have_a_deadline():
+    configs = channel.service_config()["methodConfig"]
+    methods = {name["method"] for config in configs for name in config["name"]}
+    assert "StreamMessages" not in methods
+    assert all(config["timeout"].endswith("s") for config in configs)
+
+
+@pytest.mark.parametrize(
+    "method, request_",
+    [("ListDevices", Empty()), ("SendMessage", SendRequest(to="5491100000001"))],
+)
+def test_call_to_stopped_server_ends(monkeypatch, method, request_):
+    monkeypatch.setattr(channel, "GRPC_CALL_TIMEOUT", 1)
+    # Puerto sin servidor: waitForReady esperaría para siempre sin plazo
+    stub = WhatsAppServiceStub(channel.create_channel("127.0.0.1", 1))
+
+    start = time.monotonic()
+    with pytest.raises(grpc.RpcError) as error:
+        getattr(stub, method)(request_)
+    assert error.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert time.monotonic() - start < 10
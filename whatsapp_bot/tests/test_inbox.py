@@ -0,0 +1,82 @@
+from src.proto.whatsapp_pb2 import MessageEvent
+from src.whatsapp.inbox import MessageInbox
+
+
+def event(message_id, sender="5491100000001", text="hola"):
+    msg = MessageEvent(to="5491199999999@s.whatsapp.net", text=text)
+    setattr(msg, "from", f"{sender}@s.whatsapp.net")
+    msg.message_id = message_id
+    return msg
+
+
+def test_put_ignores_redelivered_event(tmp_path):
+    inbox = MessageInbox(str(tmp_path / "inbox.db"))
+    assert inbox.put(event("m1"))
+    assert not inbox.put(event("m1"))
+    assert inbox.pending() == 1
+
+
+def test_claim_keeps_chat_order_and_runs_other_chats(tmp_path):
+    inbox = MessageInbox(str(tmp_path / "inbox.db"))
+    inbox.put(event("a1", sender="1"))
+    inbox.put(event("a2", sender="1"))
+    inbox.put(event("b1", sender="2"))
+
+    first, msg = inbox.claim()
+    assert msg.message_id == "a1"
+    # a2 espera a a1; otra conversación puede avanzar
+    _, msg = inbox.claim()
+    assert msg.message_id == "b1"
+    assert inbox.claim() is None
+
+    inbox.ack(first)
+    _, msg = inbox.claim()
+    assert msg.message_id == "a2"
+
+
+def test_failed_event_blocks_its_chat_until_retried(tmp_path):
+    inbox = MessageInbox(str(tmp_path / "inbox.db"))
+    inbox.put(event("m1"))
+    inbox.put(event("m2"))
+
+    entry_id, _ = inbox.claim()
+    inbox.fail(entry_id, RuntimeError("grpc down"))
+    # m1 espera su reintento; m2 no puede adelantarse
+    assert inbox.claim() is None
+
+    inbox._conn.execute("UPDATE inbox SET next_attempt = 0 WHERE id = ?", (entry_id,))
+    retried, msg = inbox.claim()
+    assert (retried, msg.message_id) == (entry_id, "m1")
+
+
+def test_event_gives_up_after_max_attempts(tmp_path):
+    inbox = MessageInbox(str(tmp_path / "inbox.db"), max_attempts=2)
+    inbox.put(event("m1"))
+    inbox.put(event("m2"))
+
+    for _ in range(2):
+        inbox._conn.execute("UPDATE inbox SET next_attempt = 0")
+        entry_id, msg = inbox.claim()
+        assert msg.message_id == "m1"
+        inbox.fail(entry_id, RuntimeError("boom"))
+
+    # Un evento descartado ya no retiene la conversación
+    _, msg = inbox.claim()
+    assert msg.message_id == "m2"
+    status, attempts = inbox._conn.execute(
+        "SELECT status, attempts FROM inbox WHERE id = ?", (entry_id,)
+    ).fetchone()
+    assert (status, attempts) == ("failed", 2)
+
+
+def test_recover_requeues_interrupted_events(tmp_path):
+    path = str(tmp_path / "inbox.db")
+    inbox = MessageInbox(path)
+    inbox.put(event("m1"))
+    assert inbox.claim() is not None
+
+    restarted = MessageInbox(path)
+    assert restarted.claim() is None
+    assert restarted.recover() == 1
+    _, msg = restarted.claim()
+    assert msg.message_id == "m1"
@@ -0,0 +1,99 @@
+from email import message_from_bytes
+
+import pytest
+
+from src.mail import mail_handler
+from src.mail.mail_handler import build_email
+from src.mail.outbox import MailOutbox
+
+ADMINS = ["ana@example.com", "luis@example.com"]
+
+
+@pytest.fixture(autouse=True)
+def smtp_user(monkeypatch):
+    # Sin .env en las pruebas
+    monkeypatch.setattr(mail_handler, "SMTP_USER", "bot@example.com")
+
+
+class RecordingSMTP:
+    def __init__(self):
+        self.sent = []
+
+    def sendmail(self, sender, recipients, message):
+        self.sent.append((recipients, message))
+        return {}
+
+    def quit(self):
+        pass
+
+
+def test_single_recipient_in_to_header():
+    msg = build_email("ana@example.com", "Asunto", "Hola")
+    assert msg["To"] == "ana@example.com"
+
+
+def test_multiple_recipients_only_in_envelope(tmp_path):
+    smtp = RecordingSMTP()
+    outbox = MailOutbox(lambda: smtp, "bot@example.com", str(tmp_path / "out.db"))
+
+    msg = build_email(ADMINS, "QR", "Escanea", [("qr.png", b"\x89PNG")])
+    outbox.enqueue(msg.as_bytes(), ADMINS)
+    assert outbox.drain() == 1
+
+    (recipients, raw), = smtp.sent
+    assert recipients == ADMINS
+    headers = message_from_bytes(raw)
+    assert headers["To"] == "undisclosed-recipients:;"
+    assert headers["Bcc"] is None
+    for address in ADMINS:
+        assert address.encode() not in raw
+
+
+class FlakySMTP(RecordingSMTP):
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def sendmail(self, sender, recipients, message):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionRefusedError("smtp down")
+        return super().sendmail(sender, recipients, message)
+
+
+def test_outbox_retries_with_backoff(tmp_path):
+    smtp = FlakySMTP(failures=2)
+    outbox = MailOutbox(lambda: smtp, "bot@example.com", str(tmp_path / "out.db"))
+    message_id = outbox.enqueue(b"Subject: x\r\n\r\nhola", ["ana@example.com"])
+
+    # La conexión nueva también falla: queda pendiente con reintento diferido
+    assert outbox.drain() == 0
+    status, attempts, next_attempt, created = outbox._conn.execute(
+        "SELECT status, attempts, next_attempt, created FROM outbox WHERE id = ?",
+        (message_id,),
+    ).fetchone()
+    assert (status, attempts) == ("pending", 1)
+    assert next_attempt > created
+    assert outbox.drain() == 0
+
+    outbox._conn.execute("UPDATE outbox SET next_attempt = 0")
+    assert outbox.drain() == 1
+    assert len(smtp.sent) == 1
+
+
+def test_outbox_gives_up_after_max_attempts(tmp_path):
+    smtp = FlakySMTP(failures=10)
+    outbox = MailOutbox(
+        lambda: smtp, "bot@example.com", str(tmp_path / "out.db"), max_attempts=2
+    )
+    message_id = outbox.enqueue(b"Subject: x\r\n\r\nhola", ["ana@example.com"])
+
+    for _ in range(2):
+        outbox._conn.execute("UPDATE outbox SET next_attempt = 0")
+        outbox.drain()
+
+    status, attempts = outbox._conn.execute(
+        "SELECT status, attempts FROM outbox WHERE id = ?", (message_id,)
+    ).fetchone()
+    assert (status, attempts) == ("failed", 2)
+    assert smtp.sent == []
@@ -0,0 +1,82 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from src.media.cache import ExtractionCache
+from src.media.render import DEFAULT_FONT_PATH, get_font
+
+ORDER = [("KG000001", "2"), ("KG000002", "5"), ("KG000003", "1"), ("KG000004", "12")]
+
+
+def order_photo(lines=ORDER, fmt="PNG", scale=1.0, quality=95) -> bytes:
+    font = get_font(DEFAULT_FONT_PATH, 28)
+    image = Image.new("RGB", (600, 60 + 44 * len(lines)), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((20, 15), "PEDIDO:", font=font, fill="black")
+    for row, (code, quantity) in enumerate(lines, start=1):
+        draw.text((20, 15 + 44 * row), code, font=font, fill="black")
+        draw.text((400, 15 + 44 * row), quantity, font=font, fill="black")
+    if scale != 1.0:
+        image = image.resize(
+            (round(image.width * scale), round(image.height * scale)), Image.LANCZOS
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=quality)
+    return buffer.getvalue()
+
+
+class CountingExtractor:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.text
+
+
+def test_recompressed_image_hits_the_cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    ocr = CountingExtractor("KG000001 2")
+    cache.get_or_extract(order_photo(), "image", ocr)
+
+    # Reenviada por WhatsApp: JPEG con pérdida y algo más pequeña
+    forwarded = order_photo(fmt="JPEG", scale=0.8, quality=60)
+    assert cache.get_or_extract(forwarded, "image", ocr) == "KG000001 2"
+    assert ocr.calls == 1
+
+
+def test_changed_quantity_misses_the_cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"))
+    cache.get_or_extract(order_photo(), "image", CountingExtractor("original"))
+
+    changed = ORDER[:3] + [("KG000004", "13")]
+    ocr = CountingExtractor("changed")
+    assert cache.get_or_extract(order_photo(changed), "image", ocr) == "changed"
+    assert ocr.calls == 1
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ExtractionCache(path).get_or_extract(order_photo(), "image", lambda: "texto")
+    ExtractionCache(path).get_or_extract(b"%PDF doc", ".pdf", lambda: "pdf")
+
+    reopened = ExtractionCache(path)
+    ocr = CountingExtractor("otra vez")
+    assert reopened.get_or_extract(order_photo(), "image", ocr) == "texto"
+    forwarded = order_photo(fmt="JPEG", quality=60)
+    assert reopened.get_or_extract(forwarded, "image", ocr) == "texto"
+    assert reopened.get_or_extract(b"%PDF doc", ".pdf", ocr) == "pdf"
+    assert ocr.calls == 0
+
+
+def test_empty_text_is_not_cached_and_old_entries_are_evicted(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.get_or_extract(b"a", ".txt", lambda: "")
+    for payload in (b"a", b"b", b"c"):
+        cache.get_or_extract(payload, ".txt", lambda: payload.decode())
+
+    ocr = CountingExtractor("again")
+    assert cache.get_or_extract(b"a", ".txt", ocr) == "again"
+    assert cache.get_or_extract(b"c", ".txt", ocr) == "c"
+    assert ocr.calls == 1
@@ -0,0 +1,54 @@
+import hashlib
+import itertools
+import os
+import threading
+
+from src.media.store import MediaStore
+
+
+def same_shard_payloads():
+    """
+    Two payloads whose files share a shard directory (first two hex digits).
+    """
+    seen = {}
+    for i in itertools.count():
+        data = f"foto {i}".encode()
+        shard = hashlib.sha256(data).hexdigest()[:2]
+        if shard in seen:
+            return seen[shard], data
+        seen[shard] = data
+
+
+def test_put_survives_compaction_between_mkdir_and_write(tmp_path, monkeypatch):
+    # Límite de 1 byte: la compactación borra lo indexado y poda los directorios
+    store = MediaStore(str(tmp_path), max_bytes=1, max_age_days=0)
+    old, new = same_shard_payloads()
+    store.put(old, "vieja.jpg")
+    makedirs = os.makedirs
+    compactors = []
+
+    def makedirs_then_compact(*args, **kwargs):
+        makedirs(*args, **kwargs)
+        # Compactación concurrente justo antes de escribir el fichero nuevo
+        compactor = threading.Thread(target=store.compact)
+        compactor.start()
+        compactor.join(timeout=0.5)
+        compactors.append(compactor)
+
+    monkeypatch.setattr(os, "makedirs", makedirs_then_compact)
+    # Antes del arreglo el directorio podado hacía fallar la escritura
+    path = store.put(new, "nueva.jpg")
+    monkeypatch.undo()
+    for compactor in compactors:
+        compactor.join()
+
+    assert compactors
+    assert os.path.dirname(path) == os.path.dirname(store.put(old, "vieja.jpg"))
+
+def test_put_stores_identical_payload_once(tmp_path):
+    store = MediaStore(str(tmp_path))
+    first = store.put(b"audio", "nota.ogg")
+    assert store.put(b"audio", "otra.ogg") == first
+    assert store.total_bytes() == 5
+    with open(first, "rb") as f:
+        assert f.read() == b"audio"
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from src.models import Base_sqlite
+from src.models.message import Message
+from src.models.user import User
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base_sqlite.metadata.create_all(
+        engine, tables=[User.__table__, Message.__table__]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def store(session, external_id, **overrides):
+    fields = dict(
+        client_id=1,
+        client_phone="5491100000001",
+        direction="received",
+        type_="text",
+        user_id=None,
+        user_phone="5491199999999",
+        content="hola",
+        timestamp=datetime(2026, 1, 2, 10, 0),
+        external_id=external_id,
+    )
+    fields.update(overrides)
+    return Message.create(session, **fields)
+
+
+def test_redelivered_message_is_skipped(session):
+    assert store(session, "wamid.1") is not None
+    assert store(session, "wamid.1", content="otra vez") is None
+    assert session.query(Message).count() == 1
+
+
+def test_other_constraint_failures_are_raised(session):
+    with pytest.raises(IntegrityError):
+        store(session, "wamid.2", client_phone=None)
+    # La sesión sigue usable y nada quedó guardado
+    assert session.query(Message).count() == 0
+    assert store(session, "wamid.2") is not None
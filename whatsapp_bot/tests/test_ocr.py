@@ -0,0 +1,65 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.media import ocr
+from src.media.documents import extract_text_from_pdf
+
+
+class ConcurrencyProbe:
+    """
+    Stands in for PaddleOCR and records how many calls overlap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def ocr(self, image, cls=True):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return [[[None, ("KG000001 2", 0.99)]]]
+
+
+def png_bytes():
+    image = np.full((40, 120, 3), 255, np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def test_ocr_calls_do_not_overlap(monkeypatch):
+    probe = ConcurrencyProbe()
+    monkeypatch.setattr(ocr, "_ocr_model", probe)
+    data = png_bytes()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        texts = list(pool.map(lambda _: ocr.extract_text_from_image(data), range(8)))
+
+    assert texts == ["KG000001 2"] * 8
+    assert probe.max_active == 1
+
+
+def test_scanned_pdf_shares_the_ocr_lock(monkeypatch, tmp_path):
+    probe = ConcurrencyProbe()
+    monkeypatch.setattr(ocr, "_ocr_model", probe)
+    # PDF sin capa de texto: cada página es solo una imagen
+    scans = [Image.new("RGB", (120, 40), "white") for _ in range(6)]
+    path = tmp_path / "scan.pdf"
+    scans[0].save(path, "PDF", save_all=True, append_images=scans[1:])
+    data = png_bytes()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        images = [pool.submit(ocr.extract_text_from_image, data) for _ in range(4)]
+        text = extract_text_from_pdf(str(path))
+
+    assert text.splitlines() == ["KG000001 2"] * 6
+    assert all(image.result() == "KG000001 2" for image in images)
+    assert probe.max_active == 1
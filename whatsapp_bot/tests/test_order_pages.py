@@ -0,0 +1,72 @@
+import io
+from types import SimpleNamespace
+
+from openpyxl import load_workbook
+from PIL import Image
+
+from src.ai.utils import confirmed_order, order_to_pdf, order_to_xlsx
+from src.media.render import DEFAULT_FONT_PATH, get_font, render_order_pages
+
+# Valores por defecto de build_order_image_table
+FONT_SIZE = 18
+CELL_PADDING = 10
+
+
+def order_lines(count):
+    return [(f"KG{i:06d}", str(i % 7 + 1)) for i in range(count)]
+
+
+def stored_page(lines):
+    """
+    Content stored for a page the bot sent, as the OCR of its black text
+    reads it: one line per value, newlines saved as " \\".
+    """
+    text = "\n".join(["PEDIDO:"] + [value for line in lines for value in line])
+    return SimpleNamespace(direction="sent", content=text.replace("\n", " \\"))
+
+
+def test_page_marker_is_not_black():
+    items = [(code, qty, "Producto", None) for code, qty in order_lines(30)]
+    pages = render_order_pages(items, page_lines=25, fmt="JPEG")
+    assert len(pages) == 2
+
+    title_end = CELL_PADDING + get_font(DEFAULT_FONT_PATH, FONT_SIZE + 4).getlength(
+        "PEDIDO:"
+    )
+    for page in pages:
+        image = Image.open(io.BytesIO(page)).convert("L")
+        band = image.crop((int(title_end) + 4, 0, image.width, FONT_SIZE + 10))
+        # Solo "PEDIDO:" es texto negro en la cabecera; "(n/N)" va en gris
+        assert band.getextrema()[0] > 128
+
+
+def test_confirmed_order_joins_pages():
+    lines = order_lines(30)
+    messages = [
+        SimpleNamespace(direction="received", content="Quiero 30 artículos"),
+        SimpleNamespace(direction="sent", content="Confirma si el pedido es correcto"),
+        stored_page(lines[:25]),
+        stored_page(lines[25:]),
+        SimpleNamespace(direction="received", content="Es correcto"),
+    ]
+
+    order = confirmed_order(messages)
+    workbook = load_workbook(io.BytesIO(order_to_xlsx(order)))
+    rows = list(workbook.active.iter_rows(min_row=2, values_only=True))
+    assert rows == lines
+    assert order_to_pdf(order).startswith(b"%PDF")
+
+
+def test_confirmed_order_ignores_older_orders():
+    old, new = order_lines(3), order_lines(30)[10:14]
+    messages = [
+        stored_page(old),
+        SimpleNamespace(direction="received", content="Mejor otros"),
+        SimpleNamespace(direction="sent", content="Confirma si el pedido es correcto"),
+        stored_page(new),
+        SimpleNamespace(direction="received", content="Es correcto"),
+    ]
+
+    workbook = load_workbook(io.BytesIO(order_to_xlsx(confirmed_order(messages))))
+    rows = list(workbook.active.iter_rows(min_row=2, values_only=True))
+    assert rows == new
@@ -0,0 +1,35 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from src.media.render import DEFAULT_FONT_PATH, decode_thumbnail, draw_text, get_font
+
+
+@pytest.mark.parametrize("size", [9, 18, 22])
+@pytest.mark.parametrize(
+    "text", ["KG000123", "PEDIDO:", "Wavy AV Tj crema sérum", "Imagen no\ndisponible"]
+)
+def test_cached_text_matches_pillow(size, text):
+    expected = Image.new("RGB", (420, 80), "white")
+    draw = ImageDraw.Draw(expected)
+    draw_fn = draw.multiline_text if "\n" in text else draw.text
+    draw_fn((10.6, 5), text, font=get_font(DEFAULT_FONT_PATH, size), fill="#000000")
+
+    actual = Image.new("RGB", (420, 80), "white")
+    draw_text(actual, (10.6, 5), text, DEFAULT_FONT_PATH, size, "#000000")
+
+    diff = np.abs(np.asarray(expected, int) - np.asarray(actual, int))
+    assert diff.max() <= 16
+
+
+def test_decoded_thumbnails_are_reused():
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 200), "red").save(buffer, "JPEG")
+    data = buffer.getvalue()
+
+    thumb = decode_thumbnail(data, (100, 100))
+    assert thumb.size == (100, 50)
+    assert decode_thumbnail(bytes(data), (100, 100)) is thumb
+    assert decode_thumbnail(data, (50, 50)).size == (50, 25)
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from src.ai.streaming import IncrementalJSONFields, stream_chat_response
+
+ANSWER = {
+    "responder": True,
+    "respuesta": 'Dice "hola" \\ adiós ñ é € \U0001f600',
+    "productos": [{"codigo": "KG000001", "nota": "a } ] \" {"}, [1, 2]],
+    "cliente": {"nombre": "Ana", "tags": ["x", {"y": "}"}]},
+    "cantidad": -12.5e1,
+    "extra": None,
+}
+# Los escalares de primer nivel; objetos y listas anidados se omiten
+SCALARS = {k: v for k, v in ANSWER.items() if not isinstance(v, (dict, list))}
+
+
+def feed_all(parser, chunks):
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_every_two_chunk_split_gives_the_same_fields(ensure_ascii):
+    # Con ensure_ascii los caracteres salen como \uXXXX, también pares suplentes
+    text = json.dumps(ANSWER, ensure_ascii=ensure_ascii)
+    for cut in range(len(text) + 1):
+        parser = feed_all(IncrementalJSONFields(), [text[:cut], text[cut:]])
+        assert parser.done, cut
+        assert parser.fields == SCALARS, cut
+
+
+def test_char_by_char_feed():
+    text = json.dumps(ANSWER)
+    parser = feed_all(IncrementalJSONFields(), text)
+    assert parser.done
+    assert parser.fields == SCALARS
+
+
+def test_unicode_escape_split_across_chunks():
+    parser = IncrementalJSONFields()
+    assert parser.feed('{"respuesta": "caf\\u00') == {}
+    assert parser.feed('e9 \\') == {}
+    assert parser.feed('"ok\\"", "responder": true}') == {
+        "respuesta": 'café "ok"',
+        "responder": True,
+    }
+
+
+def test_field_is_reported_once_complete():
+    parser = IncrementalJSONFields()
+    assert parser.feed('Claro: {"responder": tr') == {}
+    assert parser.feed("ue") == {}
+    # Un literal solo termina con un delimitador
+    assert parser.feed(", ") == {"responder": True}
+    assert parser.feed('"respuesta": "Hola') == {}
+    assert parser.feed('"') == {"respuesta": "Hola"}
+    assert not parser.done
+
+
+def test_invalid_json_raises():
+    with pytest.raises(ValueError):
+        IncrementalJSONFields().feed('{"responder": nope, "x": 1}')
+
+
+def test_stream_stops_when_model_declines():
+    consumed = []
+
+    def chunks():
+        for chunk in ['{"respon', 'der": false', ", ", '"respuesta": "x"}']:
+            consumed.append(chunk)
+            yield chunk
+
+    replies = []
+    assert stream_chat_response(chunks(), replies.append) is None
+    assert replies == []
+    assert consumed == ['{"respon', 'der": false', ", "]
+
+
+def test_stream_answers_before_the_object_closes():
+    replies = []
+    chunks = iter(['{"responder": true, ', '"respuesta": "Hola \\"Ana\\""', ", "])
+    assert stream_chat_response(chunks, replies.append) == 'Hola "Ana"'
+    assert replies == ['Hola "Ana"']
@@ -0,0 +1,99 @@
+import io
+from types import SimpleNamespace
+
+from PIL import Image
+
+from src.media import sftp, thumbnails
+from src.media.thumbnails import ThumbnailAtlas, build_atlas
+
+COLORS = ["red", "green", "blue", "yellow", "purple", "orange", "black", "gray"]
+
+
+def product_jpeg(color, size=(300, 150)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class FakeSFTP:
+    """
+    Product image folder: filename -> (bytes, mtime). Counts downloads.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.downloads = 0
+
+    def chdir(self, path):
+        pass
+
+    def listdir_attr(self):
+        return [
+            SimpleNamespace(filename=name, st_mtime=mtime)
+            for name, (_, mtime) in self.files.items()
+        ]
+
+    def open(self, name, mode):
+        self.downloads += 1
+        return io.BytesIO(self.files[name][0])
+
+    def close(self):
+        pass
+
+
+def serve(monkeypatch, files) -> FakeSFTP:
+    server = FakeSFTP(files)
+    transport = SimpleNamespace(close=lambda: None)
+    monkeypatch.setattr(sftp, "connect_sftp", lambda: (server, transport))
+    return server
+
+
+def catalog(count):
+    files = {
+        f"KG{i:06d}.jpg": (product_jpeg(COLORS[i]), 1000 + i) for i in range(count)
+    }
+    # Miniaturas y variantes que find_image_file ignora
+    files["KG000000_mini.jpg"] = (product_jpeg("white"), 1)
+    return files
+
+
+def test_build_then_read(monkeypatch, tmp_path):
+    serve(monkeypatch, catalog(3))
+    stats = build_atlas(str(tmp_path))
+    assert (stats["products"], stats["downloaded"]) == (3, 3)
+
+    atlas = ThumbnailAtlas(str(tmp_path))
+    thumb = atlas.get("KG000002")
+    assert thumb.size == (100, 50)
+    assert thumb.getpixel((50, 25))[2] > 200  # azul
+    assert atlas.get("KG000000_mini") is None
+    assert atlas.get("KG999999") is None
+
+
+def test_reopen_existing_atlas(monkeypatch, tmp_path):
+    serve(monkeypatch, catalog(2))
+    build_atlas(str(tmp_path))
+
+    reopened = ThumbnailAtlas(str(tmp_path))
+    assert reopened.get("KG000001").getpixel((10, 10))[1] > 100  # verde
+    assert ThumbnailAtlas(str(tmp_path / "missing")).get("KG000001") is None
+
+
+def test_rebuild_grows_atlas_for_open_reader(monkeypatch, tmp_path):
+    serve(monkeypatch, catalog(2))
+    build_atlas(str(tmp_path))
+    atlas = ThumbnailAtlas(str(tmp_path))
+    assert atlas.get("KG000007") is None
+
+    server = serve(monkeypatch, catalog(8))
+    stats = build_atlas(str(tmp_path))
+    # Las imágenes sin cambios se copian del atlas anterior
+    assert (stats["reused"], stats["downloaded"], server.downloads) == (2, 6, 6)
+
+    atlas_files = [p for p in tmp_path.iterdir() if p.name.startswith("atlas-")]
+    assert len(atlas_files) == 1
+    assert atlas_files[0].stat().st_size == 8 * thumbnails.TILE_BYTES
+
+    # El lector abierto vuelve a mapear el atlas más grande
+    assert atlas.get("KG000006").getpixel((10, 10))[0] < 50  # negro
+    assert atlas.get("KG000000").getpixel((10, 10))[0] > 200  # rojo
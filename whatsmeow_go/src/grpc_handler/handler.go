@@ -200,8 +200,7 @@ func MakeGrpcHandler(
 			}).Info("Text message received")
 
 			if !hasClientsFunc() {
-				logger.Warn("No connected gRPC clients, skipping broadcast")
-				return
+				logger.Info("No connected gRPC clients, event kept for replay")
 			}
 
 			broadcastFunc(&pb.MessageEvent{
@@ -210,6 +209,7 @@ func MakeGrpcHandler(
 				Name:      name,
 				Text:      text,
 				Timestamp: timestamp,
+				MessageId: msgEvt.Info.ID,
 			})
 			return
 		}
@@ -304,6 +304,7 @@ func MakeGrpcHandler(
 			Text:      "MEDIA:" + filepath.Base(m.filename),
 			Binary:    data,
 			Filename:  filepath.Base(m.filename),
+			MessageId: msgEvt.Info.ID,
 		})
 	}
 }
@@ -70,6 +70,7 @@ func TestMakeGrpcHandler_TextMessage(t *testing.T) {
 
 	msg := &events.Message{
 		Info: types.MessageInfo{
+			ID:        "3EB0C0FFEE",
 			Timestamp: now,
 			PushName:  "Test Name",
 			MessageSource: types.MessageSource{
@@ -96,6 +97,9 @@ func TestMakeGrpcHandler_TextMessage(t *testing.T) {
 	if result.Name != "Test Name" {
 		t.Errorf("Expected name 'Test Name', got '%s'", result.Name)
 	}
+	if result.MessageId != "3EB0C0FFEE" {
+		t.Errorf("Expected message ID '3EB0C0FFEE', got '%s'", result.MessageId)
+	}
 }
 
 func TestMakeGrpcHandler_IgnoresNonMessages(t *testing.T) {
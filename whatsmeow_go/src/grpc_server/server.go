@@ -3,7 +3,10 @@ package grpcserver
 import (
 	"fmt"
 	"net"
+	"os"
+	"strconv"
 	"sync"
+	"time"
 
 	pb "github.com/juliog922/whatsmeow_go/src/proto"
 	"github.com/juliog922/whatsmeow_go/src/whatsapp"
@@ -11,8 +14,17 @@ import (
 	"go.mau.fi/whatsmeow"
 	"go.mau.fi/whatsmeow/store/sqlstore"
 	"google.golang.org/grpc"
+	_ "google.golang.org/grpc/encoding/gzip" // peticiones con ficheros comprimidas por el cliente
+	"google.golang.org/grpc/keepalive"
 )
 
+func envInt(name string, fallback int) int {
+	if value, err := strconv.Atoi(os.Getenv(name)); err == nil && value > 0 {
+		return value
+	}
+	return fallback
+}
+
 func StartGRPC(
 	host, port string,
 	container *sqlstore.Container,
@@ -34,6 +46,16 @@ func StartGRPC(
 	server := grpc.NewServer(
 		grpc.MaxRecvMsgSize(64*1024*1024),
 		grpc.MaxSendMsgSize(64*1024*1024),
+		// Pings en ambos sentidos para que los NAT no corten streams inactivos;
+		// el cliente Python hace ping cada 30s, por encima de MinTime
+		grpc.KeepaliveParams(keepalive.ServerParameters{
+			Time:    60 * time.Second,
+			Timeout: 20 * time.Second,
+		}),
+		grpc.KeepaliveEnforcementPolicy(keepalive.EnforcementPolicy{
+			MinTime:             10 * time.Second,
+			PermitWithoutStream: true,
+		}),
 	)
 
 	srv := &whatsapp.WhatsAppServer{
@@ -43,19 +65,13 @@ func StartGRPC(
 		Lock:           lock,
 		Logger:         logger,
 		HasClientsFunc: hasClientsFunc,
-		BroadcastFunc: func(msg *pb.MessageEvent) {
-			lock.Lock()
-			defer lock.Unlock()
-
-			for stream := range *listeners {
-				err := stream.Send(msg)
-				if err != nil {
-					logger.WithError(err).Warn("Failed to send message to stream client, removing...")
-					delete(*listeners, stream)
-				}
-			}
-		},
+		Events: whatsapp.NewEventLog(
+			envInt("STREAM_REPLAY_EVENTS", whatsapp.DefaultReplayEvents),
+			envInt("STREAM_REPLAY_BYTES", whatsapp.DefaultReplayBytes),
+		),
 	}
+	// Todos los eventos pasan por el registro de reenvío
+	srv.BroadcastFunc = srv.BroadcastMessage
 
 	pb.RegisterWhatsAppServiceServer(server, srv)
 
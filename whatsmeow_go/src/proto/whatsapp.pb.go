@@ -66,6 +66,8 @@ type MessageEvent struct {
 	Timestamp     string                 `protobuf:"bytes,5,opt,name=timestamp,proto3" json:"timestamp,omitempty"`
 	Binary        []byte                 `protobuf:"bytes,6,opt,name=binary,proto3" json:"binary,omitempty"`
 	Filename      string                 `protobuf:"bytes,7,opt,name=filename,proto3" json:"filename,omitempty"`
+	Seq           uint64                 `protobuf:"varint,8,opt,name=seq,proto3" json:"seq,omitempty"`                             // Posición en el stream, creciente
+	MessageId     string                 `protobuf:"bytes,9,opt,name=message_id,json=messageId,proto3" json:"message_id,omitempty"` // ID de WhatsApp, estable entre reenvíos
 	unknownFields protoimpl.UnknownFields
 	sizeCache     protoimpl.SizeCache
 }
@@ -149,6 +151,20 @@ func (x *MessageEvent) GetFilename() string {
 	return ""
 }
 
+func (x *MessageEvent) GetSeq() uint64 {
+	if x != nil {
+		return x.Seq
+	}
+	return 0
+}
+
+func (x *MessageEvent) GetMessageId() string {
+	if x != nil {
+		return x.MessageId
+	}
+	return ""
+}
+
 type QRCodeResponse struct {
 	state         protoimpl.MessageState `protogen:"open.v1"`
 	Code          string                 `protobuf:"bytes,1,opt,name=code,proto3" json:"code,omitempty"`     // QR como string
@@ -513,12 +529,57 @@ func (x *StatusResponse) GetError() string {
 	return ""
 }
 
+// Sin campos coincide en el cable con Empty: los clientes antiguos siguen funcionando
+type StreamRequest struct {
+	state         protoimpl.MessageState `protogen:"open.v1"`
+	AfterSeq      uint64                 `protobuf:"varint,1,opt,name=after_seq,json=afterSeq,proto3" json:"after_seq,omitempty"` // Reenviar eventos con seq mayor (0: todos los retenidos)
+	unknownFields protoimpl.UnknownFields
+	sizeCache     protoimpl.SizeCache
+}
+
+func (x *StreamRequest) Reset() {
+	*x = StreamRequest{}
+	mi := &file_proto_whatsapp_proto_msgTypes[9]
+	ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+	ms.StoreMessageInfo(mi)
+}
+
+func (x *StreamRequest) String() string {
+	return protoimpl.X.MessageStringOf(x)
+}
+
+func (*StreamRequest) ProtoMessage() {}
+
+func (x *StreamRequest) ProtoReflect() protoreflect.Message {
+	mi := &file_proto_whatsapp_proto_msgTypes[9]
+	if x != nil {
+		ms := protoimpl.X.MessageStateOf(protoimpl.Pointer(x))
+		if ms.LoadMessageInfo() == nil {
+			ms.StoreMessageInfo(mi)
+		}
+		return ms
+	}
+	return mi.MessageOf(x)
+}
+
+// Deprecated: Use StreamRequest.ProtoReflect.Descriptor instead.
+func (*StreamRequest) Descriptor() ([]byte, []int) {
+	return file_proto_whatsapp_proto_rawDescGZIP(), []int{9}
+}
+
+func (x *StreamRequest) GetAfterSeq() uint64 {
+	if x != nil {
+		return x.AfterSeq
+	}
+	return 0
+}
+
 var File_proto_whatsapp_proto protoreflect.FileDescriptor
 
 const file_proto_whatsapp_proto_rawDesc = "" +
 	"\n" +
 	"\x14proto/whatsapp.proto\x12\bwhatsapp\"\a\n" +
-	"\x05Empty\"\xac\x01\n" +
+	"\x05Empty\"\xdd\x01\n" +
 	"\fMessageEvent\x12\x12\n" +
 	"\x04from\x18\x01 \x01(\tR\x04from\x12\x0e\n" +
 	"\x02to\x18\x02 \x01(\tR\x02to\x12\x12\n" +
@@ -526,7 +587,10 @@ const file_proto_whatsapp_proto_rawDesc = "" +
 	"\x04text\x18\x04 \x01(\tR\x04text\x12\x1c\n" +
 	"\ttimestamp\x18\x05 \x01(\tR\ttimestamp\x12\x16\n" +
 	"\x06binary\x18\x06 \x01(\fR\x06binary\x12\x1a\n" +
-	"\bfilename\x18\a \x01(\tR\bfilename\"<\n" +
+	"\bfilename\x18\a \x01(\tR\bfilename\x12\x10\n" +
+	"\x03seq\x18\b \x01(\x04R\x03seq\x12\x1d\n" +
+	"\n" +
+	"message_id\x18\t \x01(\tR\tmessageId\"<\n" +
 	"\x0eQRCodeResponse\x12\x12\n" +
 	"\x04code\x18\x01 \x01(\tR\x04code\x12\x16\n" +
 	"\x06status\x18\x02 \x01(\tR\x06status\"\x80\x01\n" +
@@ -549,9 +613,11 @@ const file_proto_whatsapp_proto_rawDesc = "" +
 	"\x03jid\x18\x01 \x01(\tR\x03jid\"@\n" +
 	"\x0eStatusResponse\x12\x18\n" +
 	"\asuccess\x18\x01 \x01(\bR\asuccess\x12\x14\n" +
-	"\x05error\x18\x02 \x01(\tR\x05error2\xf7\x02\n" +
-	"\x0fWhatsAppService\x12;\n" +
-	"\x0eStreamMessages\x12\x0f.whatsapp.Empty\x1a\x16.whatsapp.MessageEvent0\x01\x127\n" +
+	"\x05error\x18\x02 \x01(\tR\x05error\",\n" +
+	"\rStreamRequest\x12\x1b\n" +
+	"\tafter_seq\x18\x01 \x01(\x04R\bafterSeq2\xff\x02\n" +
+	"\x0fWhatsAppService\x12C\n" +
+	"\x0eStreamMessages\x12\x17.whatsapp.StreamRequest\x1a\x16.whatsapp.MessageEvent0\x01\x127\n" +
 	"\n" +
 	"StartLogin\x12\x0f.whatsapp.Empty\x1a\x18.whatsapp.QRCodeResponse\x12<\n" +
 	"\vSendMessage\x12\x15.whatsapp.SendRequest\x1a\x16.whatsapp.SendResponse\x124\n" +
@@ -571,7 +637,7 @@ func file_proto_whatsapp_proto_rawDescGZIP() []byte {
 	return file_proto_whatsapp_proto_rawDescData
 }
 
-var file_proto_whatsapp_proto_msgTypes = make([]protoimpl.MessageInfo, 9)
+var file_proto_whatsapp_proto_msgTypes = make([]protoimpl.MessageInfo, 10)
 var file_proto_whatsapp_proto_goTypes = []any{
 	(*Empty)(nil),          // 0: whatsapp.Empty
 	(*MessageEvent)(nil),   // 1: whatsapp.MessageEvent
@@ -582,10 +648,11 @@ var file_proto_whatsapp_proto_goTypes = []any{
 	(*DeviceList)(nil),     // 6: whatsapp.DeviceList
 	(*DeviceID)(nil),       // 7: whatsapp.DeviceID
 	(*StatusResponse)(nil), // 8: whatsapp.StatusResponse
+	(*StreamRequest)(nil),  // 9: whatsapp.StreamRequest
 }
 var file_proto_whatsapp_proto_depIdxs = []int32{
 	5, // 0: whatsapp.DeviceList.devices:type_name -> whatsapp.DeviceInfo
-	0, // 1: whatsapp.WhatsAppService.StreamMessages:input_type -> whatsapp.Empty
+	9, // 1: whatsapp.WhatsAppService.StreamMessages:input_type -> whatsapp.StreamRequest
 	0, // 2: whatsapp.WhatsAppService.StartLogin:input_type -> whatsapp.Empty
 	3, // 3: whatsapp.WhatsAppService.SendMessage:input_type -> whatsapp.SendRequest
 	0, // 4: whatsapp.WhatsAppService.ListDevices:input_type -> whatsapp.Empty
@@ -615,7 +682,7 @@ func file_proto_whatsapp_proto_init() {
 			GoPackagePath: reflect.TypeOf(x{}).PkgPath(),
 			RawDescriptor: unsafe.Slice(unsafe.StringData(file_proto_whatsapp_proto_rawDesc), len(file_proto_whatsapp_proto_rawDesc)),
 			NumEnums:      0,
-			NumMessages:   9,
+			NumMessages:   10,
 			NumExtensions: 0,
 			NumServices:   1,
 		},
@@ -31,7 +31,7 @@ const (
 //
 // For semantics around ctx use and closing/ending streaming RPCs, please refer to https://pkg.go.dev/google.golang.org/grpc/?tab=doc#ClientConn.NewStream.
 type WhatsAppServiceClient interface {
-	StreamMessages(ctx context.Context, in *Empty, opts ...grpc.CallOption) (grpc.ServerStreamingClient[MessageEvent], error)
+	StreamMessages(ctx context.Context, in *StreamRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[MessageEvent], error)
 	StartLogin(ctx context.Context, in *Empty, opts ...grpc.CallOption) (*QRCodeResponse, error)
 	SendMessage(ctx context.Context, in *SendRequest, opts ...grpc.CallOption) (*SendResponse, error)
 	ListDevices(ctx context.Context, in *Empty, opts ...grpc.CallOption) (*DeviceList, error)
@@ -47,13 +47,13 @@ func NewWhatsAppServiceClient(cc grpc.ClientConnInterface) WhatsAppServiceClient
 	return &whatsAppServiceClient{cc}
 }
 
-func (c *whatsAppServiceClient) StreamMessages(ctx context.Context, in *Empty, opts ...grpc.CallOption) (grpc.ServerStreamingClient[MessageEvent], error) {
+func (c *whatsAppServiceClient) StreamMessages(ctx context.Context, in *StreamRequest, opts ...grpc.CallOption) (grpc.ServerStreamingClient[MessageEvent], error) {
 	cOpts := append([]grpc.CallOption{grpc.StaticMethod()}, opts...)
 	stream, err := c.cc.NewStream(ctx, &WhatsAppService_ServiceDesc.Streams[0], WhatsAppService_StreamMessages_FullMethodName, cOpts...)
 	if err != nil {
 		return nil, err
 	}
-	x := &grpc.GenericClientStream[Empty, MessageEvent]{ClientStream: stream}
+	x := &grpc.GenericClientStream[StreamRequest, MessageEvent]{ClientStream: stream}
 	if err := x.ClientStream.SendMsg(in); err != nil {
 		return nil, err
 	}
@@ -120,7 +120,7 @@ func (c *whatsAppServiceClient) DeleteDevice(ctx context.Context, in *DeviceID,
 // All implementations must embed UnimplementedWhatsAppServiceServer
 // for forward compatibility.
 type WhatsAppServiceServer interface {
-	StreamMessages(*Empty, grpc.ServerStreamingServer[MessageEvent]) error
+	StreamMessages(*StreamRequest, grpc.ServerStreamingServer[MessageEvent]) error
 	StartLogin(context.Context, *Empty) (*QRCodeResponse, error)
 	SendMessage(context.Context, *SendRequest) (*SendResponse, error)
 	ListDevices(context.Context, *Empty) (*DeviceList, error)
@@ -136,7 +136,7 @@ type WhatsAppServiceServer interface {
 // pointer dereference when methods are called.
 type UnimplementedWhatsAppServiceServer struct{}
 
-func (UnimplementedWhatsAppServiceServer) StreamMessages(*Empty, grpc.ServerStreamingServer[MessageEvent]) error {
+func (UnimplementedWhatsAppServiceServer) StreamMessages(*StreamRequest, grpc.ServerStreamingServer[MessageEvent]) error {
 	return status.Errorf(codes.Unimplemented, "method StreamMessages not implemented")
 }
 func (UnimplementedWhatsAppServiceServer) StartLogin(context.Context, *Empty) (*QRCodeResponse, error) {
@@ -176,11 +176,11 @@ func RegisterWhatsAppServiceServer(s grpc.ServiceRegistrar, srv WhatsAppServiceS
 }
 
 func _WhatsAppService_StreamMessages_Handler(srv interface{}, stream grpc.ServerStream) error {
-	m := new(Empty)
+	m := new(StreamRequest)
 	if err := stream.RecvMsg(m); err != nil {
 		return err
 	}
-	return srv.(WhatsAppServiceServer).StreamMessages(m, &grpc.GenericServerStream[Empty, MessageEvent]{ServerStream: stream})
+	return srv.(WhatsAppServiceServer).StreamMessages(m, &grpc.GenericServerStream[StreamRequest, MessageEvent]{ServerStream: stream})
 }
 
 // This type alias is provided for backwards compatibility with existing code that references the prior non-generic stream type by name.
@@ -15,44 +15,58 @@ import (
 	"google.golang.org/protobuf/proto"
 )
 
-func (s *WhatsAppServer) StreamMessages(_ *pb.Empty, stream pb.WhatsAppService_StreamMessagesServer) error {
-	s.Logger.Info("gRPC client connected to StreamMessages")
+func (s *WhatsAppServer) StreamMessages(req *pb.StreamRequest, stream pb.WhatsAppService_StreamMessagesServer) error {
+	cursor := req.GetAfterSeq()
+	s.Logger.WithField("afterSeq", cursor).Info("gRPC client connected to StreamMessages")
 
 	// Register the stream listener
 	s.Lock.Lock()
 	(*s.Listeners)[stream] = struct{}{}
 	s.Lock.Unlock()
 
-	// Block until the client disconnects
-	<-stream.Context().Done()
-
 	// Clean up the stream listener
-	s.Lock.Lock()
-	delete(*s.Listeners, stream)
-	s.Lock.Unlock()
-
-	s.Logger.Info("gRPC client disconnected from StreamMessages")
-	return nil
-}
-
-func (s *WhatsAppServer) BroadcastMessage(msg *pb.MessageEvent) {
-	s.Lock.Lock()
-	defer s.Lock.Unlock()
+	defer func() {
+		s.Lock.Lock()
+		delete(*s.Listeners, stream)
+		s.Lock.Unlock()
+	}()
+
+	// Cada cliente recorre el registro a su ritmo: primero lo pendiente desde
+	// su cursor y después los eventos nuevos, siempre en orden
+	events := s.eventLog()
+	for {
+		pending, missed, next := events.Since(cursor)
+		if missed {
+			s.Logger.WithField("afterSeq", cursor).Warn("Events after cursor no longer retained, resuming from oldest")
+		}
 
-	for stream := range *s.Listeners {
-		go func(srv pb.WhatsAppService_StreamMessagesServer) {
-			if err := srv.Send(msg); err != nil {
+		for _, msg := range pending {
+			if err := stream.Send(msg); err != nil {
 				s.Logger.WithError(err).Warn("Failed to send message to a gRPC client")
-			} else {
-				s.Logger.WithFields(logrus.Fields{
-					"to":   srv,
-					"type": "broadcast",
-				}).Debug("Message sent to gRPC client")
+				return err
 			}
-		}(stream)
+			cursor = msg.Seq
+		}
+
+		select {
+		case <-next:
+		case <-stream.Context().Done():
+			s.Logger.WithField("lastSeq", cursor).Info("gRPC client disconnected from StreamMessages")
+			return nil
+		}
 	}
 }
 
+// BroadcastMessage records the event in the replay log; every connected
+// stream picks it up from there.
+func (s *WhatsAppServer) BroadcastMessage(msg *pb.MessageEvent) {
+	seq := s.eventLog().Append(msg)
+	s.Logger.WithFields(logrus.Fields{
+		"seq":  seq,
+		"type": "broadcast",
+	}).Debug("Message queued for gRPC clients")
+}
+
 func (s *WhatsAppServer) SendMessage(ctx context.Context, req *pb.SendRequest) (*pb.SendResponse, error) {
 	if len(*s.Clients) == 0 {
 		s.Logger.Warn("No connected devices available to send message")
@@ -141,7 +155,7 @@ func (s *WhatsAppServer) SendMessage(ctx context.Context, req *pb.SendRequest) (
 		}
 	}
 
-	_, err := selectedClient.SendMessage(ctx, jid, msg)
+	resp, err := selectedClient.SendMessage(ctx, jid, msg)
 	if err != nil {
 		s.Logger.WithError(err).WithField("jid", jid.String()).Error("Failed to send message")
 		return &pb.SendResponse{Success: false, Error: err.Error()}, nil
@@ -162,6 +176,7 @@ func (s *WhatsAppServer) SendMessage(ctx context.Context, req *pb.SendRequest) (
 		Timestamp: time.Now().Format("2006-01-02 15:04:05"),
 		Filename:  req.Filename,
 		Binary:    req.Binary,
+		MessageId: resp.ID,
 	})
 
 	return &pb.SendResponse{Success: true}, nil
@@ -34,15 +34,15 @@ func (m *mockStream) SendMsg(interface{}) error       { return nil }
 func (m *mockStream) RecvMsg(interface{}) error       { return nil }
 
 func TestBroadcastMessage(t *testing.T) {
-	ctx := context.Background()
+	ctx, cancel := context.WithCancel(context.Background())
+	defer cancel()
+
 	stream := &mockStream{ctx: ctx}
 	msg := &pb.MessageEvent{From: "123", To: "456", Text: "Hola"}
 
 	stream.On("Send", msg).Return(nil)
 
-	listeners := map[pb.WhatsAppService_StreamMessagesServer]struct{}{
-		stream: {},
-	}
+	listeners := map[pb.WhatsAppService_StreamMessagesServer]struct{}{}
 
 	server := &whatsapp.WhatsAppServer{
 		Listeners: &listeners,
@@ -50,12 +50,18 @@ func TestBroadcastMessage(t *testing.T) {
 		Lock:      new(sync.Mutex),
 	}
 
+	go func() {
+		_ = server.StreamMessages(&pb.StreamRequest{}, stream)
+	}()
+	time.Sleep(20 * time.Millisecond)
+
 	server.BroadcastMessage(msg)
 
 	// Esperamos que la goroutine corra
 	time.Sleep(50 * time.Millisecond)
 
 	stream.AssertCalled(t, "Send", msg)
+	assert.NotZero(t, msg.Seq, "broadcast should assign a sequence number")
 }
 
 func TestStreamMessages_AddsAndRemovesListener(t *testing.T) {
@@ -74,7 +80,7 @@ func TestStreamMessages_AddsAndRemovesListener(t *testing.T) {
 	}
 
 	go func() {
-		_ = server.StreamMessages(&pb.Empty{}, stream)
+		_ = server.StreamMessages(&pb.StreamRequest{}, stream)
 	}()
 
 	// Dale tiempo a la goroutine para añadir el listener
@@ -0,0 +1,109 @@
+package whatsapp
+
+import (
+	"sync"
+	"time"
+
+	pb "github.com/juliog922/whatsmeow_go/src/proto"
+)
+
+const (
+	DefaultReplayEvents = 1000
+	DefaultReplayBytes  = 256 * 1024 * 1024
+)
+
+// EventLog keeps the most recent broadcast events in a ring buffer so a
+// client that reconnects can resume after the last sequence number it
+// processed. Old events are dropped when either the event or the byte limit
+// is exceeded.
+type EventLog struct {
+	mu       sync.Mutex
+	events   []*pb.MessageEvent
+	start    int
+	count    int
+	bytes    int
+	maxBytes int
+	lastSeq  uint64
+	notify   chan struct{}
+}
+
+// NewEventLog creates a log holding at most size events and maxBytes of
+// payload. Sequence numbers start at the boot time in nanoseconds, so they
+// keep growing across restarts and a stale client cursor never skips new
+// events.
+func NewEventLog(size, maxBytes int) *EventLog {
+	if size <= 0 {
+		size = DefaultReplayEvents
+	}
+	if maxBytes <= 0 {
+		maxBytes = DefaultReplayBytes
+	}
+	return &EventLog{
+		events:   make([]*pb.MessageEvent, size),
+		maxBytes: maxBytes,
+		lastSeq:  uint64(time.Now().UnixNano()),
+		notify:   make(chan struct{}),
+	}
+}
+
+func eventSize(msg *pb.MessageEvent) int {
+	return len(msg.Binary) + len(msg.Text) + len(msg.Filename) + 64
+}
+
+// Append assigns the next sequence number to msg, stores it and wakes up
+// every stream waiting for new events.
+func (l *EventLog) Append(msg *pb.MessageEvent) uint64 {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+
+	l.lastSeq++
+	msg.Seq = l.lastSeq
+
+	size := eventSize(msg)
+	for l.count > 0 && (l.count == len(l.events) || l.bytes+size > l.maxBytes) {
+		l.bytes -= eventSize(l.events[l.start])
+		l.events[l.start] = nil
+		l.start = (l.start + 1) % len(l.events)
+		l.count--
+	}
+
+	l.events[(l.start+l.count)%len(l.events)] = msg
+	l.count++
+	l.bytes += size
+
+	close(l.notify)
+	l.notify = make(chan struct{})
+	return msg.Seq
+}
+
+// Since returns the retained events with a sequence number greater than
+// after, oldest first, and a channel that is closed on the next Append.
+// missed is true when events after the cursor were already dropped.
+func (l *EventLog) Since(after uint64) (events []*pb.MessageEvent, missed bool, next <-chan struct{}) {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+
+	// Un cursor de otra ejecución con el reloj adelantado: se reenvía todo
+	if after > l.lastSeq {
+		after = 0
+	}
+
+	for i := 0; i < l.count; i++ {
+		msg := l.events[(l.start+i)%len(l.events)]
+		if msg.Seq <= after {
+			continue
+		}
+		if len(events) == 0 && after != 0 && msg.Seq > after+1 {
+			missed = true
+		}
+		events = append(events, msg)
+	}
+	return events, missed, l.notify
+}
+
+// LastSeq returns the sequence number of the latest appended event.
+func (l *EventLog) LastSeq() uint64 {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+	return l.lastSeq
+}
@@ -0,0 +1,108 @@
+package whatsapp_test
+
+import (
+	"context"
+	"sync"
+	"testing"
+	"time"
+
+	pb "github.com/juliog922/whatsmeow_go/src/proto"
+	"github.com/juliog922/whatsmeow_go/src/whatsapp"
+	"github.com/sirupsen/logrus"
+	"github.com/stretchr/testify/assert"
+	"github.com/stretchr/testify/mock"
+)
+
+func TestEventLog_SinceReturnsEventsAfterCursor(t *testing.T) {
+	log := whatsapp.NewEventLog(10, 1024*1024)
+
+	first := log.Append(&pb.MessageEvent{Text: "uno"})
+	second := log.Append(&pb.MessageEvent{Text: "dos"})
+	log.Append(&pb.MessageEvent{Text: "tres"})
+
+	assert.Equal(t, first+1, second, "sequence numbers should be consecutive")
+
+	events, missed, _ := log.Since(first)
+	assert.False(t, missed)
+	assert.Len(t, events, 2)
+	assert.Equal(t, "dos", events[0].Text)
+	assert.Equal(t, "tres", events[1].Text)
+
+	events, _, _ = log.Since(0)
+	assert.Len(t, events, 3, "cursor 0 should replay every retained event")
+
+	events, _, _ = log.Since(log.LastSeq())
+	assert.Empty(t, events)
+}
+
+func TestEventLog_DropsOldestWhenFull(t *testing.T) {
+	log := whatsapp.NewEventLog(2, 1024*1024)
+
+	first := log.Append(&pb.MessageEvent{Text: "uno"})
+	log.Append(&pb.MessageEvent{Text: "dos"})
+	log.Append(&pb.MessageEvent{Text: "tres"})
+
+	events, missed, _ := log.Since(first - 1)
+	assert.True(t, missed, "dropped events should be reported")
+	assert.Len(t, events, 2)
+	assert.Equal(t, "dos", events[0].Text)
+}
+
+func TestEventLog_RespectsByteLimit(t *testing.T) {
+	log := whatsapp.NewEventLog(10, 1000)
+
+	log.Append(&pb.MessageEvent{Binary: make([]byte, 600)})
+	log.Append(&pb.MessageEvent{Binary: make([]byte, 600)})
+
+	events, _, _ := log.Since(0)
+	assert.Len(t, events, 1, "oldest event should be dropped to stay under the byte limit")
+}
+
+func TestEventLog_NotifiesOnAppend(t *testing.T) {
+	log := whatsapp.NewEventLog(10, 1024*1024)
+
+	_, _, next := log.Since(0)
+	log.Append(&pb.MessageEvent{Text: "hola"})
+
+	select {
+	case <-next:
+	case <-time.After(time.Second):
+		t.Fatal("Append should wake up waiting streams")
+	}
+}
+
+func TestStreamMessages_ReplaysFromCursor(t *testing.T) {
+	ctx, cancel := context.WithCancel(context.Background())
+	defer cancel()
+
+	listeners := make(map[pb.WhatsAppService_StreamMessagesServer]struct{})
+	server := &whatsapp.WhatsAppServer{
+		Listeners: &listeners,
+		Logger:    logrus.New(),
+		Lock:      new(sync.Mutex),
+		Events:    whatsapp.NewEventLog(10, 1024*1024),
+	}
+
+	// Eventos emitidos mientras el cliente estaba desconectado
+	processed := &pb.MessageEvent{Text: "procesado"}
+	missed := &pb.MessageEvent{Text: "perdido"}
+	server.BroadcastMessage(processed)
+	server.BroadcastMessage(missed)
+
+	stream := &mockStream{ctx: ctx}
+	stream.On("Send", mock.Anything).Return(nil)
+
+	go func() {
+		_ = server.StreamMessages(&pb.StreamRequest{AfterSeq: processed.Seq}, stream)
+	}()
+	time.Sleep(20 * time.Millisecond)
+
+	live := &pb.MessageEvent{Text: "nuevo"}
+	server.BroadcastMessage(live)
+	time.Sleep(50 * time.Millisecond)
+
+	stream.AssertNotCalled(t, "Send", processed)
+	stream.AssertCalled(t, "Send", missed)
+	stream.AssertCalled(t, "Send", live)
+	stream.AssertNumberOfCalls(t, "Send", 2)
+}
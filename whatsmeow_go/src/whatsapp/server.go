@@ -18,7 +18,19 @@ type WhatsAppServer struct {
 	Logger         *logrus.Logger
 	BroadcastFunc  func(msg *pb.MessageEvent)
 	HasClientsFunc func() bool
+	Events         *EventLog
 }
 
 // Ensure it implements the gRPC interface
 var _ pb.WhatsAppServiceServer = (*WhatsAppServer)(nil)
+
+// eventLog returns the replay log, creating one with default limits when the
+// server was built without it.
+func (s *WhatsAppServer) eventLog() *EventLog {
+	s.Lock.Lock()
+	defer s.Lock.Unlock()
+	if s.Events == nil {
+		s.Events = NewEventLog(DefaultReplayEvents, DefaultReplayBytes)
+	}
+	return s.Events
+}